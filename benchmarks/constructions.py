@@ -0,0 +1,57 @@
+"""
+Benchmark of the constructions of the starting path, and of the 2-opt swapping that follows
+"""
+import os
+import time
+from typing import Tuple
+
+import click
+
+from traveling_salesperson.algorithm import (construct_path, CONSTRUCTIONS, SWAP_STRATEGIES,
+                                             two_node_swap_optimization)
+from traveling_salesperson.etl import etl
+from traveling_salesperson.geography import distance_matrix, nearest_neighbors
+
+
+@click.command()
+@click.option('--filename', '-f', 'filenames', multiple=True, show_default=True,
+              default=[os.path.join('data', 'djbouti38.csv'),
+                       os.path.join('data', 'luxembourg980.csv')])
+@click.option('--neighbors', '-k', default=10, show_default=True, type=click.IntRange(min=0),
+              help='The number of candidate neighbors of each city (0 considers all swaps)')
+@click.option('--strategy', '-s', default='best', show_default=True,
+              type=click.Choice(SWAP_STRATEGIES))
+def main(filenames: Tuple[str, ...], neighbors: int, strategy: str) -> None:
+    """Time each construction, and the 2-opt swapping of the path it builds
+
+    Args:
+        filenames: the relative paths to the csv files to use
+        neighbors: the number of candidate neighbors of each city, or 0 for all swaps
+        strategy: whether to apply the best or the first improving 2-opt swap
+    """
+    print(f'{"file":<20}{"construction":<18}{"ms build":>10}{"length":>10}'
+          f'{"ms 2-opt":>10}{"length":>10}')
+    for filename in filenames:
+        cities, scale = etl(filename)
+        distances = distance_matrix(cities)
+        candidates = nearest_neighbors(cities, neighbors) if neighbors else None
+
+        for construction in CONSTRUCTIONS:
+            start_time = time.perf_counter()
+            path, total_distance = construct_path(cities, distances, construction, candidates)
+            build_time = time.perf_counter() - start_time
+            built_distance = total_distance + distances[path[-1]][path[0]]
+
+            start_time = time.perf_counter()
+            path, total_distance = two_node_swap_optimization(path, distances, total_distance,
+                                                              candidates, strategy)
+            swap_time = time.perf_counter() - start_time
+            swapped_distance = total_distance + distances[path[-1]][path[0]]
+
+            print(f'{os.path.basename(filename):<20}{construction:<18}{build_time * 1000:>10.2f}'
+                  f'{built_distance / scale:>10.0f}{swap_time * 1000:>10.2f}'
+                  f'{swapped_distance / scale:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark of loading the city data, on a large synthetic csv file
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional, Tuple
+
+import click
+
+from benchmarks.instances import generate_coordinates, write_csv
+from traveling_salesperson import City
+from traveling_salesperson.etl import etl
+from traveling_salesperson.geography import city_coordinates
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def pandas_etl(filename: str) -> list:
+    """The former loading of the city data, with pandas and a City tuple per row, for reference"""
+    frame = pd.read_csv(filename)
+    return frame.apply(lambda row: City(*row), axis=1).to_list()
+
+
+def measure(load: Callable[[str], object], filename: str) -> Tuple[float, float]:
+    """Time the loading of the file, up to the array of coordinates, and then trace the peak
+    memory of a second load (tracing slows down the allocations, so it is not timed)
+
+    Args:
+        load: The function loading the file
+        filename: The name of the file
+    Returns:
+        A tuple with
+            (1) the number of seconds taken
+            (2) the peak memory allocated, in MB
+    """
+    start_time = time.perf_counter()
+    city_coordinates(load(filename))
+    seconds = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    city_coordinates(load(filename))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2 ** 20
+
+
+@click.command()
+@click.option('--rows', '-n', default=1_000_000, show_default=True, type=click.IntRange(min=1),
+              help='The number of cities in the synthetic file')
+@click.option('--filename', '-f', default=None,
+              help='Load this file instead of a synthetic one')
+def main(rows: int, filename: Optional[str]) -> None:
+    """Time the loading of the city data, and report its peak memory, with the columnar loader
+    and (when pandas is installed) with the former pandas loader
+
+    Args:
+        rows: the number of cities in the synthetic file
+        filename: the relative path to a csv file to use instead of a synthetic one
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if filename is None:
+            filename = os.path.join(directory, 'synthetic.csv')
+            write_csv(filename, generate_coordinates('random', rows))
+
+        loaders = {'columnar': lambda name: etl(name)[0]}
+        if pd is not None:
+            loaders['pandas'] = pandas_etl
+
+        print(f'{"loader":<12}{"seconds":>10}{"peak MB":>10}')
+        for loader, load in loaders.items():
+            seconds, peak = measure(load, filename)
+            print(f'{loader:<12}{seconds:>10.2f}{peak:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark of updating a solved path for a few added and removed cities, against solving again
+"""
+import time
+
+import click
+import numpy as np
+
+from benchmarks.instances import generate_coordinates, INSTANCE_KINDS
+from traveling_salesperson import CityTable
+from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson.geography import distance_matrix, nearest_neighbors
+from traveling_salesperson.incremental import update_path
+
+
+@click.command()
+@click.option('--kind', default='random', show_default=True, type=click.Choice(INSTANCE_KINDS))
+@click.option('--cities', '-n', default=5000, show_default=True, type=click.IntRange(min=10))
+@click.option('--change', default=0.01, show_default=True, type=click.FloatRange(0, 1),
+              help='The fraction of cities removed, and of cities added')
+@click.option('--neighbors', '-k', default=10, show_default=True, type=click.IntRange(min=1))
+@click.option('--seed', default=0, show_default=True)
+def main(kind: str, cities: int, change: float, neighbors: int, seed: int) -> None:
+    """Solve an instance, then change a fraction of its cities, and time updating the path
+    (copying the distance matrix, and in place) against solving the changed instance again
+
+    Args:
+        kind: the kind of instance
+        cities: the number of cities
+        change: the fraction of cities removed, and of cities added
+        neighbors: the number of candidate neighbors of each city
+        seed: the seed of the instance
+    """
+    changed = max(int(cities * change), 1)
+    coordinates = generate_coordinates(kind, cities + changed, seed)
+    city_table = CityTable(np.arange(cities), coordinates[:cities])
+    added_cities = CityTable(np.arange(cities, cities + changed), coordinates[cities:])
+    removed = np.random.RandomState(seed).choice(cities, changed, replace=False).tolist()
+
+    distances = distance_matrix(city_table)
+    path, _ = determine_path(city_table, distances, nearest_neighbors(city_table, neighbors),
+                             'first')
+
+    print(f'{"solve":<14}{"seconds":>10}{"length":>12}')
+    for in_place in (False, True):
+        start_time = time.perf_counter()
+        solution = update_path(city_table, distances, path, added_cities, removed, neighbors,
+                               in_place=in_place)
+        seconds = time.perf_counter() - start_time
+        print(f'{"in place" if in_place else "update":<14}{seconds:>10.3f}'
+              f'{solution.total_distance:>12}')
+
+    start_time = time.perf_counter()
+    _, total_distance = determine_path(solution.cities, distance_matrix(solution.cities),
+                                       nearest_neighbors(solution.cities, neighbors), 'first')
+    print(f'{"from scratch":<14}{time.perf_counter() - start_time:>10.3f}{total_distance:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Reproducible synthetic instances for the benchmarks
+"""
+import numpy as np
+
+
+INSTANCE_KINDS = ('random', 'clustered', 'grid')
+
+# The side of the square the cities are placed in
+SIDE = 100000.0
+
+
+def generate_coordinates(kind: str, cities: int, seed: int = 0) -> np.ndarray:
+    """Generate the coordinates of a synthetic instance:
+
+        'random': cities spread uniformly over a square
+        'clustered': cities in normally distributed clusters of about 100 cities, around centers
+            spread uniformly over the square
+        'grid': cities on the points of a square grid, filled row by row
+
+    Args:
+        kind: The kind of instance
+        cities: The number of cities
+        seed: The seed for the random coordinates
+    Returns:
+        An n x 2 array with the x and y coordinates of each city
+    Raises:
+        ValueError: if the kind of instance is unknown
+    """
+    random = np.random.RandomState(seed)
+    if kind == 'random':
+        return random.uniform(0, SIDE, (cities, 2))
+    if kind == 'clustered':
+        clusters = max(cities // 100, 1)
+        centers = random.uniform(0, SIDE, (clusters, 2))
+        spread = SIDE / (4 * np.sqrt(clusters))
+        return centers[random.randint(clusters, size=cities)] + random.normal(0, spread,
+                                                                              (cities, 2))
+    if kind == 'grid':
+        side = int(np.ceil(np.sqrt(cities)))
+        spacing = SIDE / side
+        indexes = np.arange(cities)
+        return np.column_stack((indexes % side, indexes // side)) * spacing
+    raise ValueError(f'Unknown kind of instance: {kind}')
+
+
+def write_csv(filename: str, coordinates: np.ndarray) -> None:
+    """Write the cities to a csv file, in the format read by etl.etl, named after their index
+
+    Args:
+        filename: The name of the file to write
+        coordinates: An n x 2 array with the x and y coordinates of each city
+    """
+    with open(filename, 'w') as file:
+        file.write('name,x,y\n')
+        np.savetxt(file, np.column_stack((np.arange(len(coordinates)), coordinates)),
+                   delimiter=',', fmt=('%d', '%.6f', '%.6f'))
@@ -0,0 +1,74 @@
+"""
+Benchmark of the packed (upper-triangular) distance matrix against the full matrix: the time to
+compute it, the peak memory it takes, and the time to solve with it
+"""
+import multiprocessing
+import time
+from typing import Dict
+
+import click
+import numpy as np
+
+from benchmarks.instances import generate_coordinates, INSTANCE_KINDS
+from traveling_salesperson import CityTable
+from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson.geography import DISTANCE_DTYPES, distance_matrix, nearest_neighbors
+from traveling_salesperson.profiling import peak_memory_mb
+
+
+def measure(kind: str,
+            cities: int,
+            dtype: str,
+            packed: bool,
+            neighbors: int,
+            seed: int) -> Dict[str, float]:
+    """Compute the distance matrix of an instance and solve it, in a fresh process
+
+    Returns:
+        The seconds taken to compute the matrix and to solve, the growth of the peak memory of
+            the process while the matrix is computed, in MB, and the path length
+    """
+    city_table = CityTable(np.arange(cities), generate_coordinates(kind, cities, seed))
+    candidates = nearest_neighbors(city_table, neighbors)
+    memory_before = peak_memory_mb()
+    start_time = time.perf_counter()
+    distances = distance_matrix(city_table, dtype=dtype, packed=packed)
+    matrix_seconds = time.perf_counter() - start_time
+    matrix_mb = peak_memory_mb() - memory_before
+
+    start_time = time.perf_counter()
+    _, total_distance = determine_path(city_table, distances, candidates, 'first')
+    return dict(matrix_seconds=matrix_seconds, matrix_mb=matrix_mb,
+                solve_seconds=time.perf_counter() - start_time, total_distance=total_distance)
+
+
+@click.command()
+@click.option('--kind', default='random', show_default=True, type=click.Choice(INSTANCE_KINDS))
+@click.option('--cities', '-n', default=20000, show_default=True, type=click.IntRange(min=10))
+@click.option('--dtype', '-d', default='int32', show_default=True,
+              type=click.Choice(DISTANCE_DTYPES))
+@click.option('--neighbors', '-k', default=10, show_default=True, type=click.IntRange(min=1))
+@click.option('--seed', default=0, show_default=True)
+def main(kind: str, cities: int, dtype: str, neighbors: int, seed: int) -> None:
+    """Compute the full and the packed distance matrix of an instance, each in a fresh process,
+    and solve it with each
+
+    Args:
+        kind: the kind of instance
+        cities: the number of cities
+        dtype: the type used to store the distances
+        neighbors: the number of candidate neighbors of each city
+        seed: the seed of the instance
+    """
+    context = multiprocessing.get_context('spawn')
+    print(f'{"matrix":<10}{"matrix s":>10}{"matrix MB":>12}{"solve s":>10}{"length":>12}')
+    for packed in (False, True):
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (kind, cities, dtype, packed, neighbors, seed))
+        print(f'{"packed" if packed else "full":<10}{result["matrix_seconds"]:>10.3f}'
+              f'{result["matrix_mb"]:>12.1f}{result["solve_seconds"]:>10.3f}'
+              f'{result["total_distance"]:>12}')
+
+
+if __name__ == '__main__':
+    main()
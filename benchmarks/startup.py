@@ -0,0 +1,64 @@
+"""
+Benchmark of the startup time of the command line interface, against a target
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+import click
+
+
+def time_command(arguments: List[str], repeat: int) -> float:
+    """Time a fresh run of the command line interface with the given arguments
+
+    Args:
+        arguments: The command line arguments
+        repeat: The number of runs
+    Returns:
+        The median number of seconds taken by a run
+    """
+    seconds = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'traveling_salesperson'] + arguments, check=True,
+                       stdout=subprocess.DEVNULL)
+        seconds.append(time.perf_counter() - start_time)
+    return statistics.median(seconds)
+
+
+@click.command()
+@click.option('--repeat', '-n', default=5, show_default=True, type=click.IntRange(min=1),
+              help='The number of runs of each command')
+@click.option('--help-target', default=0.3, show_default=True, type=click.FloatRange(min=0),
+              help='The target number of seconds for printing the help')
+@click.option('--solve-target', default=0.6, show_default=True, type=click.FloatRange(min=0),
+              help='The target number of seconds for solving a tiny instance, without a plot')
+def main(repeat: int, help_target: float, solve_target: float) -> None:
+    """Time printing the help, and solving a tiny instance without a plot, in a new process,
+    and fail if either exceeds its target
+
+    Args:
+        repeat: the number of runs of each command
+        help_target: the target number of seconds for printing the help
+        solve_target: the target number of seconds for solving a tiny instance
+    """
+    commands = {
+        'help': (['--help'], help_target),
+        'solve': (['-f', os.path.join('tests', 'fixtures', 'cities.csv'), '--no-plot',
+                   '--no-cache'], solve_target),
+    }
+    print(f'{"command":<12}{"seconds":>10}{"target":>10}')
+    missed = False
+    for command, (arguments, target) in commands.items():
+        seconds = time_command(arguments, repeat)
+        missed = missed or seconds > target
+        print(f'{command:<12}{seconds:>10.3f}{target:>10.3f}')
+    if missed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
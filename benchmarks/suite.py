@@ -0,0 +1,192 @@
+"""
+Benchmark suite timing each phase of the solver on synthetic instances, with a check against a
+stored baseline
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import click
+
+from benchmarks.instances import generate_coordinates, INSTANCE_KINDS, write_csv
+from traveling_salesperson.algorithm import (construct_path, CONSTRUCTIONS,
+                                             two_node_swap_optimization)
+from traveling_salesperson.etl import etl
+from traveling_salesperson.geography import (CoordinateDistanceMatrix, distance_matrix,
+                                             nearest_neighbors)
+
+
+PHASES = ('etl', 'distances', 'neighbors', 'construction', 'local_search')
+FIELDS = ('kind', 'cities') + PHASES + ('length',)
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+
+def run_instance(kind: str,
+                 cities: int,
+                 directory: str,
+                 seed: int = 0,
+                 neighbors: int = 10,
+                 construction: str = 'greedy-edge',
+                 max_matrix_cities: int = 20000) -> Dict[str, object]:
+    """Solve a synthetic instance, timing each phase separately: loading the csv file (etl),
+    computing the distance matrix, the candidate neighbors, the construction of the starting
+    path, and the 2-opt local search (with the first improvement strategy).
+
+    Args:
+        kind: The kind of instance (see instances.generate_coordinates)
+        cities: The number of cities
+        directory: The directory to write the csv file of the instance to
+        seed: The seed of the instance
+        neighbors: The number of candidate neighbors of each city
+        construction: How the starting path is built (see algorithm.construct_path)
+        max_matrix_cities: Above this number of cities, the distances are computed on demand
+            (see geography.CoordinateDistanceMatrix) instead of stored in a matrix
+    Returns:
+        The number of seconds taken by each phase, and the length of the closed path, along with
+            the kind and number of cities
+    """
+    filename = os.path.join(directory, f'{kind}{cities}.csv')
+    write_csv(filename, generate_coordinates(kind, cities, seed))
+    result = {'kind': kind, 'cities': cities}
+
+    start_time = time.perf_counter()
+    city_table, _ = etl(filename)
+    result['etl'] = _elapsed(start_time)
+
+    start_time = time.perf_counter()
+    if cities > max_matrix_cities:
+        distances = CoordinateDistanceMatrix(city_table)
+    else:
+        distances = distance_matrix(city_table)
+    result['distances'] = _elapsed(start_time)
+
+    start_time = time.perf_counter()
+    candidates = nearest_neighbors(city_table, neighbors)
+    result['neighbors'] = _elapsed(start_time)
+
+    start_time = time.perf_counter()
+    path, total_distance = construct_path(city_table, distances, construction, candidates)
+    result['construction'] = _elapsed(start_time)
+
+    start_time = time.perf_counter()
+    path, total_distance = two_node_swap_optimization(path, distances, total_distance,
+                                                      candidates, 'first')
+    result['local_search'] = _elapsed(start_time)
+
+    result['length'] = int(total_distance + distances[path[-1]][path[0]])
+    return result
+
+
+def find_regressions(results: List[Dict[str, object]],
+                     baseline: List[Dict[str, object]],
+                     tolerance: float = 0.25,
+                     min_seconds: float = 0.01) -> List[str]:
+    """Compare the results with the baseline, for the instances found in both.  A phase has
+    regressed if it is slower by more than the tolerance (and by more than min_seconds, to
+    ignore the noise of very short phases), and the solver has regressed if the path is longer.
+
+    Args:
+        results: The results of run_instance
+        baseline: The stored results to compare with
+        tolerance: The allowed relative slowdown of each phase
+        min_seconds: The allowed absolute slowdown of each phase
+    Returns:
+        A description of each regression
+    """
+    baseline_results = {(result['kind'], result['cities']): result for result in baseline}
+    regressions = []
+    for result in results:
+        expected = baseline_results.get((result['kind'], result['cities']))
+        if expected is None:
+            continue
+        instance = f'{result["kind"]} {result["cities"]}'
+        for phase in PHASES:
+            if (result[phase] > expected[phase] * (1 + tolerance)
+                    and result[phase] - expected[phase] > min_seconds):
+                regressions.append(f'{instance}: {phase} took {result[phase]:.3f} s '
+                                   f'instead of {expected[phase]:.3f} s')
+        if result['length'] > expected['length']:
+            regressions.append(f'{instance}: path length {result["length"]} '
+                               f'instead of {expected["length"]}')
+    return regressions
+
+
+def write_results(filename: str, results: List[Dict[str, object]]) -> None:
+    """Write the results to a JSON file, or to a CSV file if the name ends with .csv"""
+    with open(filename, 'w', newline='') as file:
+        if filename.endswith('.csv'):
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+
+
+def _elapsed(start_time: float) -> float:
+    """Helper method for the number of seconds since the start time, rounded to 0.1 ms"""
+    return round(time.perf_counter() - start_time, 4)
+
+
+@click.command()
+@click.option('--kind', '-k', 'kinds', multiple=True, default=INSTANCE_KINDS, show_default=True,
+              type=click.Choice(INSTANCE_KINDS))
+@click.option('--cities', '-n', 'sizes', multiple=True, type=click.IntRange(min=4),
+              default=[100, 1000, 10000, 100000], show_default=True)
+@click.option('--seed', default=0, show_default=True)
+@click.option('--construction', '-i', default='greedy-edge', show_default=True,
+              type=click.Choice(CONSTRUCTIONS))
+@click.option('--output', '-o', default=None,
+              help='Write the results to this JSON (or .csv) file, e.g. to update the baseline')
+@click.option('--baseline', '-b', default=DEFAULT_BASELINE, show_default=True,
+              help='Compare the results with this JSON file, and fail on regressions')
+@click.option('--tolerance', default=0.25, show_default=True, type=click.FloatRange(min=0),
+              help='The allowed relative slowdown of each phase')
+def main(kinds: Tuple[str, ...],
+         sizes: Tuple[int, ...],
+         seed: int,
+         construction: str,
+         output: str,
+         baseline: str,
+         tolerance: float) -> None:
+    """Time each phase of the solver on synthetic instances, and compare with the baseline
+
+    Args:
+        kinds: the kinds of instances
+        sizes: the numbers of cities
+        seed: the seed of the instances
+        construction: how the starting path is built
+        output: if given, the name of the JSON or CSV file to write the results to
+        baseline: the name of the JSON file with the results to compare with
+        tolerance: the allowed relative slowdown of each phase
+    """
+    print(f'{"kind":<12}{"cities":>8}' + ''.join(f'{phase:>14}' for phase in PHASES)
+          + f'{"length":>14}')
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in kinds:
+            for cities in sizes:
+                result = run_instance(kind, cities, directory, seed, construction=construction)
+                results.append(result)
+                print(f'{kind:<12}{cities:>8}'
+                      + ''.join(f'{result[phase]:>14.3f}' for phase in PHASES)
+                      + f'{result["length"]:>14}')
+
+    if output:
+        write_results(output, results)
+    if baseline and os.path.exists(baseline) and os.path.abspath(baseline) != os.path.abspath(
+            output or ''):
+        with open(baseline) as file:
+            regressions = find_regressions(results, json.load(file), tolerance)
+        for regression in regressions:
+            print('Regression:', regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of the engines used to find the best 2-opt swap, on the nearest neighbor path
+"""
+import os
+import time
+from typing import Tuple
+
+import click
+
+from traveling_salesperson.algorithm import (apply_swap, best_swap_from_rows,
+                                             best_swap_from_segments, nearest_neighbor_path)
+from traveling_salesperson.etl import etl
+from traveling_salesperson.geography import distance_matrix
+from traveling_salesperson.tour import Tour
+
+
+ENGINES = {
+    'segments': best_swap_from_segments,
+    'rows': best_swap_from_rows
+}
+
+
+@click.command()
+@click.option('--filename', '-f', 'filenames', multiple=True, show_default=True,
+              default=[os.path.join('data', 'djbouti38.csv'),
+                       os.path.join('data', 'luxembourg980.csv')])
+@click.option('--passes', '-p', default=3, show_default=True, type=click.IntRange(min=1),
+              help='The number of best-swap passes to time')
+def main(filenames: Tuple[str, ...], passes: int) -> None:
+    """Time the passes of each swap engine, starting from the nearest neighbor path
+
+    Args:
+        filenames: the relative paths to the csv files to use
+        passes: the number of best-swap passes to time
+    """
+    print(f'{"file":<20}{"engine":<10}{"ms / pass":>12}{"speedup":>10}')
+    for filename in filenames:
+        cities, _ = etl(filename)
+        distances = distance_matrix(cities)
+        path, _ = nearest_neighbor_path(len(cities), distances)
+
+        timings = {}
+        for engine, find_best_swap in ENGINES.items():
+            tour = Tour(path)
+            start_time = time.perf_counter()
+            for _ in range(passes):
+                delta, segment = find_best_swap(tour, distances)
+                if delta < 0:
+                    apply_swap(tour, *segment)
+            timings[engine] = (time.perf_counter() - start_time) / passes
+
+        for engine, timing in timings.items():
+            print(f'{os.path.basename(filename):<20}{engine:<10}{timing * 1000:>12.2f}'
+                  f'{timings["segments"] / timing:>10.1f}x')
+
+
+if __name__ == '__main__':
+    main()
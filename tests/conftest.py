@@ -4,20 +4,16 @@ Fixtures used throughout the testing suite
 import os
 
 import numpy as np
-import pandas as pd
 import pytest
 
 from traveling_salesperson import City
 
 
 @pytest.fixture()
-def city_dataframe_fixture():
-    """An example of city data"""
-    return pd.DataFrame({
-        'name': ['a', 'b', 'c'],
-        'x': range(0, 1500, 500),
-        'y': range(0, 3000, 1000)
-    })
+def city_columns_fixture():
+    """An example of city data, as an array of names and an array of coordinates"""
+    return (np.array(['a', 'b', 'c']),
+            np.array([[0, 0], [500, 1000], [1000, 2000]], dtype=np.float64))
 
 
 @pytest.fixture()
@@ -30,6 +26,13 @@ def cities_fixture():
     ]
 
 
+@pytest.fixture()
+def ten_cities_fixture():
+    """Ten cities, for which the nearest neighbor path can be improved by swapping"""
+    return [City(str(i), x, y) for i, (x, y) in enumerate(
+        [(0, 0), (10, 0), (10, 10), (0, 10), (5, 1), (5, 9), (1, 5), (9, 5), (20, 20), (3, 17)])]
+
+
 @pytest.fixture()
 def distance_matrix_dict_fixture():
     """The expected distances between the example cities defined in tests/conftest.py"""
@@ -51,3 +54,13 @@ def distance_matrix_dict_fixture():
 def filename_fixture():
     """The name of the cities csv file for testing"""
     return os.path.join('tests', 'fixtures', 'cities.csv')
+
+
+@pytest.fixture(autouse=True)
+def cache_directory_fixture(tmp_path, monkeypatch):
+    """A fresh distance matrix cache directory (and tour store) for every test, instead of the
+    user's"""
+    directory = tmp_path / 'cache'
+    monkeypatch.setenv('TRAVELING_SALESPERSON_CACHE', str(directory))
+    monkeypatch.setenv('TRAVELING_SALESPERSON_TOURS', str(tmp_path / 'tours'))
+    return directory
@@ -2,13 +2,27 @@
 Functions tests for the etl.py module
 """
 # pragma pylint: disable=redefined-outer-name
-import pandas as pd
+import numpy as np
 
 from traveling_salesperson import etl
 
 
-def test_extract_reads_file_correctly(city_dataframe_fixture,
+def test_extract_reads_file_correctly(city_columns_fixture,
                                       filename_fixture):
     """Ensures that the extract() method reads in the data as expected"""
-    observed_frame = etl.extract(filename_fixture)
-    pd.testing.assert_frame_equal(observed_frame, city_dataframe_fixture)
+    observed_names, observed_coordinates = etl.extract(filename_fixture)
+    expected_names, expected_coordinates = city_columns_fixture
+    np.testing.assert_array_equal(observed_names, expected_names)
+    np.testing.assert_array_equal(observed_coordinates, expected_coordinates)
+    assert observed_coordinates.dtype == np.float64
+    assert observed_coordinates.flags.c_contiguous
+
+
+def test_extract_reads_columns_by_name(tmp_path):
+    """Ensures that the extract() method finds the columns by their header, in any order, and
+    reads a file with a single city"""
+    filename = tmp_path / 'cities.csv'
+    filename.write_text('y,name,x\n2.5,a,1.5\n')
+    observed_names, observed_coordinates = etl.extract(str(filename))
+    np.testing.assert_array_equal(observed_names, ['a'])
+    np.testing.assert_array_equal(observed_coordinates, [[1.5, 2.5]])
@@ -2,9 +2,10 @@
 Integration tests for the algorithm.py module
 """
 # pragma pylint: disable=redefined-outer-name
+import numpy as np
 import pytest
 
-from traveling_salesperson import algorithm
+from traveling_salesperson import algorithm, City, geography, SwapStatistics
 
 
 @pytest.fixture()
@@ -23,3 +24,96 @@ def test_algorithm_returns_valid_pick_list(cities_fixture,
     path, _ = algorithm.determine_path(cities_fixture,
                                        distance_matrix_dict_fixture[metric])
     assert set(path) == expected_city_names_fixture
+
+
+def test_algorithm_accepts_lazy_distance_matrix(cities_fixture,
+                                                distance_matrix_dict_fixture):
+    """Ensure that determine_path() gives the same answer with a lazily computed distance matrix
+    as with the materialized one"""
+    lazy_matrix = geography.LazyDistanceMatrix(cities_fixture, maxsize=1)
+    expected = algorithm.determine_path(cities_fixture, distance_matrix_dict_fixture['euclidean'])
+    assert algorithm.determine_path(cities_fixture, lazy_matrix) == expected
+    assert lazy_matrix.misses > 0
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'manhattan'])
+def test_algorithm_with_neighbors_matches_full_search(cities_fixture,
+                                                      distance_matrix_dict_fixture,
+                                                      metric):
+    """Ensure that determine_path() finds a path as short with candidate neighbors as without"""
+    distances = distance_matrix_dict_fixture[metric]
+    neighbors = geography.nearest_neighbors(cities_fixture, 2, metric)
+    _, expected_distance = algorithm.determine_path(cities_fixture, distances)
+    _, observed_distance = algorithm.determine_path(cities_fixture, distances, neighbors)
+    assert observed_distance == expected_distance
+
+
+@pytest.mark.parametrize('strategy', ['best', 'first'])
+def test_algorithm_path_begins_with_start_city(cities_fixture,
+                                               distance_matrix_dict_fixture,
+                                               strategy):
+    """Ensure that determine_path() returns a path beginning with the requested city"""
+    path, _ = algorithm.determine_path(cities_fixture,
+                                       distance_matrix_dict_fixture['euclidean'],
+                                       strategy=strategy,
+                                       start=2)
+    assert path[0] == 'c'
+
+
+@pytest.mark.parametrize('strategy', ['best', 'first'])
+@pytest.mark.parametrize('neighbors', [None, 3])
+@pytest.mark.parametrize('moves', [('2-opt',), algorithm.MOVE_SET])
+def test_algorithm_total_distance_matches_closed_path(ten_cities_fixture, strategy, neighbors,
+                                                      moves):
+    """Ensure that the total distance returned by determine_path() is the length of the closed
+    path, including after swaps that change the edge from the last city back to the first"""
+    distances = geography.distance_matrix(ten_cities_fixture)
+    candidates = geography.nearest_neighbors(ten_cities_fixture, neighbors) if neighbors else None
+    path, total_distance = algorithm.determine_path(ten_cities_fixture, distances, candidates,
+                                                    strategy, moves=moves)
+    indexes = [int(name) for name in path]
+    assert total_distance == sum(distances[indexes[i - 1]][indexes[i]]
+                                 for i in range(len(indexes)))
+
+
+@pytest.mark.parametrize('construction', algorithm.CONSTRUCTIONS)
+@pytest.mark.parametrize('neighbors', [None, 3])
+def test_algorithm_runs_each_construction(ten_cities_fixture, construction, neighbors):
+    """Ensure that determine_path() improves the path of each construction, from the start city,
+    and returns the length of the closed path"""
+    distances = geography.distance_matrix(ten_cities_fixture)
+    candidates = geography.nearest_neighbors(ten_cities_fixture, neighbors) if neighbors else None
+    path, total_distance = algorithm.determine_path(ten_cities_fixture, distances, candidates,
+                                                    start=4, construction=construction)
+    assert path[0] == ten_cities_fixture[4].name
+    indexes = [int(name) for name in path]
+    assert sorted(indexes) == list(range(10))
+    assert total_distance == sum(distances[indexes[i - 1]][indexes[i]]
+                                 for i in range(len(indexes)))
+
+
+def test_algorithm_engines_find_the_same_path(ten_cities_fixture):
+    """Ensure that determine_path() gives the same answer with either swap engine"""
+    distances = geography.distance_matrix(ten_cities_fixture)
+    expected = algorithm.determine_path(ten_cities_fixture, distances, engine='segments')
+    assert algorithm.determine_path(ten_cities_fixture, distances, engine='rows') == expected
+
+
+def test_iterated_local_search_is_deterministic_and_no_worse():
+    """Ensure that the iterated local search gives the same path for the same seed, no longer
+    than the local search alone, and keeps the determine_path() return contract"""
+    random = np.random.RandomState(2)
+    cities = [City(str(i), *xy) for i, xy in enumerate(random.uniform(0, 1000, (80, 2)))]
+    distances = geography.distance_matrix(cities)
+    neighbors = geography.nearest_neighbors(cities, 8)
+    _, local_distance = algorithm.determine_path(cities, distances, neighbors, 'first')
+
+    statistics = SwapStatistics()
+    first_run = algorithm.determine_path(cities, distances, neighbors, 'first', statistics,
+                                         max_iterations=50, seed=3)
+    second_run = algorithm.determine_path(cities, distances, neighbors, 'first',
+                                          max_iterations=50, seed=3)
+    assert first_run == second_run
+    assert first_run[1] <= local_distance
+    assert set(first_run[0]) == {city.name for city in cities}
+    assert statistics.kicks == 50
@@ -2,7 +2,13 @@
 Integration tests for __main__.py
 """
 # pragma pylint: disable=redefined-outer-name
+import json
+import os
+import subprocess
+import sys
+
 from click.testing import CliRunner
+import numpy as np
 import pytest
 
 from traveling_salesperson import __main__ as main
@@ -29,9 +35,290 @@ def test_main_runs(mocker, filename_fixture):
 @pytest.mark.parametrize('arg_list,error_code',
                          [(['-x', 'bad_arg'], 2),  # Command line error
                           (['-m', 'de-sitter'], 2),  # Command line error
+                          (['-c', 'atlantis'], 2),  # Command line error
                           (['-f', 'bad_file'], 1)])  # File not found error
 def test_main_fails_with_bad_argument(arg_list, error_code):
     """Ensures that main() has an error (code -1) when run with unsupported arguments."""
     runner = CliRunner()
     result = runner.invoke(main.main, arg_list)
     assert result.exit_code == error_code
+
+
+def test_main_runs_with_lazy_distance_matrix(mocker, filename_fixture):
+    """Ensures that main() computes distances lazily, and reports the cache, when asked to."""
+    mock_distance = mocker.spy(main, 'distance_matrix')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--row-cache', '2'])
+    assert result.exit_code == 0
+    assert 'Distance Cache' in result.output
+    mock_distance.assert_not_called()
+
+
+@pytest.mark.parametrize('strategy', ['best', 'first'])
+def test_main_reports_swaps_for_each_strategy(filename_fixture, strategy):
+    """Ensures that main() reports the number of swaps evaluated and applied."""
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '-s', strategy])
+    assert result.exit_code == 0
+    assert 'Swaps Evaluated' in result.output
+    assert 'Swaps Applied' in result.output
+
+
+def test_main_starts_from_named_city(filename_fixture):
+    """Ensures that main() starts the path from the named city."""
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '-c', 'b'])
+    assert result.exit_code == 0
+    assert "Path:  ['b'" in result.output
+
+
+def test_main_runs_with_several_moves(filename_fixture):
+    """Ensures that main() accepts several local search moves."""
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture,
+                                       '-M', '2-opt', '-M', 'or-opt', '-M', 'segment-insertion'])
+    assert result.exit_code == 0
+
+
+def test_main_runs_iterated_local_search(filename_fixture):
+    """Ensures that main() runs the iterated local search, and reports the number of kicks."""
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--max-iterations', '5',
+                                       '--time-limit', '1', '--seed', '7'])
+    assert result.exit_code == 0
+    assert 'Kicks' in result.output
+
+
+def test_main_reports_lower_bound_and_stops_at_target_gap(mocker, filename_fixture):
+    """Ensures that main() reports the lower bound and the gap next to the path length, and
+    passes on the path length at which to stop for the target gap."""
+    mock_determine = mocker.spy(main, 'determine_path')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--target-gap', '0.5',
+                                       '--time-limit', '5'])
+    assert result.exit_code == 0
+    assert 'Lower Bound:  4472.0' in result.output
+    assert 'Gap:  0.00%' in result.output
+    assert mock_determine.call_args[1]['target_distance'] == 4472 * 1.5
+    assert 'Kicks:  0' in result.output
+
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--lower-bound', '-C', '2'])
+    assert result.exit_code == 2
+
+
+def test_main_runs_in_parallel(mocker, filename_fixture):
+    """Ensures that main() runs several start cities in parallel, and reports each run."""
+    mock_parallel = mocker.spy(main, 'multi_start_path')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--workers', '2', '--runs', '3'])
+    assert result.exit_code == 0
+    assert result.output.count('Run ') == 3
+    mock_parallel.assert_called_once()
+
+
+def test_main_refuses_parallel_runs_with_row_cache(filename_fixture):
+    """Ensures that main() does not combine parallel runs with a lazy distance matrix."""
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '-w', '2', '-r', '2'])
+    assert result.exit_code == 2
+
+
+@pytest.mark.parametrize('method', ['grid', 'kmeans'])
+def test_main_runs_spatial_decomposition(mocker, filename_fixture, method):
+    """Ensures that main() solves clusters without the full distance matrix, and reports the
+    time taken by each stage."""
+    mock_distance = mocker.spy(main, 'distance_matrix')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--cluster-size', '2',
+                                       '--decomposition', method, '-k', '2'])
+    assert result.exit_code == 0
+    assert 'Time to Stitch' in result.output
+    mock_distance.assert_not_called()
+
+
+@pytest.mark.parametrize('construction', ['nearest-neighbor', 'greedy-edge', 'hilbert-curve'])
+def test_main_runs_each_construction(filename_fixture, construction):
+    """Ensures that main() accepts each construction of the starting path."""
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--construction', construction])
+    assert result.exit_code == 0
+
+
+def test_main_reuses_cached_distance_matrix(mocker, filename_fixture, cache_directory_fixture):
+    """Ensures that main() computes the distance matrix once, and reuses the cached one on the
+    next run, unless told not to."""
+    mock_distance = mocker.spy(main, 'distance_matrix')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture])
+    assert 'Matrix Cache:  miss' in result.output
+    result = runner.invoke(main.main, ['-f', filename_fixture])
+    assert 'Matrix Cache:  hit' in result.output
+    assert mock_distance.call_count == 1
+
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--no-cache'])
+    assert result.exit_code == 0
+    assert 'Matrix Cache' not in result.output
+    assert mock_distance.call_count == 2
+    assert len(list(cache_directory_fixture.iterdir())) == 1
+
+
+def test_main_solves_with_packed_distance_matrix(filename_fixture, cache_directory_fixture):
+    """Ensures that main() finds the same path with a packed distance matrix, which is cached
+    apart from the full matrix, and refuses to pack distances it does not compute."""
+    runner = CliRunner()
+    full = runner.invoke(main.main, ['-f', filename_fixture])
+    packed = runner.invoke(main.main, ['-f', filename_fixture, '--packed'])
+    assert packed.exit_code == 0
+    assert 'Matrix Cache:  miss' in packed.output
+    assert len(list(cache_directory_fixture.iterdir())) == 2
+    total_length = [line for line in full.output.splitlines() if 'Total Path Length' in line]
+    assert total_length[0] in packed.output
+
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--packed', '--row-cache', '2'])
+    assert result.exit_code == 2
+
+
+def test_main_writes_profile_report(filename_fixture, tmp_path):
+    """Ensures that main() prints the time of each phase, and writes them to the JSON report
+    along with the options and results of the run."""
+    report_file = tmp_path / 'report.json'
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--profile',
+                                       '--report', str(report_file)])
+    assert result.exit_code == 0
+    assert 'Phase local_search' in result.output
+
+    report = json.loads(report_file.read_text())
+    assert [phase['name'] for phase in report['phases']] == [
+        'etl', 'distances', 'neighbors', 'construction', 'local_search', 'plot']
+    assert report['trajectory'][-1][1] == report['total_distance']
+    assert report['passes'] >= 1
+
+
+def test_main_skips_plot(mocker, filename_fixture):
+    """Ensures that main() does not plot the path when told not to."""
+    mock_plot = mocker.spy(main, 'plot_path')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--no-plot'])
+    assert result.exit_code == 0
+    mock_plot.assert_not_called()
+
+
+def test_main_defers_heavy_imports():
+    """Ensures that importing the command line interface does not load matplotlib or scipy,
+    which are only needed to plot the path and find the candidate neighbors."""
+    modules = subprocess.run([sys.executable, '-c',
+                              'import sys, traveling_salesperson.__main__; '
+                              'print(" ".join(sys.modules))'],
+                             check=True, capture_output=True, text=True).stdout.split()
+    assert 'matplotlib' not in modules
+    assert 'scipy' not in modules
+
+
+def test_main_plots_in_background(mocker, filename_fixture, tmp_path, monkeypatch):
+    """Ensures that main() waits for the plot rendered in the background before exiting."""
+    filename = os.path.abspath(filename_fixture)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'results').mkdir()
+    mock_plot = mocker.spy(main, 'plot_path')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename, '--background-plot',
+                                       '--plot-format', 'svg'])
+    assert result.exit_code == 0
+    assert (tmp_path / 'results' / 'cities_path.svg').exists()
+    assert mock_plot.call_args[0][4:] == ('svg', main.DEFAULT_MAX_POINTS, True)
+    assert mock_plot.spy_return.exitcode == 0
+
+
+def test_main_solves_batch(filename_fixture, tmp_path):
+    """Ensures that main() solves every file matching the batch patterns, writing their results
+    as JSON lines, and fails if any file cannot be solved."""
+    output = tmp_path / 'results.jsonl'
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-b', filename_fixture, '-b', 'data/*.csv',
+                                       '-o', str(output)])
+    assert result.exit_code == 0
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [result['filename'] for result in results] == [
+        filename_fixture, os.path.join('data', 'djbouti38.csv'),
+        os.path.join('data', 'luxembourg980.csv')]
+
+    result = runner.invoke(main.main, ['-b', 'missing.csv', '-o', str(output)])
+    assert result.exit_code == 1
+    assert 'error' in json.loads(output.read_text())
+
+    result = runner.invoke(main.main, ['-b', filename_fixture, '--runs', '2'])
+    assert result.exit_code == 2
+
+
+def test_main_stores_and_resumes_tour(mocker, filename_fixture, tmp_path):
+    """Ensures that main() stores the tour, and improves the stored tour (or a saved tour file)
+    instead of a constructed path when asked."""
+    mock_path = mocker.spy(main, 'determine_path')
+    tour_file = str(tmp_path / 'cities.tour')
+    runner = CliRunner()
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--save-tour', tour_file])
+    assert result.exit_code == 0
+    assert 'Tour Store:  stored' in result.output
+    assert mock_path.call_args[0][-1] is None
+
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--resume'])
+    assert result.exit_code == 0
+    assert 'Tour Store:  not stored' in result.output
+    assert sorted(mock_path.call_args[0][-1].tolist()) == [0, 1, 2]
+
+    result = runner.invoke(main.main, ['-f', filename_fixture, '--initial-tour', tour_file,
+                                       '--no-store'])
+    assert result.exit_code == 0
+    assert 'Tour Store' not in result.output
+    assert sorted(mock_path.call_args[0][-1].tolist()) == [0, 1, 2]
+
+
+def test_main_rejects_invalid_initial_tour(filename_fixture, tmp_path):
+    """Ensures that main() refuses a malformed tour, or one that does not visit every city once,
+    as a bad --initial-tour."""
+    short_tour = str(tmp_path / 'short.npy')
+    np.save(short_tour, np.array([0, 1]))
+    malformed_tour = tmp_path / 'malformed.tour'
+    malformed_tour.write_text('TOUR_SECTION\n1\ntwo\n-1\nEOF\n')
+    runner = CliRunner()
+    for tour_file in (short_tour, str(malformed_tour), str(tmp_path / 'missing.tour')):
+        result = runner.invoke(main.main, ['-f', filename_fixture, '--initial-tour', tour_file])
+        assert result.exit_code == 2
+        assert '--initial-tour' in result.output
+
+
+def test_main_solves_precomputed_matrix(mocker, filename_fixture, tmp_path):
+    """Ensures that main() solves with the distances of a precomputed matrix, with the nodes of
+    the matrix or the cities of the csv file, and only plots cities with coordinates."""
+    mock_distance = mocker.spy(main, 'distance_matrix')
+    mock_plot = mocker.patch.object(main, 'plot_path', return_value=None)
+    matrix_file = str(tmp_path / 'cities.npy')
+    np.save(matrix_file, np.array([1118, 2236, 1118], dtype=np.uint16))
+    runner = CliRunner()
+
+    result = runner.invoke(main.main, ['--matrix', filename_fixture.replace('.csv', '.tsp')])
+    assert result.exit_code == 0
+    assert 'Total Path Length:  4472.0' in result.output
+    assert mock_plot.call_count == 1
+
+    result = runner.invoke(main.main, ['--matrix', matrix_file, '-i', 'greedy-edge'])
+    assert result.exit_code == 0
+    assert 'Total Path Length:  4472.0' in result.output
+    assert mock_plot.call_count == 1
+
+    result = runner.invoke(main.main, ['--matrix', matrix_file, '-f', filename_fixture,
+                                       '--workers', '2'])
+    assert result.exit_code == 0
+    assert 'Total Path Length:  4472.0' in result.output
+    assert sorted(mock_plot.call_args[0][1]) == ['a', 'b', 'c']
+    mock_distance.assert_not_called()
+
+    fractional_file = str(tmp_path / 'fractional.npy')
+    np.save(fractional_file, np.array([0.5, 0.25, 0.5]))
+    for arg_list in (['--matrix', matrix_file, '-i', 'hilbert-curve'],
+                     ['--matrix', matrix_file, '--row-cache', '2'],
+                     ['--matrix', fractional_file],
+                     ['--matrix', matrix_file, '-f', 'data/djbouti38.csv'],
+                     ['--matrix', filename_fixture]):
+        assert runner.invoke(main.main, arg_list).exit_code == 2
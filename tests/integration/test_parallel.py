@@ -0,0 +1,32 @@
+"""
+Integration tests for the parallel.py module
+"""
+import numpy as np
+
+from traveling_salesperson import algorithm, City, geography, parallel
+
+
+def test_multi_start_path_keeps_the_shortest_run():
+    """Ensure that multi_start_path() runs from distinct start cities, keeps the shortest of the
+    paths, and keeps the determine_path() return contract"""
+    random = np.random.RandomState(4)
+    cities = [City(str(i), *xy) for i, xy in enumerate(random.uniform(0, 1000, (40, 2)))]
+    distances = geography.distance_matrix(cities, dtype=np.int32)
+    neighbors = geography.nearest_neighbors(cities, 6)
+
+    summaries = []
+    path, total_distance = parallel.multi_start_path(cities, distances, runs=3, workers=2,
+                                                     start=5, summaries=summaries,
+                                                     neighbors=neighbors, strategy='first')
+    assert path[0] == '5'
+    assert set(path) == {city.name for city in cities}
+    assert total_distance == min(summary.total_distance for summary in summaries)
+    indexes = [int(name) for name in path]
+    assert total_distance == sum(distances[indexes[i - 1]][indexes[i]]
+                                 for i in range(len(indexes)))
+
+    assert [summary.run for summary in summaries] == [0, 1, 2]
+    assert len({summary.start for summary in summaries}) == 3
+    assert summaries[0].start == 5
+    _, single_distance = algorithm.determine_path(cities, distances, neighbors, 'first', start=5)
+    assert summaries[0].total_distance == single_distance
@@ -0,0 +1,150 @@
+"""
+Integration tests for the service.py module
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+
+import pytest
+
+from traveling_salesperson import service
+from traveling_salesperson.service import SolverService
+
+
+def _request(port, method, path, body=None):
+    """Send a request to the service, and return the status and the lines of the response"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request(method, path, body=None if body is None else json.dumps(body))
+        response = connection.getresponse()
+        lines = response.read().decode().splitlines()
+        return response.status, [json.loads(line) for line in lines if line]
+    finally:
+        connection.close()
+
+
+def _run_service(scenario, **options):
+    """Run the scenario, called with a function sending a request to the service, against a
+    service listening on a free port"""
+    async def run():
+        service = SolverService(**options)
+        port = await service.start(port=0)
+        loop = asyncio.get_event_loop()
+
+        async def request(method, path, body=None):
+            return await loop.run_in_executor(None, _request, port, method, path, body)
+        try:
+            return await scenario(request)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_service_solves_jobs_and_caches_results(filename_fixture):
+    """Ensure that a job can be submitted and followed to its result, and that the same instance
+    (given inline rather than by file name) is then served from the cache"""
+    async def scenario(request):
+        status, (job,) = await request('POST', '/jobs', {'filename': filename_fixture})
+        assert status == 202
+        assert job['status'] in ('queued', 'running')
+
+        status, events = await request('GET', f'/jobs/{job["id"]}/progress')
+        assert status == 200
+        summary = events[-1]
+        assert summary['id'] == job['id']
+        assert summary['status'] == 'done'
+        assert summary['cached'] is False
+        assert summary['result']['total_distance'] == pytest.approx(4472)
+        assert sorted(summary['result']['path']) == ['a', 'b', 'c']
+        assert all(event['total_distance'] >= summary['result']['total_distance']
+                   for event in events[:-1])
+
+        status, (finished,) = await request('GET', f'/jobs/{job["id"]}')
+        assert status == 200
+        assert finished == summary
+
+        status, (cached,) = await request('POST', '/jobs', {
+            'names': ['a', 'b', 'c'],
+            'coordinates': [[0, 0], [500, 1000], [1000, 2000]]})
+        assert status == 200
+        assert cached['cached'] is True
+        assert cached['result'] == summary['result']
+
+        status, (service_status,) = await request('GET', '/status')
+        assert status == 200
+        assert service_status['cache'] == dict(hits=1, misses=1, maxsize=128, currsize=1)
+    _run_service(scenario)
+
+
+def test_service_rejects_invalid_requests(filename_fixture):
+    """Ensure that invalid jobs, unknown jobs and jobs beyond the size of the queue are rejected"""
+    async def scenario(request):
+        for body in ({}, {'coordinates': [[0, 0]]}, {'filename': 'missing.csv'},
+                     {'coordinates': {'x': 0, 'y': 0}}, {'coordinates': [[10 ** 400, 0], [0, 0]]},
+                     {'filename': filename_fixture, 'options': {'strategy': 'worst'}},
+                     {'filename': filename_fixture, 'options': {'seed': 2 ** 32}},
+                     {'filename': filename_fixture, 'options': {'time_limit': True}}):
+            status, (response,) = await request('POST', '/jobs', body)
+            assert status == 400
+            assert 'error' in response
+        assert (await request('GET', '/jobs/unknown'))[0] == 404
+        assert (await request('GET', '/jobs/unknown/progress'))[0] == 404
+        assert (await request('GET', '/jobs'))[0] == 405
+
+        statuses = []
+        for seed in range(4):
+            status, _ = await request('POST', '/jobs', {'filename': filename_fixture,
+                                                        'options': {'seed': seed}})
+            statuses.append(status)
+        assert 503 in statuses
+    _run_service(scenario, queue_size=1)
+
+
+def test_service_fails_a_job_whose_solver_raises(filename_fixture, mocker):
+    """Ensure that a job whose solver raises is reported as failed, and that the next job still
+    runs"""
+    solve_job = service.solve_job
+
+    def solve_or_raise(cities, scale, options, progress=None):
+        if options['seed'] == 1:
+            raise RuntimeError('The solver crashed')
+        return solve_job(cities, scale, options, progress)
+    mocker.patch('traveling_salesperson.service.solve_job', side_effect=solve_or_raise)
+    # The solver is patched in this process only, so the jobs run in threads
+    mocker.patch('traveling_salesperson.service.ProcessPoolExecutor',
+                 side_effect=lambda max_workers, mp_context: ThreadPoolExecutor(max_workers))
+
+    async def scenario(request):
+        _, (failing,) = await request('POST', '/jobs', {'filename': filename_fixture,
+                                                        'options': {'seed': 1}})
+        _, (job,) = await request('POST', '/jobs', {'filename': filename_fixture})
+
+        _, events = await request('GET', f'/jobs/{failing["id"]}/progress')
+        assert events[-1]['status'] == 'failed'
+        assert events[-1]['error'] == 'RuntimeError: The solver crashed'
+        _, events = await request('GET', f'/jobs/{job["id"]}/progress')
+        assert events[-1]['status'] == 'done'
+        assert sorted(events[-1]['result']['path']) == ['a', 'b', 'c']
+    _run_service(scenario)
+
+
+@pytest.mark.parametrize('content_length', ['-5', 'ten'])
+def test_service_rejects_invalid_content_length(content_length):
+    """Ensure that a request with a malformed Content-Length is answered with an error"""
+    async def run():
+        service = SolverService()
+        port = await service.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'POST /jobs HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n'
+                         .encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            await service.close()
+    status_line, _, body = asyncio.run(run()).decode().partition('\r\n\r\n')
+    assert status_line.startswith('HTTP/1.1 400')
+    assert 'Content-Length' in json.loads(body)['error']
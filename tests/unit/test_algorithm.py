@@ -5,7 +5,8 @@ Unit tests for the algorithm.py module
 import numpy as np
 import pytest
 
-from traveling_salesperson import algorithm
+from traveling_salesperson import algorithm, CityTable, geography
+from traveling_salesperson.tour import Tour
 
 
 @pytest.fixture()
@@ -50,6 +51,31 @@ def test_nearest_neighbor_path_returns_expected_path(sub_optimal_path_fixture,
     assert observed_path == sub_optimal_path_fixture
 
 
+@pytest.mark.parametrize('start,expected_path',
+                         [(1, [1, 2, 3, 0]), (3, [3, 2, 1, 0])])
+def test_nearest_neighbor_path_starts_from_given_node(pyramid_distance_matrix_fixture,
+                                                      start, expected_path):
+    """Ensures that the nearest_neighbor_path() starts from the requested node."""
+    observed_path, _ = algorithm.nearest_neighbor_path(4, pyramid_distance_matrix_fixture, start)
+    assert observed_path == expected_path
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_nearest_neighbor_path_is_the_same_with_candidates(packed):
+    """Ensures that looking for the nearest city among the candidate neighbors first leads to
+    the same path (ties included) as scanning the rows of the distance matrix"""
+    cities = CityTable(np.arange(200), np.random.RandomState(0).randint(0, 30, (200, 2)))
+    distances = geography.distance_matrix(cities, packed=packed)
+    candidates = geography.nearest_neighbors(cities, 5)
+    assert (algorithm.nearest_neighbor_path(200, distances, 7, candidates)
+            == algorithm.nearest_neighbor_path(200, geography.distance_matrix(cities), 7))
+
+
+def test_rotate_path_starts_from_given_node():
+    """Ensures that the rotate_path() method keeps the order of the (closed) path."""
+    assert algorithm.rotate_path([2, 0, 3, 1], 3) == [3, 1, 2, 0]
+
+
 def test_nearest_neighbor_path_with_swapping_returns_expected_path(optimal_path_fixture,
                                                                    pyramid_distance_matrix_fixture):
     """Ensures that the nearest_neighbor_path_with_swapping() method finds a more optimal path
@@ -67,7 +93,7 @@ def test_two_node_swap_optimization_optimizes_path(sub_optimal_path_fixture,
     observed_path = algorithm.two_node_swap_optimization(sub_optimal_path_fixture[0],
                                                          pyramid_distance_matrix_fixture,
                                                          sub_optimal_path_fixture[1])
-    assert np.array_equal(observed_path, optimal_path_fixture)
+    assert observed_path == optimal_path_fixture
 
 
 def test_two_node_swap_optimization_leaves_optimal_path_as_is(
@@ -78,7 +104,144 @@ def test_two_node_swap_optimization_leaves_optimal_path_as_is(
     observed_path = algorithm.two_node_swap_optimization(optimal_path_fixture[0],
                                                          pyramid_distance_matrix_fixture,
                                                          optimal_path_fixture[1])
-    assert np.array_equal(observed_path, optimal_path_fixture)
+    assert observed_path == optimal_path_fixture
+
+
+def test_construct_path_raises_value_error_for_unknown_construction(
+        cities_fixture,
+        pyramid_distance_matrix_fixture):
+    """Ensures that an unknown construction is rejected"""
+    with pytest.raises(ValueError):
+        _ = algorithm.construct_path(cities_fixture, pyramid_distance_matrix_fixture, 'random')
+
+
+@pytest.fixture()
+def pyramid_neighbors_fixture(pyramid_distance_matrix_fixture):
+    """The candidate neighbors of each node of the pyramid, nearest first"""
+    return np.array([[j for j in np.argsort(row, kind='stable') if j != i][:2]
+                     for i, row in enumerate(pyramid_distance_matrix_fixture)])
+
+
+def test_two_node_swap_optimization_with_neighbors_optimizes_path(sub_optimal_path_fixture,
+                                                                  optimal_path_fixture,
+                                                                  pyramid_distance_matrix_fixture,
+                                                                  pyramid_neighbors_fixture):
+    """Ensures that the swaps restricted to candidate neighbors find the optimal path."""
+    observed_path, observed_distance = algorithm.two_node_swap_optimization(
+        sub_optimal_path_fixture[0],
+        pyramid_distance_matrix_fixture,
+        sub_optimal_path_fixture[1],
+        pyramid_neighbors_fixture)
+    assert observed_path == optimal_path_fixture[0]
+    assert observed_distance == optimal_path_fixture[1]
+
+
+def test_neighbor_list_swap_optimization_leaves_optimal_path_as_is(
+        optimal_path_fixture,
+        pyramid_distance_matrix_fixture,
+        pyramid_neighbors_fixture):
+    """Ensures that when no further optimization from swapping can be achieved, the
+    neighbor_list_swap_optimization() method leaves the path as is."""
+    observed = algorithm.neighbor_list_swap_optimization(list(optimal_path_fixture[0]),
+                                                         pyramid_distance_matrix_fixture,
+                                                         optimal_path_fixture[1],
+                                                         pyramid_neighbors_fixture)
+    assert observed == optimal_path_fixture
+
+
+@pytest.mark.parametrize('use_neighbors', [True, False])
+def test_first_improvement_swap_optimization_optimizes_path(sub_optimal_path_fixture,
+                                                            optimal_path_fixture,
+                                                            pyramid_distance_matrix_fixture,
+                                                            pyramid_neighbors_fixture,
+                                                            use_neighbors):
+    """Ensures that applying the first improving swap finds the optimal path, with or without
+    candidate neighbors, and counts the swaps evaluated and applied."""
+    statistics = algorithm.SwapStatistics()
+    observed_path, observed_distance = algorithm.two_node_swap_optimization(
+        sub_optimal_path_fixture[0],
+        pyramid_distance_matrix_fixture,
+        sub_optimal_path_fixture[1],
+        pyramid_neighbors_fixture if use_neighbors else None,
+        strategy='first',
+        statistics=statistics)
+    assert sorted(observed_path) == optimal_path_fixture[0]
+    assert observed_distance == optimal_path_fixture[1]
+    assert statistics.applied == 1
+    assert statistics.evaluated >= statistics.applied
+
+
+def test_two_node_swap_optimization_raises_value_error_for_unknown_strategy(
+        optimal_path_fixture,
+        pyramid_distance_matrix_fixture):
+    """Ensures that an unknown swap strategy is rejected"""
+    with pytest.raises(ValueError):
+        _ = algorithm.two_node_swap_optimization(optimal_path_fixture[0],
+                                                 pyramid_distance_matrix_fixture,
+                                                 optimal_path_fixture[1],
+                                                 strategy='worst')
+
+
+@pytest.mark.parametrize('path', [[0, 2, 1, 3], [0, 1, 2, 3], [3, 1, 0, 2]])
+def test_best_swap_from_rows_matches_segments(pyramid_distance_matrix_fixture, path):
+    """Ensures that the vectorized engine finds the same best swap as path_segments(), after
+    evaluating the same number of swaps."""
+    segments_statistics, rows_statistics = algorithm.SwapStatistics(), algorithm.SwapStatistics()
+    expected_swap = algorithm.best_swap_from_segments(Tour(path),
+                                                      pyramid_distance_matrix_fixture,
+                                                      segments_statistics)
+    observed_swap = algorithm.best_swap_from_rows(Tour(path),
+                                                  pyramid_distance_matrix_fixture,
+                                                  rows_statistics)
+    assert observed_swap == expected_swap
+    assert rows_statistics.evaluated == segments_statistics.evaluated
+
+
+def test_two_node_swap_optimization_with_rows_engine_optimizes_path(
+        sub_optimal_path_fixture,
+        optimal_path_fixture,
+        pyramid_distance_matrix_fixture):
+    """Ensures that the vectorized engine finds the optimal path."""
+    observed = algorithm.two_node_swap_optimization(list(sub_optimal_path_fixture[0]),
+                                                    pyramid_distance_matrix_fixture,
+                                                    sub_optimal_path_fixture[1],
+                                                    engine='rows')
+    assert observed == optimal_path_fixture
+
+
+def test_iterated_local_search_raises_value_error_without_budget(optimal_path_fixture,
+                                                                 pyramid_distance_matrix_fixture):
+    """Ensures that iterated local search needs a time limit or a maximum number of iterations"""
+    with pytest.raises(ValueError):
+        _ = algorithm.iterated_local_search(list(optimal_path_fixture[0]),
+                                            pyramid_distance_matrix_fixture,
+                                            optimal_path_fixture[1])
+
+
+@pytest.mark.parametrize('strategy,neighbors', [('best', None), ('best', 5), ('first', 5)])
+def test_local_search_stops_at_target_distance(strategy, neighbors):
+    """Ensures that the local search stops improving the path as soon as it is no longer than the
+    target distance, and that iterated local search does not kick a path that already is."""
+    cities = CityTable(np.arange(60), np.random.RandomState(4).uniform(0, 1000, (60, 2)))
+    distances = geography.distance_matrix(cities)
+    candidates = geography.nearest_neighbors(cities, neighbors) if neighbors else None
+    path = list(range(60))
+    start_distance = sum(int(distances[i][i + 1]) for i in range(59))
+    _, optimized = algorithm.swap_and_move_optimization(list(path), distances, start_distance,
+                                                        candidates, strategy)
+    closed = start_distance + int(distances[59][0])
+    target = (closed + optimized + int(distances[59][0])) // 2
+    stopped_path, stopped = algorithm.swap_and_move_optimization(list(path), distances,
+                                                                 start_distance, candidates,
+                                                                 strategy, target_distance=target)
+    assert optimized < stopped
+    assert stopped + algorithm.closing_distance(stopped_path, distances) <= target
+
+    statistics = algorithm.SwapStatistics()
+    _ = algorithm.iterated_local_search(list(path), distances, start_distance, candidates,
+                                        max_iterations=10, statistics=statistics,
+                                        target_distance=closed)
+    assert statistics.kicks == 0
 
 
 @pytest.fixture()
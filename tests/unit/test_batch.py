@@ -0,0 +1,68 @@
+"""
+Unit tests for the batch.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import io
+import json
+import shutil
+
+import pytest
+
+from traveling_salesperson import batch
+
+
+@pytest.fixture()
+def batch_files_fixture(tmp_path, filename_fixture):
+    """Three copies of the test cities file, in a temporary directory"""
+    filenames = []
+    for name in ['first.csv', 'second.csv', 'third.csv']:
+        shutil.copy(filename_fixture, tmp_path / name)
+        filenames.append(str(tmp_path / name))
+    return filenames
+
+
+def test_expand_filenames(batch_files_fixture, tmp_path):
+    """Ensures that glob patterns are expanded in sorted order, without duplicates, and that
+    names without matches are kept."""
+    first, second, third = batch_files_fixture
+    assert batch.expand_filenames([third, str(tmp_path / '*.csv'), 'missing.csv']) == [
+        third, first, second, 'missing.csv']
+
+
+def test_load_instance(filename_fixture, distance_matrix_dict_fixture):
+    """Ensures that an instance is loaded with its distance matrix, candidate neighbors and the
+    time taken by each step."""
+    instance = batch.load_instance(filename_fixture, neighbors=1)
+    assert len(instance.cities) == 3
+    assert (instance.distances == distance_matrix_dict_fixture['euclidean']).all()
+    assert instance.candidates.tolist() == [[1], [0], [1]]
+    assert sorted(instance.timings) == ['distances', 'etl', 'neighbors']
+
+
+@pytest.mark.parametrize('workers,prefetch', [(1, 0), (1, 1), (1, 5), (2, 1)])
+def test_solve_batch_writes_a_line_per_file(batch_files_fixture, workers, prefetch):
+    """Ensures that every file is solved, or reported with an error, on a line of JSON each."""
+    filenames = batch_files_fixture + ['missing.csv']
+    output = io.StringIO()
+    failures = batch.solve_batch(filenames, output, workers, prefetch)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert failures == 1
+    if workers == 1:
+        assert [result['filename'] for result in results] == filenames
+    results = {result['filename']: result for result in results}
+    assert sorted(results) == sorted(filenames)
+    assert 'FileNotFoundError' in results['missing.csv']['error']
+    for filename in batch_files_fixture:
+        assert results[filename]['total_distance'] == 4472
+        assert sorted(results[filename]['path']) == ['a', 'b', 'c']
+        assert sorted(results[filename]['timings']) == ['distances', 'etl', 'neighbors', 'solve']
+
+
+def test_solve_instance_reports_lower_bound(filename_fixture):
+    """Ensures that, with a target gap, the lower bound is computed and reported with the gap"""
+    instance = batch.load_instance(filename_fixture, neighbors=1)
+    result = batch.solve_instance(instance, target_gap=0.1)
+    assert result['lower_bound'] == result['total_distance'] == 4472
+    assert result['gap'] == 0
+    assert 'lower_bound' in result['timings']
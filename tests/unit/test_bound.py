@@ -0,0 +1,81 @@
+"""
+Unit tests for the bound.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import itertools
+
+import numpy as np
+import pytest
+
+from traveling_salesperson import bound, CityTable, geography
+
+
+@pytest.fixture()
+def random_distances_fixture():
+    """The distances between eight randomly placed cities, with the length of the shortest path"""
+    coordinates = np.random.RandomState(3).uniform(0, 1000, (8, 2))
+    distances = geography.distance_matrix(CityTable(np.arange(8), coordinates), dtype=np.int32)
+    shortest = min(sum(distances[path[i - 1]][path[i]] for i in range(8))
+                   for path in ([0, *order] for order in itertools.permutations(range(1, 8))))
+    return distances, shortest
+
+
+def test_held_karp_bound_is_at_most_the_shortest_path(random_distances_fixture):
+    """Ensures that the held_karp_bound() is no longer than the shortest path, is an integer for
+    integer distances, and improves on the minimum 1-tree"""
+    distances, shortest = random_distances_fixture
+    lower_bound = bound.held_karp_bound(distances)
+    one_tree_length, _, _ = bound.minimum_one_tree(distances, np.zeros(8))
+    assert one_tree_length <= lower_bound <= shortest
+    assert lower_bound == int(lower_bound)
+    assert bound.held_karp_bound(distances, max_iterations=1) == np.ceil(one_tree_length)
+
+
+def test_held_karp_bound_is_the_same_for_packed_distances(random_distances_fixture):
+    """Ensures that the bound only depends on the distances, not on how they are stored"""
+    distances, _ = random_distances_fixture
+    packed = geography.TriangularDistanceMatrix.from_matrix(distances)
+    assert bound.held_karp_bound(packed) == bound.held_karp_bound(distances)
+
+
+def test_held_karp_bound_rounds_up_whole_float_distances(random_distances_fixture):
+    """Ensures that the bound is rounded up when the distances are whole numbers, whatever their
+    type, but not otherwise"""
+    distances, _ = random_distances_fixture
+    assert bound.held_karp_bound(distances.astype(np.float64)) == bound.held_karp_bound(distances)
+    fractional = distances + 0.3 - 0.3 * np.eye(8)
+    assert bound.held_karp_bound(fractional) != int(bound.held_karp_bound(fractional))
+
+
+def test_held_karp_bound_stops_once_it_no_longer_improves(mocker):
+    """Ensures that the subgradient iterations stop once the step size is too small for the bound
+    to improve, rather than after the maximum number of iterations"""
+    coordinates = np.random.RandomState(5).uniform(0, 1000, (60, 2))
+    distances = geography.distance_matrix(CityTable(np.arange(60), coordinates))
+    spy = mocker.spy(bound, 'minimum_one_tree')
+    converged = bound.held_karp_bound(distances, max_iterations=5000)
+    assert spy.call_count < 5000
+    assert bound.held_karp_bound(distances, max_iterations=50) <= converged
+
+
+def test_held_karp_bound_of_tiny_instances():
+    """Ensures that the bound of one or two cities is the length of their (only) path"""
+    assert bound.held_karp_bound(np.zeros((1, 1))) == 0
+    assert bound.held_karp_bound(np.array([[0, 7], [7, 0]])) == 14
+
+
+def test_minimum_one_tree_degrees():
+    """Ensures that the minimum_one_tree() of the corners of a square is a closed path, with two
+    edges from every corner"""
+    distances = np.array([[0, 1, 2, 1], [1, 0, 1, 2], [2, 1, 0, 1], [1, 2, 1, 0]])
+    length, degrees, parents = bound.minimum_one_tree(distances, np.zeros(4))
+    assert length == 4
+    assert degrees.tolist() == [2, 2, 2, 2]
+    assert parents.tolist() == [-1, -1, 1, 2]
+
+
+def test_optimality_gap():
+    """Ensures that the gap is relative to the lower bound"""
+    assert bound.optimality_gap(110, 100) == pytest.approx(0.1)
+    assert bound.optimality_gap(0, 0) == 0
+    assert bound.optimality_gap(1, 0) == float('inf')
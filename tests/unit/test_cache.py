@@ -0,0 +1,78 @@
+"""
+Unit tests for the cache.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import os
+
+import numpy as np
+import pytest
+
+from traveling_salesperson.cache import DistanceMatrixCache
+from traveling_salesperson.geography import TriangularDistanceMatrix
+
+
+@pytest.fixture()
+def matrix_cache_fixture(cache_directory_fixture):
+    """An empty cache, with room for two 10 x 10 float64 matrices"""
+    return DistanceMatrixCache(str(cache_directory_fixture), max_bytes=2 * 1000)
+
+
+def test_key_depends_on_file_content_metric_scale_and_dtype(tmp_path):
+    """Ensures that the key changes with everything the distance matrix depends on, but not with
+    the name of the file"""
+    first_file, second_file = tmp_path / 'first.csv', tmp_path / 'second.csv'
+    first_file.write_text('name,x,y\na,0,0\n')
+    second_file.write_text('name,x,y\na,0,0\n')
+    key = DistanceMatrixCache.key(str(first_file), 'euclidean', 1, np.float64)
+    assert DistanceMatrixCache.key(str(second_file), 'euclidean', 1, np.float64) == key
+    assert DistanceMatrixCache.key(str(first_file), 'manhattan', 1, np.float64) != key
+    assert DistanceMatrixCache.key(str(first_file), 'euclidean', 10, np.float64) != key
+    assert DistanceMatrixCache.key(str(first_file), 'euclidean', 1, np.int32) != key
+    assert DistanceMatrixCache.key(str(first_file), 'euclidean', 1, np.float64, True) != key
+
+    second_file.write_text('name,x,y\na,0,1\n')
+    assert DistanceMatrixCache.key(str(second_file), 'euclidean', 1, np.float64) != key
+
+
+def test_get_returns_memory_mapped_copy_of_put(matrix_cache_fixture):
+    """Ensures that a stored matrix is returned read-only and memory-mapped, and counts hits and
+    misses"""
+    distances = np.arange(100, dtype=np.float64).reshape(10, 10)
+    assert matrix_cache_fixture.get('a') is None
+    matrix_cache_fixture.put('a', distances)
+    cached = matrix_cache_fixture.get('a')
+    np.testing.assert_array_equal(cached, distances)
+    assert isinstance(cached, np.memmap)
+    assert not cached.flags.writeable
+    assert (matrix_cache_fixture.hits, matrix_cache_fixture.misses) == (1, 1)
+
+
+def test_get_returns_packed_matrix_of_put(matrix_cache_fixture):
+    """Ensures that only the upper triangle of a packed matrix is stored, and that it is
+    returned packed"""
+    distances = TriangularDistanceMatrix(np.arange(45, dtype=np.int32))
+    matrix_cache_fixture.put('a', distances)
+    cached = matrix_cache_fixture.get('a')
+    assert isinstance(cached, TriangularDistanceMatrix)
+    assert isinstance(cached.values, np.memmap)
+    np.testing.assert_array_equal(cached.values, distances.values)
+
+
+def test_put_evicts_least_recently_used_matrix(matrix_cache_fixture):
+    """Ensures that the least recently used matrix is evicted once the size limit is exceeded,
+    and that a matrix larger than the limit is not stored"""
+    distances = np.zeros((10, 10))
+    matrix_cache_fixture.put('a', distances)
+    matrix_cache_fixture.put('b', distances)
+    old_time = os.path.getmtime(os.path.join(matrix_cache_fixture.directory, 'a.npy')) - 10
+    os.utime(os.path.join(matrix_cache_fixture.directory, 'b.npy'), (old_time, old_time))
+    matrix_cache_fixture.put('c', distances)
+    assert matrix_cache_fixture.get('b') is None
+    assert matrix_cache_fixture.get('a') is not None
+    assert matrix_cache_fixture.size() <= matrix_cache_fixture.max_bytes
+
+    matrix_cache_fixture.put('d', np.zeros((20, 20)))
+    assert matrix_cache_fixture.get('d') is None
+
+    matrix_cache_fixture.clear()
+    assert matrix_cache_fixture.size() == 0
@@ -0,0 +1,70 @@
+"""
+Unit tests for the construction.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson import City, construction, geography
+
+
+@pytest.fixture()
+def line_cities_fixture():
+    """Cities along a line, listed out of order"""
+    return [City(str(x), x * 10, 0) for x in (3, 0, 5, 1, 4, 2)]
+
+
+def test_hilbert_indexes_visit_adjacent_grid_points():
+    """Ensures that the Hilbert curve visits every point of a grid once, moving to an adjacent
+    point at each step."""
+    points = np.array([(x, y) for x in range(8) for y in range(8)], dtype=float)
+    indexes = construction.hilbert_indexes(points, order=3)
+    assert sorted(indexes) == list(range(64))
+    steps = np.abs(np.diff(points[np.argsort(indexes)], axis=0)).sum(axis=1)
+    assert (steps == 1).all()
+
+
+def test_hilbert_curve_path_returns_valid_path(line_cities_fixture):
+    """Ensures that the hilbert_curve_path() visits the cities along the line in order, and
+    returns the length of the (open) path."""
+    distances = geography.distance_matrix(line_cities_fixture)
+    path, total_distance = construction.hilbert_curve_path(line_cities_fixture, distances)
+    assert path in ([1, 3, 5, 0, 4, 2], [2, 4, 0, 5, 3, 1])
+    assert total_distance == 50
+
+
+def test_hilbert_curve_path_accepts_identical_cities():
+    """Ensures that the hilbert_curve_path() handles cities that all have the same location."""
+    cities = [City(str(i), 1, 1) for i in range(3)]
+    path, total_distance = construction.hilbert_curve_path(cities,
+                                                           geography.distance_matrix(cities))
+    assert sorted(path) == [0, 1, 2]
+    assert total_distance == 0
+
+
+@pytest.mark.parametrize('neighbors', [None, 1, 2])
+def test_greedy_edge_path_returns_valid_path(line_cities_fixture, neighbors):
+    """Ensures that the greedy_edge_path() matches the short edges along the line, joining the
+    fragments left over when the candidate edges are restricted."""
+    distances = geography.distance_matrix(line_cities_fixture)
+    candidates = (geography.nearest_neighbors(line_cities_fixture, neighbors)
+                  if neighbors else None)
+    path, total_distance = construction.greedy_edge_path(line_cities_fixture, distances,
+                                                         candidates)
+    assert sorted(path) == list(range(6))
+    assert total_distance == sum(distances[path[i]][path[i + 1]] for i in range(5))
+    if neighbors != 1:
+        assert path in ([1, 3, 5, 0, 4, 2], [2, 4, 0, 5, 3, 1])
+
+
+def test_initial_tour_path_returns_tour_and_length(distance_matrix_dict_fixture):
+    """Ensures that the given tour is used as is, with the length of the (open) path."""
+    distances = distance_matrix_dict_fixture['euclidean']
+    assert construction.initial_tour_path(np.array([2, 0, 1]), distances) == ([2, 0, 1], 3354)
+
+
+@pytest.mark.parametrize('tour', [[0, 1], [0, 1, 1], [0, 1, 3]])
+def test_initial_tour_path_fails_without_every_city_once(distance_matrix_dict_fixture, tour):
+    """Ensures that a tour that does not visit every city exactly once is an error."""
+    with pytest.raises(ValueError):
+        construction.initial_tour_path(tour, distance_matrix_dict_fixture['euclidean'])
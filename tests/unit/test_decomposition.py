@@ -0,0 +1,82 @@
+"""
+Unit tests for the decomposition.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson import City, decomposition, geography
+
+
+@pytest.fixture()
+def random_cities_fixture():
+    """Randomly placed cities, in two distant groups"""
+    random = np.random.RandomState(5)
+    coordinates = np.concatenate((random.uniform(0, 100, (60, 2)),
+                                  random.uniform(1000, 1100, (40, 2))))
+    return [City(str(i), *xy) for i, xy in enumerate(coordinates)]
+
+
+def test_grid_clusters_partitions_the_cities_into_bounded_clusters(random_cities_fixture):
+    """Ensures that every city is in exactly one grid cluster, of at most cluster_size cities,
+    even though the cities are unevenly spread"""
+    coordinates = geography.city_coordinates(random_cities_fixture)
+    clusters = decomposition.grid_clusters(coordinates, 12)
+    assert len(clusters) == 9
+    assert max(len(cluster) for cluster in clusters) <= 12
+    np.testing.assert_array_equal(np.sort(np.concatenate(clusters)), np.arange(100))
+
+
+def test_kmeans_clusters_partitions_the_cities(random_cities_fixture):
+    """Ensures that every city is in exactly one k-means cluster, and that distant groups of
+    cities are not mixed"""
+    coordinates = geography.city_coordinates(random_cities_fixture)
+    clusters = decomposition.kmeans_clusters(coordinates, 50)
+    np.testing.assert_array_equal(np.sort(np.concatenate(clusters)), np.arange(100))
+    for cluster in clusters:
+        assert len(set(coordinates[cluster, 0] > 500)) == 1
+
+
+def test_stitch_paths_joins_the_clusters():
+    """Ensures that stitch_paths() visits every city once, entering each cluster at the city
+    closest to the previous one"""
+    cities = [City(i, *xy) for i, xy in enumerate([(0, 0), (0, 1), (1, 1), (1, 0),
+                                                    (10, 0), (11, 0), (11, 1), (10, 1)])]
+    path = decomposition.stitch_paths([[0, 1, 2, 3], [6, 7, 4, 5]],
+                                      geography.city_coordinates(cities),
+                                      geography.CoordinateDistanceMatrix(cities))
+    assert path == [0, 1, 2, 3, 4, 5, 6, 7]
+
+
+@pytest.mark.parametrize('method', decomposition.DECOMPOSITIONS)
+def test_decomposed_path_returns_a_valid_path(random_cities_fixture, method):
+    """Ensures that decomposed_path() visits every city once, from the start city, reports the
+    length of the closed path, and times every stage"""
+    timings = {}
+    path, total_distance = decomposition.decomposed_path(random_cities_fixture, 20, method,
+                                                         workers=1, neighbors=5, start=3,
+                                                         timings=timings)
+    assert path[0] == '3'
+    assert sorted(path) == sorted(city.name for city in random_cities_fixture)
+    distances = geography.distance_matrix(random_cities_fixture)
+    indexes = [int(name) for name in path]
+    assert total_distance == sum(distances[indexes[i - 1]][indexes[i]]
+                                 for i in range(len(indexes)))
+    assert list(timings) == ['partition', 'solve', 'stitch', 'refine']
+
+
+def test_decomposed_path_limits_the_iterations_of_each_cluster(mocker, random_cities_fixture):
+    """Ensures that decomposed_path() passes the maximum number of iterations of iterated local
+    search on to the path through each cluster"""
+    mock_determine_path = mocker.spy(decomposition, 'determine_path')
+    decomposition.decomposed_path(random_cities_fixture, 20, workers=1, neighbors=5,
+                                  max_iterations=3)
+    assert mock_determine_path.call_count > 1
+    assert all(call.kwargs['max_iterations'] == 3
+               for call in mock_determine_path.call_args_list)
+
+
+def test_decomposed_path_rejects_unknown_decomposition(random_cities_fixture):
+    """Ensures that decomposed_path() raises a ValueError for an unknown decomposition"""
+    with pytest.raises(ValueError):
+        decomposition.decomposed_path(random_cities_fixture, 20, 'voronoi')
@@ -3,7 +3,6 @@ Unit tests for the etl.py module
 """
 # pragma pylint: disable=redefined-outer-name
 import numpy as np
-import pandas as pd
 import pytest
 
 from traveling_salesperson import etl
@@ -21,6 +20,16 @@ def test_extract_raises_file_not_found_error_with_filename(bad_filename_fixture)
         _ = etl.extract(filename=bad_filename_fixture)
 
 
+def test_extract_reads_quoted_names_with_commas(tmp_path):
+    """Ensures that a quoted city name holding a comma is read whole, without shifting the
+    coordinates, whatever the order of the columns."""
+    filename = tmp_path / 'cities.csv'
+    filename.write_text('y,name,x\n2,"Luxembourg, Ville",1.5\n4,Esch,3\n')
+    names, coordinates = etl.extract(str(filename))
+    assert names.tolist() == ['Luxembourg, Ville', 'Esch']
+    np.testing.assert_array_equal(coordinates, [[1.5, 2], [3, 4]])
+
+
 @pytest.fixture(
     params=[(100, 100, 1), (100, 1, 100), (1, 100, 100), (1, 1, 100), (0.001, 0.001, 10000)]
 )
@@ -28,40 +37,39 @@ def city_data_dict_fixture(request):
     """An example of raw and transformed city data with different scalings applied"""
     x_scale, y_scale, t_scale = request.param
     return {
-        'raw': pd.DataFrame({
-            'name': ['a', 'b', 'c'],
-            'x': np.arange(0, 15 * x_scale, 5 * x_scale),
-            'y': np.arange(0, 30 * y_scale, 10 * y_scale)
-        }),
+        'raw': np.column_stack((np.arange(0, 15 * x_scale, 5 * x_scale),
+                                np.arange(0, 30 * y_scale, 10 * y_scale))),
         'transformed': (
-            pd.DataFrame({
-                'name': ['a', 'b', 'c'],
-                'x': np.arange(0, 15 * x_scale * t_scale, 5 * x_scale * t_scale),
-                'y': np.arange(0, 30 * y_scale * t_scale, 10 * y_scale * t_scale)
-            }), t_scale)
+            np.column_stack((np.arange(0, 15 * x_scale * t_scale, 5 * x_scale * t_scale),
+                             np.arange(0, 30 * y_scale * t_scale, 10 * y_scale * t_scale))),
+            t_scale)
     }
 
 
 def test_transform_scales_coordinates_correctly(city_data_dict_fixture):
     """Ensures that the transform() method returns the city data, scaled as expected"""
-    raw_frame = city_data_dict_fixture['raw']
-    expected_frame, expected_scale = city_data_dict_fixture['transformed']
-    observed_frame, observed_scale = etl.transform(raw_frame)
-    pd.testing.assert_frame_equal(observed_frame, expected_frame)
+    raw_coordinates = city_data_dict_fixture['raw']
+    expected_coordinates, expected_scale = city_data_dict_fixture['transformed']
+    observed_coordinates, observed_scale = etl.transform(raw_coordinates)
+    np.testing.assert_allclose(observed_coordinates, expected_coordinates)
     assert observed_scale == expected_scale
 
 
-def test_load_returns_expected_list(city_dataframe_fixture,
-                                    cities_fixture):
-    """Ensures that the load() method returns the expected list of City tuples"""
-    observed_list = etl.load(city_dataframe_fixture)
-    assert observed_list == cities_fixture
+def test_load_returns_expected_cities(city_columns_fixture,
+                                      cities_fixture):
+    """Ensures that the load() method returns the expected cities, which behave like a list of
+    City tuples"""
+    observed_cities = etl.load(*city_columns_fixture)
+    assert len(observed_cities) == len(cities_fixture)
+    assert list(observed_cities) == cities_fixture
+    assert observed_cities[1] == cities_fixture[1]
+    assert list(observed_cities[1:]) == cities_fixture[1:]
 
 
-@pytest.mark.parametrize('series,expected_int',
-                         [(pd.Series([0.01, 0.02, 0.03]), -1),
-                          (pd.Series([1000, 2000, 3000]), 3)])
-def test_whole_number_digits_returns_expected_int(series, expected_int):
+@pytest.mark.parametrize('values,expected_int',
+                         [(np.array([0.01, 0.02, 0.03]), -1),
+                          (np.array([1000, 2000, 3000]), 3)])
+def test_whole_number_digits_returns_expected_int(values, expected_int):
     """Ensures that the whole_number_digits() method returns the expected integer"""
-    observed_int = etl.whole_number_digits(series)
+    observed_int = etl.whole_number_digits(values)
     assert observed_int == expected_int
@@ -2,10 +2,12 @@
 Unit tests for the geography.py module
 """
 # pragma pylint: disable=redefined-outer-name
+import math
+
 import numpy as np
 import pytest
 
-from traveling_salesperson import geography
+from traveling_salesperson import City, CityTable, geography
 
 
 @pytest.mark.parametrize('metric', ['euclidean', 'manhattan'])
@@ -16,3 +18,201 @@ def test_distance_matrix_returns_expected_matrix(cities_fixture,
     expected_matrix = distance_matrix_dict_fixture[metric]
     observed_matrix = geography.distance_matrix(cities_fixture, metric)
     np.testing.assert_array_equal(observed_matrix, expected_matrix)
+
+
+@pytest.mark.parametrize('dtype', ['float64', 'int32', 'uint16'])
+@pytest.mark.parametrize('block_size', [1, 2, 1024])
+def test_distance_matrix_supports_compact_dtypes_and_blocks(cities_fixture,
+                                                            distance_matrix_dict_fixture,
+                                                            dtype, block_size):
+    """Ensures that the distance_matrix() method returns the same distances regardless of the
+    storage type and the number of rows computed at once"""
+    expected_matrix = distance_matrix_dict_fixture['euclidean']
+    observed_matrix = geography.distance_matrix(cities_fixture, 'euclidean',
+                                                dtype=dtype, block_size=block_size)
+    assert observed_matrix.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(observed_matrix, expected_matrix)
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 1024])
+def test_distance_matrix_packs_upper_triangle(block_size):
+    """Ensures that the packed distance_matrix() holds the same distances as the full matrix,
+    regardless of the number of rows computed at once"""
+    cities = CityTable(np.arange(8), np.random.RandomState(2).uniform(0, 1000, (8, 2)))
+    expected_matrix = geography.distance_matrix(cities, dtype=np.int32)
+    packed_matrix = geography.distance_matrix(cities, dtype=np.int32, block_size=block_size,
+                                              packed=True)
+    assert isinstance(packed_matrix, geography.TriangularDistanceMatrix)
+    expected_values = geography.TriangularDistanceMatrix.from_matrix(expected_matrix).values
+    np.testing.assert_array_equal(packed_matrix.values, expected_values)
+
+
+def test_distance_matrix_raises_value_error_when_dtype_too_small(cities_fixture):
+    """Ensures that distances which do not fit in the requested type are not silently wrapped"""
+    far_cities = cities_fixture + [cities_fixture[0]._replace(name='z', x=10 ** 6)]
+    with pytest.raises(ValueError):
+        _ = geography.distance_matrix(far_cities, 'euclidean', dtype='uint16')
+
+
+def test_distance_matrix_rounds_like_scalar_arithmetic():
+    """Ensures that the vectorized distances are rounded half-to-even, exactly like round()"""
+    cities = [City('a', 0, 0), City('b', 0.5, 0), City('c', 1.5, 0), City('d', 3, 4)]
+    expected_matrix = np.array([[round(math.hypot(a.x - b.x, a.y - b.y)) for b in cities]
+                                for a in cities])
+    observed_matrix = geography.distance_matrix(cities, 'euclidean')
+    np.testing.assert_array_equal(observed_matrix, expected_matrix)
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'manhattan'])
+def test_lazy_distance_matrix_matches_distance_matrix(cities_fixture,
+                                                      distance_matrix_dict_fixture,
+                                                      metric):
+    """Ensures that the LazyDistanceMatrix rows are the same as the materialized matrix rows"""
+    expected_matrix = distance_matrix_dict_fixture[metric]
+    lazy_matrix = geography.LazyDistanceMatrix(cities_fixture, metric)
+    assert len(lazy_matrix) == len(expected_matrix)
+    for i, expected_row in enumerate(expected_matrix):
+        np.testing.assert_array_equal(lazy_matrix[i], expected_row)
+        assert lazy_matrix[i][i] == 0
+
+
+def test_lazy_distance_matrix_evicts_least_recently_used_row(cities_fixture):
+    """Ensures that the LazyDistanceMatrix keeps at most maxsize rows, evicting the least
+    recently used one, and counts hits and misses"""
+    lazy_matrix = geography.LazyDistanceMatrix(cities_fixture, maxsize=2)
+    _ = lazy_matrix[0], lazy_matrix[1], lazy_matrix[0], lazy_matrix[2]
+    assert lazy_matrix.cache_info() == geography.CacheInfo(hits=1, misses=3, maxsize=2, currsize=2)
+    _ = lazy_matrix[0]
+    assert lazy_matrix.hits == 2
+    _ = lazy_matrix[1]
+    assert lazy_matrix.misses == 4
+
+    lazy_matrix.cache_clear()
+    assert lazy_matrix.cache_info() == geography.CacheInfo(0, 0, 2, 0)
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'manhattan'])
+def test_coordinate_distance_matrix_matches_distance_matrix(cities_fixture,
+                                                            distance_matrix_dict_fixture,
+                                                            metric):
+    """Ensures that the CoordinateDistanceMatrix computes the same distances as the materialized
+    matrix"""
+    expected_matrix = distance_matrix_dict_fixture[metric]
+    coordinate_matrix = geography.CoordinateDistanceMatrix(cities_fixture, metric)
+    assert coordinate_matrix.shape == expected_matrix.shape
+    for i, expected_row in enumerate(expected_matrix):
+        for j, expected_distance in enumerate(expected_row):
+            assert coordinate_matrix[i][j] == expected_distance
+
+
+def test_triangular_distance_matrix_matches_distance_matrix():
+    """Ensures that the TriangularDistanceMatrix looks up the same distances, rows and pairs of
+    distances as the full matrix, from half the values"""
+    cities = CityTable(np.arange(7), np.random.RandomState(1).uniform(0, 1000, (7, 2)))
+    expected_matrix = geography.distance_matrix(cities, dtype=np.int32)
+    triangular_matrix = geography.TriangularDistanceMatrix.from_matrix(expected_matrix)
+    assert triangular_matrix.shape == expected_matrix.shape
+    assert triangular_matrix.dtype == np.int32
+    assert len(triangular_matrix.values) == 7 * 6 // 2
+    for i, expected_row in enumerate(expected_matrix):
+        np.testing.assert_array_equal(np.asarray(triangular_matrix[i]), expected_row)
+        for j, expected_distance in enumerate(expected_row):
+            assert triangular_matrix[i][j] == expected_distance
+
+    origins, destinations = np.array([0, 6, 3, 2]), np.array([6, 0, 3, 5])
+    np.testing.assert_array_equal(
+        geography.pair_distances(triangular_matrix, origins, destinations),
+        expected_matrix[origins, destinations])
+    with pytest.raises(ValueError):
+        _ = geography.TriangularDistanceMatrix(np.zeros(4))
+
+
+@pytest.mark.parametrize('count,changed', [(10, [2, 5]), (13, [0]), (7, [3]), (10, [])])
+@pytest.mark.parametrize('in_place', [False, True])
+def test_update_distance_matrix_matches_distance_matrix(count, changed, in_place):
+    """Ensures that the updated matrix is the distance matrix of the updated cities, whether
+    cities are replaced, added or dropped from the end, and that the given matrix is only updated
+    in place when asked."""
+    random = np.random.RandomState(0)
+    previous_cities = CityTable(np.arange(10), random.uniform(0, 1000, (10, 2)))
+    coordinates = np.concatenate((previous_cities.coordinates,
+                                  random.uniform(0, 1000, (3, 2))))[:count]
+    coordinates[changed] = random.uniform(0, 1000, (len(changed), 2))
+    cities = CityTable(np.arange(count), coordinates)
+    previous_matrix = geography.distance_matrix(previous_cities, dtype=np.int32)
+    original_matrix = previous_matrix.copy()
+
+    updated_matrix = geography.update_distance_matrix(previous_matrix, cities, changed,
+                                                      in_place=in_place)
+    assert updated_matrix.dtype == np.int32
+    np.testing.assert_array_equal(updated_matrix,
+                                  geography.distance_matrix(cities, dtype=np.int32))
+    if in_place and count <= 10:
+        assert np.shares_memory(updated_matrix, previous_matrix)
+    else:
+        np.testing.assert_array_equal(previous_matrix, original_matrix)
+
+
+def test_pair_distances_returns_expected_distances(cities_fixture,
+                                                   distance_matrix_dict_fixture):
+    """Ensures that the pair_distances() method looks up the same distances from a materialized
+    matrix, a nested list and a LazyDistanceMatrix"""
+    expected_matrix = distance_matrix_dict_fixture['euclidean']
+    origins, destinations = np.array([0, 1, 2, 2]), np.array([1, 2, 0, 2])
+    expected_distances = np.array([1118, 1118, 2236, 0])
+    for distances in (expected_matrix,
+                      expected_matrix.tolist(),
+                      geography.LazyDistanceMatrix(cities_fixture),
+                      geography.CoordinateDistanceMatrix(cities_fixture)):
+        np.testing.assert_array_equal(
+            geography.pair_distances(distances, origins, destinations), expected_distances)
+
+
+@pytest.fixture()
+def line_cities_fixture():
+    """Cities along a line, with two cities at the same coordinates"""
+    return [City('a', 0, 0), City('b', 1, 0), City('c', 3, 0), City('d', 3, 0), City('e', 7, 0)]
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'manhattan'])
+def test_nearest_neighbors_returns_expected_neighbors(line_cities_fixture, metric):
+    """Ensures that the nearest_neighbors() method returns the closest cities first, and never the
+    city itself, even when another city has the same coordinates"""
+    observed_neighbors = geography.nearest_neighbors(line_cities_fixture, 2, metric)
+    assert observed_neighbors.shape == (5, 2)
+    assert observed_neighbors[0].tolist() == [1, 2] or observed_neighbors[0].tolist() == [1, 3]
+    assert observed_neighbors[2][0] == 3
+    assert observed_neighbors[3][0] == 2
+    assert all(i not in row for i, row in enumerate(observed_neighbors))
+
+
+def test_nearest_neighbors_is_limited_by_number_of_cities(line_cities_fixture):
+    """Ensures that the nearest_neighbors() method returns at most all other cities"""
+    observed_neighbors = geography.nearest_neighbors(line_cities_fixture, 10)
+    assert observed_neighbors.shape == (5, 4)
+
+
+def test_matrix_nearest_neighbors_matches_nearest_neighbors():
+    """Ensures that the neighbors found from the rows of a distance matrix are as near as those
+    found from the coordinates (up to ties between rounded distances), and never the city itself"""
+    cities = CityTable(np.arange(50), np.random.RandomState(2).uniform(0, 1000, (50, 2)))
+    distances = geography.distance_matrix(cities)
+    expected_distances = np.take_along_axis(distances, geography.nearest_neighbors(cities, 5), 1)
+    for matrix in (distances, geography.TriangularDistanceMatrix.from_matrix(distances)):
+        neighbors = geography.matrix_nearest_neighbors(matrix, 5, block_size=8)
+        np.testing.assert_array_equal(np.take_along_axis(distances, neighbors, 1),
+                                      expected_distances)
+        assert all(i not in row for i, row in enumerate(neighbors))
+    assert geography.matrix_nearest_neighbors(distances[:3, :3], 10).shape == (3, 2)
+
+
+def test_city_table_columns_are_used_as_is(cities_fixture):
+    """Ensures that the coordinates and names of a CityTable are used without building City
+    tuples, and match those of the equivalent list of cities"""
+    city_table = CityTable.from_cities(cities_fixture)
+    assert geography.city_coordinates(city_table) is city_table.coordinates
+    np.testing.assert_array_equal(geography.city_coordinates(city_table),
+                                  geography.city_coordinates(cities_fixture))
+    assert geography.city_names(city_table) == geography.city_names(cities_fixture)
+    np.testing.assert_array_equal(geography.distance_matrix(city_table),
+                                  geography.distance_matrix(cities_fixture))
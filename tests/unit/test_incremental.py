@@ -0,0 +1,88 @@
+"""
+Unit tests for the incremental.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson import CityTable, SwapStatistics
+from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson.geography import distance_matrix, nearest_neighbors
+from traveling_salesperson.incremental import _city_sources, update_path
+
+
+@pytest.fixture()
+def solved_fixture():
+    """A solved path through 200 random cities, with 10 other cities to add"""
+    coordinates = np.random.RandomState(0).uniform(0, 10000, (210, 2))
+    cities = CityTable([f'c{i}' for i in range(200)], coordinates[:200])
+    added_cities = CityTable([f'new{i}' for i in range(10)], coordinates[200:])
+    distances = distance_matrix(cities)
+    path, _ = determine_path(cities, distances, nearest_neighbors(cities, 10))
+    return cities, distances, path, added_cities
+
+
+@pytest.mark.parametrize('count,removed,added_count,expected', [
+    (5, [], 2, [0, 1, 2, 3, 4, 5, 6]),
+    (5, [1, 3], 2, [0, 5, 2, 6, 4]),
+    (5, [1, 3], 1, [0, 5, 2, 4]),
+    (5, [1], 3, [0, 5, 2, 3, 4, 6, 7]),
+    (5, [0, 4], 0, [3, 1, 2]),
+    (5, [0, 1], 0, [3, 4, 2])])
+def test_city_sources(count, removed, added_count, expected):
+    """Ensures that the added cities take the places of the removed cities, and the last cities
+    take the places left over."""
+    assert _city_sources(count, removed, added_count).tolist() == expected
+
+
+@pytest.mark.parametrize('added_count,removed', [(10, []),
+                                                 (0, ['c0', 'c50', 'c199']),
+                                                 (10, ['c3', 'c4', 'c5', 'c150']),
+                                                 (2, [f'c{i}' for i in range(0, 200, 10)])])
+def test_update_path_matches_changed_cities(solved_fixture, added_count, removed):
+    """Ensures that the updated path visits exactly the kept and added cities, with the distance
+    matrix of the updated cities, and the total length of the path."""
+    cities, distances, path, added_cities = solved_fixture
+    added_cities = added_cities[:added_count]
+    statistics = SwapStatistics()
+    solution = update_path(cities, distances, path, added_cities, removed,
+                           statistics=statistics)
+
+    expected_names = (set(cities.names.tolist()) - set(removed)) | set(added_cities.names.tolist())
+    assert len(solution.path) == len(expected_names)
+    assert set(solution.path) == expected_names
+    assert sorted(solution.cities.names.tolist()) == sorted(expected_names)
+    np.testing.assert_array_equal(solution.distance_matrix, distance_matrix(solution.cities))
+
+    indexes = {name: index for index, name in enumerate(solution.cities.names.tolist())}
+    nodes = [indexes[name] for name in solution.path]
+    assert solution.total_distance == sum(solution.distance_matrix[a][b]
+                                          for a, b in zip(nodes, nodes[1:] + nodes[:1]))
+    assert solution.path[0] == next(name for name in path if name not in removed)
+
+
+def test_update_path_is_close_to_solving_again(solved_fixture):
+    """Ensures that the updated path is about as short as a path solved from scratch."""
+    cities, distances, path, added_cities = solved_fixture
+    solution = update_path(cities, distances, path, added_cities, ['c7', 'c70'])
+    _, total_distance = determine_path(solution.cities, distance_matrix(solution.cities),
+                                       nearest_neighbors(solution.cities, 10))
+    assert solution.total_distance < 1.05 * total_distance
+
+
+def test_update_path_starts_from_empty_path(cities_fixture):
+    """Ensures that every city can be replaced."""
+    distances = distance_matrix(cities_fixture)
+    added_cities = CityTable(['d', 'e'], [[0, 100], [100, 0]])
+    solution = update_path(cities_fixture, distances, ['a', 'b', 'c'], added_cities,
+                           ['a', 'b', 'c'])
+    assert solution.path == ['d', 'e']
+    assert solution.total_distance == 2 * 141
+
+
+@pytest.mark.parametrize('removed', [['x'], ['a', 'b', 'c']])
+def test_update_path_fails_with_bad_removal(cities_fixture, removed):
+    """Ensures that removing an unknown city, or every city, is an error."""
+    with pytest.raises(ValueError):
+        update_path(cities_fixture, distance_matrix(cities_fixture), ['a', 'b', 'c'], (),
+                    removed)
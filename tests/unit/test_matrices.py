@@ -0,0 +1,122 @@
+"""
+Unit tests for the matrices.py module
+"""
+import numpy as np
+import pytest
+
+from traveling_salesperson.geography import TriangularDistanceMatrix
+from traveling_salesperson.matrices import read_matrix
+
+
+@pytest.fixture()
+def matrix_fixture():
+    """A symmetric matrix of distances between four cities"""
+    return np.array([[0, 3, 4, 5],
+                     [3, 0, 6, 7],
+                     [4, 6, 0, 8],
+                     [5, 7, 8, 0]])
+
+
+def test_read_matrix_memory_maps_npy_files(tmp_path, matrix_fixture):
+    """Ensures that a full matrix, or a condensed upper triangle, is opened memory-mapped."""
+    np.save(tmp_path / 'full.npy', matrix_fixture.astype(np.int32))
+    np.save(tmp_path / 'upper.npy', matrix_fixture[np.triu_indices(4, 1)].astype(np.uint16))
+
+    full = read_matrix(str(tmp_path / 'full.npy'))
+    assert isinstance(full.distances, np.memmap)
+    assert full.distances.dtype == np.int32
+    np.testing.assert_array_equal(full.distances, matrix_fixture)
+    assert full.names == [0, 1, 2, 3]
+    assert full.coordinates is None
+
+    upper = read_matrix(str(tmp_path / 'upper.npy')).distances
+    assert isinstance(upper, TriangularDistanceMatrix)
+    assert isinstance(upper.values, np.memmap)
+    assert upper.dtype == np.uint16
+    np.testing.assert_array_equal([np.asarray(upper[i]) for i in range(4)], matrix_fixture)
+
+
+@pytest.mark.parametrize('layout', [None, 'full', 'upper'])
+def test_read_matrix_memory_maps_raw_files(tmp_path, matrix_fixture, layout):
+    """Ensures that raw binary values are read in the given layout, by default a full matrix if
+    the number of values is a square."""
+    filename = str(tmp_path / 'matrix.bin')
+    values = matrix_fixture[np.triu_indices(4, 1)] if layout == 'upper' else matrix_fixture
+    values.astype(np.float32).tofile(filename)
+
+    distances = read_matrix(filename, np.float32, layout).distances
+    np.testing.assert_array_equal([np.asarray(distances[i]) for i in range(4)], matrix_fixture)
+    assert isinstance(distances, TriangularDistanceMatrix) == (layout == 'upper')
+
+
+@pytest.mark.parametrize('edge_weight_format,values', [
+    ('FULL_MATRIX', '0 3 4 5\n3 0 6 7\n4 6 0 8\n5 7 8 0'),
+    ('UPPER_ROW', '3 4 5\n6 7\n8'),
+    ('LOWER_COL', '3 4 5 6 7 8'),
+    ('LOWER_ROW', '3\n4 6\n5 7 8'),
+    ('UPPER_COL', '3 4 6 5 7 8'),
+    ('UPPER_DIAG_ROW', '0 3 4 5\n0 6 7\n0 8\n0'),
+    ('LOWER_DIAG_ROW', '0\n3 0\n4 6 0\n5 7 8 0')])
+def test_read_matrix_reads_tsplib_explicit_formats(tmp_path, matrix_fixture, edge_weight_format,
+                                                   values):
+    """Ensures that each TSPLIB format of explicit edge weights is read as the same matrix,
+    stored as a condensed triangle unless it is a full matrix."""
+    filename = tmp_path / 'cities.tsp'
+    filename.write_text(f'NAME: cities\nTYPE: TSP\nDIMENSION: 4\nEDGE_WEIGHT_TYPE: EXPLICIT\n'
+                        f'EDGE_WEIGHT_FORMAT: {edge_weight_format}\nEDGE_WEIGHT_SECTION\n'
+                        f'{values}\nEOF\n')
+
+    instance = read_matrix(str(filename), np.int32)
+    assert instance.distances.dtype == np.int32
+    assert isinstance(instance.distances, TriangularDistanceMatrix) == (
+        edge_weight_format != 'FULL_MATRIX')
+    np.testing.assert_array_equal([np.asarray(instance.distances[i]) for i in range(4)],
+                                  matrix_fixture)
+    assert instance.names == [1, 2, 3, 4]
+    assert instance.coordinates is None
+
+
+def test_read_matrix_reads_tsplib_display_data(filename_fixture):
+    """Ensures that the coordinates and node numbers of a TSPLIB file are read."""
+    instance = read_matrix(filename_fixture.replace('.csv', '.tsp'))
+    assert instance.names == [1, 2, 3]
+    np.testing.assert_array_equal(instance.coordinates, [[0, 0], [500, 1000], [1000, 2000]])
+    assert instance.distances[0][2] == 2236
+
+
+@pytest.mark.parametrize('header,values', [
+    ('EDGE_WEIGHT_TYPE: EUC_2D', ''),
+    ('EDGE_WEIGHT_TYPE: EXPLICIT\nEDGE_WEIGHT_FORMAT: FUNCTION', '3 4 5 6 7 8'),
+    ('EDGE_WEIGHT_TYPE: EXPLICIT\nEDGE_WEIGHT_FORMAT: UPPER_ROW', '3 4 5 6 7')])
+def test_read_matrix_fails_with_invalid_tsplib_file(tmp_path, header, values):
+    """Ensures that TSPLIB files without explicit edge weights, or with too few, are an error."""
+    filename = tmp_path / 'cities.tsp'
+    filename.write_text(f'DIMENSION: 4\n{header}\nEDGE_WEIGHT_SECTION\n{values}\nEOF\n')
+    with pytest.raises(ValueError):
+        read_matrix(str(filename))
+
+
+def test_read_matrix_fails_with_values_of_no_matrix(tmp_path):
+    """Ensures that a raw file holding neither a square nor a triangle of values is an error."""
+    filename = str(tmp_path / 'matrix.bin')
+    np.zeros(5).tofile(filename)
+    with pytest.raises(ValueError):
+        read_matrix(filename)
+
+
+@pytest.mark.parametrize('extension', ['npy', 'bin', 'tsp'])
+def test_read_matrix_fails_with_fractional_distances(tmp_path, matrix_fixture, extension):
+    """Ensures that a matrix of distances that are not whole numbers, which the path lengths and
+    the lower bound would truncate, is an error."""
+    values = matrix_fixture / 10
+    filename = tmp_path / f'matrix.{extension}'
+    if extension == 'npy':
+        np.save(filename, values)
+    elif extension == 'bin':
+        values.tofile(filename)
+    else:
+        filename.write_text('DIMENSION: 4\nEDGE_WEIGHT_TYPE: EXPLICIT\nEDGE_WEIGHT_FORMAT: '
+                            'FULL_MATRIX\nEDGE_WEIGHT_SECTION\n'
+                            + ' '.join(map(str, values.ravel())) + '\nEOF\n')
+    with pytest.raises(ValueError, match='not whole numbers'):
+        read_matrix(str(filename))
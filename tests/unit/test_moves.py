@@ -0,0 +1,58 @@
+"""
+Unit tests for the moves.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson import City, geography, moves, SwapStatistics
+from traveling_salesperson.tour import Tour
+
+
+@pytest.fixture()
+def line_fixture():
+    """Cities along a line, with the distance matrix and candidate neighbors"""
+    cities = [City(str(i), x, 0) for i, x in enumerate([0, 1, 2, 3, 4, 5, 6, 7])]
+    distances = geography.distance_matrix(cities)
+    candidates = moves.CandidateLists(distances, geography.nearest_neighbors(cities, 4))
+    return distances, candidates
+
+
+def _length(path, distances):
+    """Helper to compute the length of the closed path"""
+    return sum(distances[path[i - 1]][path[i]] for i in range(len(path)))
+
+
+@pytest.mark.parametrize('move_name,path,node',
+                         [('2-opt', [0, 1, 2, 5, 4, 3, 6, 7], 2),
+                          ('or-opt', [0, 1, 2, 3, 6, 4, 5, 7], 6),
+                          ('segment-insertion', [0, 1, 5, 2, 3, 4, 6, 7], 2)])
+def test_move_delta_matches_change_in_length(line_fixture, move_name, path, node):
+    """Ensures that each move finds an improving move, and that its delta is the change in length
+    of the closed path after applying it."""
+    distances, candidates = line_fixture
+    tour = Tour(path)
+    move = moves.MOVES[move_name](node, tour, distances, candidates, SwapStatistics())
+    assert move is not None and move.delta < 0
+    move.apply()
+    assert sorted(tour.to_list()) == list(range(8))
+    assert _length(tour.to_list(), distances) - _length(path, distances) == move.delta
+
+
+@pytest.mark.parametrize('move_set', [('2-opt',), ('2-opt', 'or-opt'),
+                                      ('2-opt', 'or-opt', 'segment-insertion')])
+def test_local_search_returns_change_in_length(move_set):
+    """Ensures that local_search() improves a random tour, and returns the change in length"""
+    random = np.random.RandomState(0)
+    cities = [City(str(i), *xy) for i, xy in enumerate(random.uniform(0, 1000, (60, 2)))]
+    distances = geography.distance_matrix(cities)
+    candidates = moves.CandidateLists(distances, geography.nearest_neighbors(cities, 8))
+    path = random.permutation(60).tolist()
+    tour = Tour(path)
+    statistics = SwapStatistics()
+
+    delta = moves.local_search(tour, distances, candidates, move_set, statistics)
+    assert delta < 0
+    assert sorted(tour.to_list()) == list(range(60))
+    assert _length(tour.to_list(), distances) - _length(path, distances) == delta
+    assert statistics.applied > 0
@@ -0,0 +1,28 @@
+"""
+Unit tests for the parallel.py module
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from traveling_salesperson import parallel
+
+
+def test_shared_distance_matrix_copies_and_releases_the_matrix():
+    """Ensures that the SharedDistanceMatrix holds a copy of the matrix, which can be attached to
+    by name, and that the shared memory is released on exit."""
+    distances = np.arange(16, dtype=np.uint16).reshape(4, 4)
+    with parallel.SharedDistanceMatrix(distances) as shared_matrix:
+        assert shared_matrix.shape == (4, 4)
+        assert shared_matrix.dtype == np.uint16
+        attached = shared_memory.SharedMemory(name=shared_matrix.name)
+        try:
+            view = np.ndarray(shared_matrix.shape, dtype=shared_matrix.dtype, buffer=attached.buf)
+            np.testing.assert_array_equal(view, distances)
+            del view
+        finally:
+            attached.close()
+        name = shared_matrix.name
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
@@ -0,0 +1,45 @@
+"""
+Unit tests for the perturbation.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson import City, geography, perturbation
+from traveling_salesperson.tour import Tour
+
+
+@pytest.fixture()
+def random_cities_fixture():
+    """Randomly placed cities, with their distance matrix"""
+    random = np.random.RandomState(1)
+    cities = [City(str(i), *xy) for i, xy in enumerate(random.uniform(0, 1000, (30, 2)))]
+    return cities, geography.distance_matrix(cities)
+
+
+def _length(path, distances):
+    """Helper to compute the length of the closed path"""
+    return sum(distances[path[i - 1]][path[i]] for i in range(len(path)))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_double_bridge_delta_matches_change_in_length(random_cities_fixture, seed):
+    """Ensures that the double_bridge() kick reports the change in length of the closed path, and
+    the nodes whose edges were changed (the ends of the three edges removed, which coincide for
+    segments of a single node)."""
+    _, distances = random_cities_fixture
+    path = list(range(30))
+    tour = Tour(path)
+    delta, nodes = perturbation.double_bridge(tour, distances, np.random.RandomState(seed),
+                                              window=10)
+    assert sorted(tour.to_list()) == path
+    assert _length(tour.to_list(), distances) - _length(path, distances) == delta
+    assert 4 <= len(set(nodes)) <= 6
+
+
+def test_double_bridge_leaves_tiny_tours_as_is(random_cities_fixture):
+    """Ensures that there is no kick when the tour is too small for one"""
+    _, distances = random_cities_fixture
+    tour = Tour([0, 1, 2])
+    assert perturbation.double_bridge(tour, distances, np.random.RandomState(0)) == (0, [])
+    assert tour.to_list() == [0, 1, 2]
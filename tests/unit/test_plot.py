@@ -0,0 +1,58 @@
+"""
+Unit tests for the plot.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson import CityTable
+from traveling_salesperson.plot import decimate, path_indexes, plot_path, plot_tour
+
+
+@pytest.fixture()
+def results_directory_fixture(tmp_path, monkeypatch):
+    """An empty results directory, in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    directory = tmp_path / 'results'
+    directory.mkdir()
+    return directory
+
+
+def test_path_indexes(cities_fixture, city_columns_fixture):
+    """Ensures that the index of each city of the path is found, whether the cities are a list
+    or a CityTable."""
+    assert path_indexes(['c', 'a', 'b'], cities_fixture).tolist() == [2, 0, 1]
+    assert path_indexes(['b', 'c', 'a'], CityTable(*city_columns_fixture)).tolist() == [1, 2, 0]
+
+
+@pytest.mark.parametrize('max_points,expected', [(None, list(range(10))),
+                                                 (10, list(range(10))),
+                                                 (5, [0, 2, 4, 6, 8]),
+                                                 (4, [0, 3, 6, 9])])
+def test_decimate(max_points, expected):
+    """Ensures that every k-th city is kept, for the smallest k leaving at most max_points."""
+    assert decimate(np.arange(10), max_points).tolist() == expected
+
+
+@pytest.mark.parametrize('image_format', ['png', 'svg'])
+def test_plot_tour_saves_image(results_directory_fixture, image_format):
+    """Ensures that the plot is saved in the given format, including for decimated tours."""
+    coordinates = np.random.RandomState(0).uniform(0, 100, (5000, 2))
+    image_filename = plot_tour('random', np.arange(5000), coordinates, 1234, image_format, 1000)
+    assert (results_directory_fixture / f'random_path.{image_format}').stat().st_size > 0
+    assert image_filename.endswith(f'random_path.{image_format}')
+
+
+def test_plot_tour_fails_with_unknown_format(results_directory_fixture):
+    """Ensures that an unknown image format is an error, and nothing is saved."""
+    with pytest.raises(ValueError):
+        plot_tour('cities', np.arange(3), np.zeros((3, 2)), 0, 'gif')
+    assert not list(results_directory_fixture.iterdir())
+
+
+def test_plot_path_in_background(results_directory_fixture, cities_fixture):
+    """Ensures that the plot is saved by a separate process, once it is joined."""
+    process = plot_path('cities', ['a', 'c', 'b'], cities_fixture, 4472, background=True)
+    process.join()
+    assert process.exitcode == 0
+    assert (results_directory_fixture / 'cities_path.png').exists()
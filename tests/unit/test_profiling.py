@@ -0,0 +1,110 @@
+"""
+Unit tests for the profiling.py module
+"""
+import json
+import tracemalloc
+
+import numpy as np
+
+from traveling_salesperson import profiling
+from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson.geography import distance_matrix
+
+
+def test_profiling_is_a_no_op_when_disabled():
+    """Ensures that phases and path lengths are ignored unless profiling is enabled."""
+    profiling.disable()
+    with profiling.phase('ignored'):
+        profiling.record(10)
+
+
+def test_profiler_records_phases_and_trajectory(ten_cities_fixture):
+    """Ensures that the phases of determine_path are recorded in order, along with a
+    non-increasing trajectory of path lengths, in a JSON serializable report."""
+    profiler = profiling.enable()
+    try:
+        _, total_distance = determine_path(ten_cities_fixture,
+                                           distance_matrix(ten_cities_fixture))
+    finally:
+        profiling.disable()
+
+    assert [phase.name for phase in profiler.phases] == ['construction', 'local_search']
+    assert all(phase.seconds >= 0 for phase in profiler.phases)
+    lengths = [length for _, length in profiler.trajectory]
+    assert lengths and lengths == sorted(lengths, reverse=True)
+    assert lengths[-1] == total_distance
+
+    report = json.loads(json.dumps(profiler.report(cities=10)))
+    assert report['cities'] == 10
+    assert [phase['name'] for phase in report['phases']] == ['construction', 'local_search']
+
+
+def test_suspended_profiling_ignores_enclosed_code():
+    """Ensures that nothing is recorded while profiling is suspended, and recording resumes
+    afterwards."""
+    profiler = profiling.enable()
+    try:
+        with profiling.suspended():
+            with profiling.phase('ignored'):
+                profiling.record(10)
+        profiling.record(5)
+    finally:
+        profiling.disable()
+
+    assert not profiler.phases
+    assert [length for _, length in profiler.trajectory] == [5]
+
+
+def test_enable_uses_the_given_profiler():
+    """Ensures that a given profiler, e.g. one reporting the path lengths as they are recorded,
+    records the run."""
+    class ReportingProfiler(profiling.Profiler):
+        """A profiler keeping the recorded lengths aside"""
+        def __init__(self):
+            super().__init__()
+            self.reported = []
+
+        def record(self, total_distance):
+            self.reported.append(total_distance)
+
+    profiler = ReportingProfiler()
+    try:
+        assert profiling.enable(profiler) is profiler
+        profiling.record(7)
+    finally:
+        profiling.disable()
+
+    assert profiler.reported == [7]
+
+
+def test_profiler_traces_peak_memory_of_each_phase():
+    """Ensures that the peak memory of each phase is measured from the start of the phase, and
+    that the peak of a nested phase counts towards the enclosing phase."""
+    profiler = profiling.enable(profiling.Profiler(trace_memory=True))
+    try:
+        with profiling.phase('outer'):
+            with profiling.phase('large'):
+                array = np.ones(2 ** 20)
+                del array
+            with profiling.phase('small'):
+                array = np.ones(2 ** 10)
+                del array
+    finally:
+        profiling.disable()
+
+    peaks = {phase.name: phase.peak_memory_mb for phase in profiler.phases}
+    assert peaks['large'] >= 8
+    assert peaks['small'] < 1
+    assert peaks['outer'] >= peaks['large']
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_does_not_trace_memory_by_default():
+    """Ensures that memory is only traced when asked for."""
+    profiler = profiling.enable()
+    try:
+        with profiling.phase('untraced'):
+            pass
+    finally:
+        profiling.disable()
+    assert profiler.phases[0].peak_memory_mb is None
@@ -0,0 +1,79 @@
+"""
+Unit tests for the tour.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import pytest
+
+from traveling_salesperson.tour import Tour
+
+
+@pytest.fixture()
+def tour_fixture():
+    """A tour visiting six nodes out of order"""
+    return Tour([3, 0, 4, 1, 5, 2])
+
+
+def test_tour_answers_next_prev_and_position_queries(tour_fixture):
+    """Ensures that the Tour reports the neighbors and position of each node, wrapping around."""
+    assert len(tour_fixture) == 6
+    assert tour_fixture[2] == 4
+    assert tour_fixture.position(4) == 2
+    assert tour_fixture.next(4) == 1
+    assert tour_fixture.prev(4) == 0
+    assert tour_fixture.next(2) == 3
+    assert tour_fixture.prev(3) == 2
+
+
+@pytest.mark.parametrize('nodes,expected_bool',
+                         [((0, 4, 5), True), ((0, 2, 5), False), ((5, 3, 0), True),
+                          ((5, 4, 0), False), ((1, 1, 1), True)])
+def test_tour_between_follows_the_tour_forward(tour_fixture, nodes, expected_bool):
+    """Ensures that between() checks whether the middle node lies on the forward path from the
+    first node to the last node."""
+    assert tour_fixture.between(*nodes) == expected_bool
+
+
+def _cycle(path):
+    """Helper to normalize a closed path, so that equal tours compare equal regardless of the
+    starting node and direction"""
+    start = path.index(0)
+    rotated = path[start:] + path[:start]
+    return min(rotated, [rotated[0]] + rotated[:0:-1])
+
+
+@pytest.mark.parametrize('start,end,expected_path',
+                         [(1, 2, [3, 4, 0, 1, 5, 2]),  # short segment
+                          (1, 4, [3, 5, 1, 4, 0, 2]),  # complement reversed instead
+                          (4, 1, [5, 4, 1, 0, 3, 2]),  # segment wrapping around
+                          (5, 0, [2, 0, 4, 1, 5, 3]),  # short segment wrapping around
+                          (2, 2, [3, 0, 4, 1, 5, 2])])  # single node
+def test_tour_reverse_gives_expected_closed_path(tour_fixture, start, end, expected_path):
+    """Ensures that reversing a segment gives the expected closed path, and keeps the positions
+    consistent with the order."""
+    tour_fixture.reverse(start, end)
+    assert _cycle(tour_fixture.to_list()) == _cycle(expected_path)
+    for position, node in enumerate(tour_fixture):
+        assert tour_fixture.position(node) == position
+
+
+def test_tour_reverse_moves_at_most_half_of_the_nodes(tour_fixture):
+    """Ensures that the shorter side of the tour is reversed, i.e. reversing all but one node
+    leaves the order as is"""
+    tour_fixture.reverse(0, 4)
+    assert tour_fixture.to_list() == [3, 0, 4, 1, 5, 2]
+
+
+@pytest.mark.parametrize('start,end,after,reverse,expected_path',
+                         [(1, 2, 4, False, [3, 1, 5, 0, 4, 2]),  # forwards
+                          (1, 2, 4, True, [3, 1, 5, 4, 0, 2]),  # forwards, reversed
+                          (4, 4, 0, False, [3, 5, 0, 4, 1, 2]),  # backwards
+                          (5, 0, 2, True, [0, 4, 3, 2, 1, 5]),  # wrapping around
+                          (0, 0, 5, False, [0, 4, 1, 5, 2, 3])])  # to the closing edge
+def test_tour_move_gives_expected_closed_path(tour_fixture, start, end, after, reverse,
+                                              expected_path):
+    """Ensures that moving a segment gives the expected closed path, and keeps the positions
+    consistent with the order."""
+    tour_fixture.move(start, end, after, reverse)
+    assert _cycle(tour_fixture.to_list()) == _cycle(expected_path)
+    for position, node in enumerate(tour_fixture):
+        assert tour_fixture.position(node) == position
@@ -0,0 +1,68 @@
+"""
+Unit tests for the tours.py module
+"""
+# pragma pylint: disable=redefined-outer-name
+import numpy as np
+import pytest
+
+from traveling_salesperson.tours import read_tour, TourStore, write_tour
+
+
+@pytest.mark.parametrize('name', ['cities.tour', 'cities.npy'])
+def test_write_tour_then_read_tour(tmp_path, name):
+    """Ensures that a tour is read back as written, in both formats."""
+    filename = str(tmp_path / name)
+    write_tour(filename, [2, 0, 3, 1], length=42)
+    np.testing.assert_array_equal(read_tour(filename), [2, 0, 3, 1])
+
+
+def test_write_tour_writes_tsplib_format(tmp_path):
+    """Ensures that the tour is written with a TSPLIB header and 1-based city numbers."""
+    filename = tmp_path / 'cities.tour'
+    write_tour(str(filename), [2, 0, 1], 'cities', 4472)
+    assert filename.read_text() == ('NAME : cities\nCOMMENT : Length = 4472\nTYPE : TOUR\n'
+                                    'DIMENSION : 3\nTOUR_SECTION\n3\n1\n2\n-1\nEOF\n')
+
+
+def test_read_tour_accepts_tsplib_variants(tmp_path):
+    """Ensures that several city numbers per line, and a missing end of section, are accepted."""
+    filename = tmp_path / 'cities.tour'
+    filename.write_text('NAME: cities\nTYPE: TOUR\nTOUR_SECTION\n3 1\n2 4\n')
+    np.testing.assert_array_equal(read_tour(str(filename)), [2, 0, 1, 3])
+
+
+@pytest.mark.parametrize('content', ['NAME : cities\n1\n2\n',
+                                     'DIMENSION : 3\nTOUR_SECTION\n1\n2\n-1\n'])
+def test_read_tour_fails_with_invalid_file(tmp_path, content):
+    """Ensures that a file without a tour section, or with too few cities, is an error."""
+    filename = tmp_path / 'cities.tour'
+    filename.write_text(content)
+    with pytest.raises(ValueError):
+        read_tour(str(filename))
+
+
+def test_tour_store_keeps_shortest_tour(tmp_path):
+    """Ensures that a stored tour is only replaced by a shorter tour."""
+    store = TourStore(str(tmp_path / 'tours'))
+    assert store.get('key') is None
+    assert store.put('key', [0, 1, 2], 10)
+    assert not store.put('key', [0, 2, 1], 10)
+    assert store.put('key', [1, 0, 2], 9)
+
+    stored = store.get('key')
+    np.testing.assert_array_equal(stored.tour, [1, 0, 2])
+    assert stored.length == 9
+    assert not list((tmp_path / 'tours').glob('*.tmp'))
+
+
+def test_tour_store_key_depends_on_file_content_and_metric(tmp_path):
+    """Ensures that the key changes with the content of the file and the metric, but not with
+    the name of the file."""
+    first_file, second_file = tmp_path / 'first.csv', tmp_path / 'second.csv'
+    first_file.write_text('name,x,y\na,0,0\n')
+    second_file.write_text('name,x,y\na,0,0\n')
+    key = TourStore.key(str(first_file), 'euclidean')
+    assert TourStore.key(str(second_file), 'euclidean') == key
+    assert TourStore.key(str(first_file), 'manhattan') != key
+    second_file.write_text('name,x,y\na,0,1\n')
+    assert TourStore.key(str(second_file), 'euclidean') != key
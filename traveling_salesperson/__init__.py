@@ -2,8 +2,75 @@
 Entities used throughout the project
 """
 from collections import namedtuple
-from typing import Tuple
+from typing import Iterator, Sequence, Tuple, Union
+
+import numpy as np
 
 
 City = namedtuple('City', 'name x y')
 Node = Tuple[int, int]
+# Anything whose rows can be indexed as distances[i][j], e.g. a numpy array or a
+# geography.LazyDistanceMatrix
+DistanceMatrix = Sequence[Sequence[float]]
+
+
+class CityTable:
+    """A columnar list of cities: the names in one array, and the coordinates in a contiguous
+    n x 2 (float64) array, so that no City tuple is built unless a single city is looked up.
+
+    It can be used wherever a list of cities is expected: indexing with an integer returns a
+    City, and indexing with a slice or an array of indexes returns another CityTable.
+    """
+
+    def __init__(self, names: Sequence, coordinates: np.ndarray):
+        """
+        Args:
+            names: The name of each city
+            coordinates: An n x 2 array with the x and y coordinates of each city
+        """
+        self.names = np.asarray(names)
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=np.float64).reshape(-1, 2)
+
+    @classmethod
+    def from_cities(cls, cities: Sequence[City]) -> 'CityTable':
+        """Build the columns from a list of City tuples"""
+        return cls([city.name for city in cities],
+                   [(city.x, city.y) for city in cities])
+
+    @property
+    def x(self) -> np.ndarray:
+        """The x coordinate of each city"""
+        return self.coordinates[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        """The y coordinate of each city"""
+        return self.coordinates[:, 1]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[City, 'CityTable']:
+        if isinstance(index, (int, np.integer)):
+            x, y = self.coordinates[index].tolist()
+            return City(self.names[index].item(), x, y)
+        return CityTable(self.names[index], self.coordinates[index])
+
+    def __iter__(self) -> Iterator[City]:
+        for name, (x, y) in zip(self.names.tolist(), self.coordinates.tolist()):
+            yield City(name, x, y)
+
+
+class SwapStatistics:
+    """Counters for the work done while optimizing a path through swapping (and other moves)"""
+
+    def __init__(self):
+        self.evaluated = 0
+        self.applied = 0
+        self.kicks = 0
+        # Passes over all nodes (best improvement), or runs of the local search (first improvement)
+        self.passes = 0
+
+    def __repr__(self) -> str:
+        return (f'SwapStatistics(evaluated={self.evaluated}, applied={self.applied}, '
+                f'kicks={self.kicks}, passes={self.passes})')
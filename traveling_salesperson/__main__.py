@@ -1,52 +1,512 @@
 """
 Traveling Salesperson
 """
+import json
 import os
 from pathlib import Path
 import time
+from typing import Any, Optional, Tuple
 
 import click
 import numpy as np
 
-from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson import CityTable, profiling
+from traveling_salesperson.algorithm import (CONSTRUCTIONS, determine_path, MOVE_SET,
+                                             SWAP_ENGINES, SWAP_STRATEGIES, SwapStatistics)
+from traveling_salesperson.batch import expand_filenames, solve_batch
+from traveling_salesperson.bound import DEFAULT_BOUND_ITERATIONS, held_karp_bound, optimality_gap
+from traveling_salesperson.cache import (DEFAULT_CACHE_DIRECTORY, DEFAULT_CACHE_MEGABYTES,
+                                         DistanceMatrixCache)
+from traveling_salesperson.decomposition import decomposed_path, DECOMPOSITIONS
 from traveling_salesperson.etl import etl
-from traveling_salesperson.geography import distance_matrix
-from traveling_salesperson.plot import plot_path
+from traveling_salesperson.geography import (city_names, DISTANCE_DTYPES, distance_matrix,
+                                             LazyDistanceMatrix, matrix_nearest_neighbors,
+                                             nearest_neighbors, path_indexes)
+from traveling_salesperson.matrices import MATRIX_LAYOUTS, read_matrix
+from traveling_salesperson.parallel import multi_start_path
+from traveling_salesperson.plot import DEFAULT_MAX_POINTS, IMAGE_FORMATS, plot_path
+from traveling_salesperson.tours import DEFAULT_TOUR_DIRECTORY, read_tour, TourStore, write_tour
+
+
+DEFAULT_FILENAME = os.path.join('data', 'djbouti38.csv')
 
 
 @click.command()
 @click.option('--metric', '-m', default='euclidean', show_default=True,
               type=click.Choice(['euclidean', 'manhattan']))
-@click.option('--filename', '-f', default=os.path.join('data', 'djbouti38.csv'), show_default=True)
+@click.option('--filename', '-f', default=None,
+              help=f'The csv file of the cities  [default: {DEFAULT_FILENAME}, unless --matrix is '
+                   f'given]')
 @click.option('--time_alg', '-t', default=True, show_default=True)
+@click.option('--dtype', '-d', default='float64', show_default=True,
+              type=click.Choice(DISTANCE_DTYPES),
+              help='The type used to store the distance matrix (and the type of the values of '
+                   'a raw binary --matrix)')
+@click.option('--matrix', default=None,
+              help='Read the distances from this precomputed, symmetric, matrix instead of '
+                   'computing them from the coordinates: a .npy file (memory-mapped), a TSPLIB '
+                   '.tsp file with EXPLICIT edge weights, or a raw binary file.  The cities are '
+                   'those of --filename, if given, in the order of the rows, or else the nodes of '
+                   'the matrix (which are only plotted if the TSPLIB file lists coordinates)')
+@click.option('--matrix-layout', default=None, type=click.Choice(MATRIX_LAYOUTS),
+              help='Whether a raw binary --matrix holds the full matrix, or its condensed upper '
+                   'triangle (row after row, without the diagonal)  [default: full, if the number '
+                   'of values is a square]')
+@click.option('--row-cache', '-r', default=0, show_default=True, type=click.IntRange(min=0),
+              help='Compute distances lazily, caching this many rows, instead of storing the '
+                   'full matrix (0 stores the full matrix)')
+@click.option('--packed', is_flag=True, default=False,
+              help='Only store the upper triangle of the (symmetric) distance matrix, in half the '
+                   'memory, at the cost of slightly slower lookups')
+@click.option('--neighbors', '-k', default=10, show_default=True, type=click.IntRange(min=0),
+              help='The number of nearest neighbors considered for 2-opt swaps of each city '
+                   '(0 considers all swaps)')
+@click.option('--strategy', '-s', default='best', show_default=True,
+              type=click.Choice(SWAP_STRATEGIES),
+              help="Apply the 'best' 2-opt swap of each pass, or the 'first' improving swap found")
+@click.option('--start-city', '-c', default=None,
+              help='The name of the city to start the path from  [default: the first city]')
+@click.option('--engine', '-e', default='segments', show_default=True,
+              type=click.Choice(SWAP_ENGINES),
+              help='How all 2-opt swaps are evaluated when --neighbors is 0: one at a time '
+                   "('segments') or a row of the distance matrix at a time ('rows')")
+@click.option('--moves', '-M', multiple=True, default=['2-opt'], show_default=True,
+              type=click.Choice(MOVE_SET),
+              help='The local search moves to use (repeat for several).  Moves other than 2-opt '
+                   'are chained with the 2-opt swaps')
+@click.option('--time-limit', '-T', default=None, type=click.FloatRange(min=0),
+              help='Keep improving the path with iterated local search for this many seconds')
+@click.option('--max-iterations', '-I', default=None, type=click.IntRange(min=0),
+              help='Keep improving the path with at most this many iterations of iterated local '
+                   'search')
+@click.option('--seed', default=0, show_default=True,
+              help='The seed for the random kicks of the iterated local search')
+@click.option('--target-gap', '-g', default=None, type=click.FloatRange(min=0),
+              help='Compute the Held-Karp lower bound, and stop the local search (and iterated '
+                   'local search) as soon as the path is within this relative gap of it (e.g. '
+                   '0.05 for 5%).  The bound is typically about 1% below the shortest path, so '
+                   'the gap to the shortest path is smaller')
+@click.option('--lower-bound', is_flag=True, default=False,
+              help='Compute the Held-Karp lower bound, and report the gap of the path to it')
+@click.option('--bound-iterations', default=DEFAULT_BOUND_ITERATIONS, show_default=True,
+              type=click.IntRange(min=1),
+              help='The maximum number of subgradient iterations of the lower bound, each taking '
+                   'O(n^2), if it does not stop improving before')
+@click.option('--workers', '-w', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Solve from several start cities in parallel, with this many worker processes '
+                   'sharing the distance matrix, and keep the shortest path (with --batch, solve '
+                   'this many files at once)')
+@click.option('--runs', default=None, type=click.IntRange(min=1),
+              help='The number of parallel runs, each from a different start city  '
+                   '[default: one per worker]')
+@click.option('--cluster-size', '-C', default=0, show_default=True, type=click.IntRange(min=0),
+              help='Split the cities into spatial clusters of about this many cities, solved '
+                   'independently (with --workers processes) and stitched together, without '
+                   'computing the full distance matrix (0 solves all cities at once)')
+@click.option('--decomposition', '-D', default='grid', show_default=True,
+              type=click.Choice(DECOMPOSITIONS),
+              help='How the cities are split into clusters, when --cluster-size is given')
+@click.option('--construction', '-i', default='nearest-neighbor', show_default=True,
+              type=click.Choice(CONSTRUCTIONS),
+              help='How the starting path is built, before it is improved by the local search')
+@click.option('--no-cache', is_flag=True, default=False,
+              help='Always compute the distance matrix, instead of reusing the one cached for '
+                   'the same file, metric and dtype')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIRECTORY, show_default=True,
+              envvar='TRAVELING_SALESPERSON_CACHE',
+              help='The directory of the distance matrix cache')
+@click.option('--cache-size', default=DEFAULT_CACHE_MEGABYTES, show_default=True,
+              type=click.IntRange(min=0),
+              help='The maximum size of the distance matrix cache, in MB')
+@click.option('--initial-tour', default=None,
+              help='Improve this tour (a TSPLIB .tour file, or a binary .npy file of city '
+                   'indexes) instead of a constructed starting path')
+@click.option('--resume', is_flag=True, default=False,
+              help='Improve the shortest tour stored for the same file and metric, if any, instead '
+                   'of a constructed starting path')
+@click.option('--save-tour', default=None,
+              help='Write the tour to this TSPLIB .tour file (or binary .npy file of city indexes)')
+@click.option('--no-store', is_flag=True, default=False,
+              help='Do not store the tour, which otherwise replaces the tour stored for the same '
+                   'file and metric when it is shorter')
+@click.option('--tour-dir', default=DEFAULT_TOUR_DIRECTORY, show_default=True,
+              envvar='TRAVELING_SALESPERSON_TOURS',
+              help='The directory of the tour store')
+@click.option('--batch', '-b', multiple=True,
+              help="Solve each of these files or glob patterns (e.g. 'data/*.csv', repeat for "
+                   'several) instead of --filename, without plotting, and write a line of JSON '
+                   'per file to --output as soon as it is solved')
+@click.option('--output', '-o', default='-', show_default=True,
+              help='The JSON lines file the results of --batch are written to')
+@click.option('--prefetch', default=1, show_default=True, type=click.IntRange(min=0),
+              help='With --batch and a single worker, the number of files loaded (with their '
+                   'distance matrix) while the current file is solved')
+@click.option('--no-plot', is_flag=True, default=False,
+              help='Skip plotting the path to results/, e.g. in batch jobs')
+@click.option('--plot-format', default='png', show_default=True, type=click.Choice(IMAGE_FORMATS),
+              help='The format of the plot of the path')
+@click.option('--plot-max-points', default=DEFAULT_MAX_POINTS, show_default=True,
+              type=click.IntRange(min=0),
+              help='Draw at most this many cities along the path, keeping every k-th city of '
+                   'larger paths (0 draws all cities)')
+@click.option('--background-plot', is_flag=True, default=False,
+              help='Plot the path in a separate process, while the results are reported')
+@click.option('--profile', is_flag=True, default=False,
+              help='Report the time of each phase, with the peak memory allocated while it runs '
+                   '(including the memory held from earlier phases), and the number of passes')
+@click.option('--report', default=None,
+              help='Write a JSON report of the run to this file, with the time and peak memory '
+                   '(as with --profile) of each phase, the moves evaluated and applied, and the '
+                   'path length over time')
 def main(metric: str = 'euclidean',
-         filename: str = os.path.join('data', 'djbouti38.csv'),
-         time_alg: bool = True) -> None:
+         filename: Optional[str] = None,
+         time_alg: bool = True,
+         dtype: str = 'float64',
+         matrix: Optional[str] = None,
+         matrix_layout: Optional[str] = None,
+         row_cache: int = 0,
+         packed: bool = False,
+         neighbors: int = 10,
+         strategy: str = 'best',
+         start_city: Optional[str] = None,
+         engine: str = 'segments',
+         moves: Tuple[str, ...] = ('2-opt',),
+         time_limit: Optional[float] = None,
+         max_iterations: Optional[int] = None,
+         seed: int = 0,
+         target_gap: Optional[float] = None,
+         lower_bound: bool = False,
+         bound_iterations: int = DEFAULT_BOUND_ITERATIONS,
+         workers: int = 1,
+         runs: Optional[int] = None,
+         cluster_size: int = 0,
+         decomposition: str = 'grid',
+         construction: str = 'nearest-neighbor',
+         no_cache: bool = False,
+         cache_dir: str = DEFAULT_CACHE_DIRECTORY,
+         cache_size: int = DEFAULT_CACHE_MEGABYTES,
+         initial_tour: Optional[str] = None,
+         resume: bool = False,
+         save_tour: Optional[str] = None,
+         no_store: bool = False,
+         tour_dir: str = DEFAULT_TOUR_DIRECTORY,
+         batch: Tuple[str, ...] = (),
+         output: str = '-',
+         prefetch: int = 1,
+         no_plot: bool = False,
+         plot_format: str = 'png',
+         plot_max_points: int = DEFAULT_MAX_POINTS,
+         background_plot: bool = False,
+         profile: bool = False,
+         report: Optional[str] = None) -> None:
     """Run the traveling-salesperson algorithm on the specified file and report the result
 
     Args:
         metric: the distance metric to use
-        filename: the relative path to the csv file to use
+        filename: the relative path to the csv file to use, or None for the default file (or,
+            with a matrix, for the nodes of the matrix)
         time_alg: whether or not to time the algorithm
+        dtype: the type used to store the distance matrix
+        matrix: if given, the name of the file of the precomputed distance matrix
+        matrix_layout: whether a raw binary matrix is full or upper triangular, or None to infer
+        row_cache: if positive, the number of rows of a lazily computed distance matrix to cache
+        packed: whether to only store the upper triangle of the distance matrix
+        neighbors: the number of candidate neighbors per city for 2-opt swaps, or 0 for all swaps
+        strategy: whether to apply the best or the first improving 2-opt swap
+        start_city: the name of the city to start the path from, or None for the first city
+        engine: how all 2-opt swaps are evaluated, when not restricted to candidate neighbors
+        moves: the local search moves to use
+        time_limit: if given, the number of seconds of iterated local search
+        max_iterations: if given, the maximum number of iterations of iterated local search
+        seed: the seed for the iterated local search
+        target_gap: if given, the gap to the lower bound at which to stop improving the path
+        lower_bound: whether to compute the lower bound, and report the gap to it
+        bound_iterations: the number of subgradient iterations of the lower bound
+        workers: the number of worker processes for parallel runs from different start cities
+        runs: the number of parallel runs, or None for one per worker
+        cluster_size: if positive, the number of cities per cluster of a spatial decomposition
+        decomposition: how the cities are split into clusters
+        construction: how the starting path is built
+        no_cache: whether to always compute the distance matrix, instead of using the cache
+        cache_dir: the directory of the distance matrix cache
+        cache_size: the maximum size of the distance matrix cache, in MB
+        initial_tour: if given, the name of the tour file to start from
+        resume: whether to start from the tour stored for the file and metric
+        save_tour: if given, the name of the file to write the tour to
+        no_store: whether to skip storing the tour
+        tour_dir: the directory of the tour store
+        batch: if given, the files or glob patterns to solve instead of filename
+        output: the name of the JSON lines file the results of the batch are written to
+        prefetch: the number of files of the batch loaded ahead, with a single worker
+        no_plot: whether to skip plotting the path
+        plot_format: the format of the plot of the path
+        plot_max_points: the maximum number of cities drawn along the path, or 0 for all cities
+        background_plot: whether to plot the path in a separate process
+        profile: whether to report the time and peak allocated memory of each phase
+        report: if given, the name of the file to write the JSON report of the run to
     """
 
+    if batch:
+        if (row_cache or runs is not None or cluster_size or start_city is not None
+                or initial_tour or resume or matrix):
+            raise click.UsageError('--batch cannot be combined with --row-cache, --runs, '
+                                   '--cluster-size, --start-city, --initial-tour, --resume or '
+                                   '--matrix')
+        filenames = expand_filenames(batch)
+        cache = None if no_cache else DistanceMatrixCache(cache_dir, cache_size * 2 ** 20)
+        with click.open_file(output, 'w') as file:
+            failures = solve_batch(filenames, file, workers, prefetch, metric, dtype, neighbors,
+                                   cache, packed, strategy=strategy, engine=engine, moves=moves,
+                                   time_limit=time_limit, max_iterations=max_iterations,
+                                   seed=seed, construction=construction, target_gap=target_gap,
+                                   bound_iterations=bound_iterations)
+        if failures:
+            raise click.ClickException(f'{failures} of {len(filenames)} files could not be solved')
+        return
+
+    if matrix and (row_cache or cluster_size or packed):
+        raise click.UsageError('--matrix cannot be combined with --row-cache, --cluster-size or '
+                               '--packed, which compute the distances from the coordinates (a '
+                               'triangular matrix file is already read packed)')
+    if packed and (row_cache or cluster_size):
+        raise click.UsageError('--packed cannot be combined with --row-cache or --cluster-size, '
+                               'which do not store the full distance matrix')
+    profiler = (profiling.enable(profiling.Profiler(trace_memory=True)) if profile or report
+                else None)
+
     # 1. Import the data from the named file
-    cities, scale = etl(filename)
+    with profiling.phase('etl'):
+        if matrix:
+            cities, precomputed, has_coordinates = _matrix_instance(matrix, dtype, matrix_layout,
+                                                                    filename)
+            # The distances are used as they are
+            scale = 1
+        else:
+            filename = filename or DEFAULT_FILENAME
+            cities, scale = etl(filename)
+            has_coordinates = True
+    source = matrix or filename
+    if not has_coordinates and construction == 'hilbert-curve':
+        raise click.UsageError('The hilbert-curve construction needs the coordinates of the '
+                               'cities, from --filename or the TSPLIB --matrix')
+
+    start = _city_index(cities, start_city) if start_city is not None else 0
+    parallel = workers > 1 or runs is not None
+    if parallel and row_cache:
+        raise click.UsageError('--row-cache cannot be combined with parallel runs, which share '
+                               'the full distance matrix')
+    if cluster_size:
+        if runs is not None or row_cache:
+            raise click.UsageError('--cluster-size cannot be combined with --runs or --row-cache')
+        if not neighbors:
+            raise click.UsageError('--cluster-size needs candidate neighbors (--neighbors > 0)')
+        if initial_tour or resume:
+            raise click.UsageError('--cluster-size cannot be combined with --initial-tour or '
+                                   '--resume')
+        if target_gap is not None or lower_bound:
+            raise click.UsageError('--cluster-size cannot be combined with --target-gap or '
+                                   '--lower-bound, which need the full distance matrix')
 
-    # 2. Compute the distance between all cities
-    distances = distance_matrix(cities, metric)
+    # The tour to start from, if any, instead of a constructed path
+    store = TourStore(tour_dir)
+    store_key = (store.key(source, 'matrix' if matrix else metric) if resume or not no_store
+                 else None)
+    tour = None
+    if initial_tour:
+        tour = _initial_tour(initial_tour, len(cities))
+    elif resume:
+        stored = store.get(store_key)
+        tour = stored.tour if stored is not None else None
 
-    # 3. Run the algorithm
+    statistics = SwapStatistics()
+    timings = {}
+    summaries = []
+    cache = None
+    bound = None
+    target_distance = None
     start_time = time.time() if time_alg else 0
-    path, total_distance = determine_path(cities, distances)
+    if cluster_size:
+        # 2-3. Split the cities into clusters, and solve them without the full distance matrix
+        with profiling.phase('decomposition'):
+            path, total_distance = decomposed_path(cities, cluster_size, decomposition, workers,
+                                                   metric, dtype, neighbors, strategy, moves,
+                                                   time_limit, max_iterations, start, seed,
+                                                   statistics, timings, construction)
+    else:
+        # 2. Compute the distance between all cities
+        with profiling.phase('distances'):
+            if matrix:
+                distances = precomputed
+            elif row_cache:
+                distances = LazyDistanceMatrix(cities, metric, dtype, maxsize=row_cache)
+            elif no_cache:
+                distances = distance_matrix(cities, metric, dtype, packed=packed)
+            else:
+                cache = DistanceMatrixCache(cache_dir, cache_size * 2 ** 20)
+                cache_key = cache.key(filename, metric, scale, dtype, packed)
+                distances = cache.get(cache_key)
+                if distances is None:
+                    distances = distance_matrix(cities, metric, dtype, packed=packed)
+                    cache.put(cache_key, distances)
+        with profiling.phase('neighbors'):
+            if not neighbors:
+                candidates = None
+            elif matrix:
+                candidates = matrix_nearest_neighbors(distances, neighbors)
+            else:
+                candidates = nearest_neighbors(cities, neighbors, metric)
+        if target_gap is not None or lower_bound:
+            with profiling.phase('lower_bound'):
+                bound = held_karp_bound(distances, max_iterations=bound_iterations)
+            if target_gap is not None:
+                target_distance = bound * (1 + target_gap)
+
+        # 3. Run the algorithm
+        if time_alg:
+            start_time = time.time()
+        if parallel:
+            with profiling.phase('parallel_runs'):
+                path, total_distance = multi_start_path(cities, distances, runs or workers,
+                                                        workers, start, seed, summaries,
+                                                        neighbors=candidates, strategy=strategy,
+                                                        engine=engine, moves=moves,
+                                                        time_limit=time_limit,
+                                                        max_iterations=max_iterations,
+                                                        construction=construction,
+                                                        initial_tour=tour,
+                                                        target_distance=target_distance)
+            for summary in summaries:
+                statistics.evaluated += summary.evaluated
+                statistics.applied += summary.applied
+                statistics.kicks += summary.kicks
+        else:
+            path, total_distance = determine_path(cities, distances, candidates, strategy,
+                                                  statistics, start, engine, moves, time_limit,
+                                                  max_iterations, seed, construction, tour,
+                                                  target_distance=target_distance)
     end_time = time.time() if time_alg else 0
 
-    # 4. Report the results
-    plot_path(Path(filename).stem, path, cities, total_distance)
+    # 4. Save and report the results
+    if save_tour or not no_store:
+        tour = path_indexes(path, cities)
+        if save_tour:
+            write_tour(save_tour, tour, Path(source).stem, total_distance / scale)
+        if not no_store:
+            stored = store.put(store_key, tour, total_distance / scale, Path(source).stem)
+    plot_process = None
+    if not no_plot and has_coordinates:
+        with profiling.phase('plot'):
+            plot_process = plot_path(Path(source).stem, path, cities, total_distance,
+                                     plot_format, plot_max_points or None, background_plot)
     print('Total Path Length: ', total_distance / scale)
+    if bound is not None:
+        print('Lower Bound: ', bound / scale)
+        print('Gap: ', f'{optimality_gap(total_distance, bound):.2%}')
     print('Path: ', path)
     if time_alg:
         print('Time to Run: ', np.round(end_time - start_time, 3), 's')
+        for stage, seconds in timings.items():
+            print(f'Time to {stage.capitalize()}: ', np.round(seconds, 3), 's')
+    print('Swaps Evaluated: ', statistics.evaluated)
+    print('Swaps Applied: ', statistics.applied)
+    if time_limit is not None or max_iterations is not None:
+        print('Kicks: ', statistics.kicks)
+    if row_cache:
+        print('Distance Cache: ', distances.cache_info())
+    if cache is not None:
+        print('Matrix Cache: ', 'hit' if cache.hits else 'miss')
+    if not no_store:
+        print('Tour Store: ', 'stored' if stored else 'not stored (the stored tour is as short)')
+    for summary in summaries:
+        print(f'Run {summary.run} (worker {summary.worker}): start city '
+              f'{cities[summary.start].name}, path length {summary.total_distance / scale}, '
+              f'{summary.seconds:.3f} s')
+
+    if profiler is not None:
+        profiling.disable()
+        options = dict(metric=metric, dtype=dtype, matrix=matrix, row_cache=row_cache,
+                       packed=packed, neighbors=neighbors, strategy=strategy,
+                       start_city=start_city, engine=engine, moves=list(moves),
+                       time_limit=time_limit, max_iterations=max_iterations, seed=seed,
+                       target_gap=target_gap, bound_iterations=bound_iterations,
+                       workers=workers, runs=runs, cluster_size=cluster_size,
+                       decomposition=decomposition, construction=construction)
+        _report_profile(profiler, profile, report, filename=filename, options=options,
+                        stages=timings, cities=len(cities), total_distance=total_distance / scale,
+                        scale=scale, lower_bound=bound / scale if bound is not None else None,
+                        gap=optimality_gap(total_distance, bound) if bound is not None else None,
+                        passes=statistics.passes, evaluated=statistics.evaluated,
+                        applied=statistics.applied, kicks=statistics.kicks)
+
+    if plot_process is not None:
+        plot_process.join()
+
+
+def _report_profile(profiler: profiling.Profiler,
+                    profile: bool,
+                    report: Optional[str],
+                    **fields: Any) -> None:
+    """Helper method to print the phases of the run, and/or write the JSON report"""
+    if profile:
+        for phase in profiler.phases:
+            memory = (f', peak memory {phase.peak_memory_mb:.1f} MB'
+                      if phase.peak_memory_mb is not None else '')
+            print(f'Phase {phase.name}: {phase.seconds:.3f} s{memory}')
+        print('Passes: ', fields['passes'])
+        print('Trajectory Points: ', len(profiler.trajectory))
+    if report:
+        with click.open_file(report, 'w') as file:
+            json.dump(profiler.report(**fields), file, indent=2)
+            file.write('\n')
+
+
+def _matrix_instance(matrix: str,
+                     dtype: str,
+                     layout: Optional[str],
+                     filename: Optional[str]) -> Tuple[CityTable, Any, bool]:
+    """Helper method to read a precomputed distance matrix, with the cities of the csv file (if
+    given) or else the nodes of the matrix
+
+    Returns:
+        A tuple with
+            (1) the cities to be visited
+            (2) the distance matrix
+            (3) whether the cities have coordinates, to plot the path with
+    """
+    try:
+        instance = read_matrix(matrix, dtype, layout)
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint='--matrix')
+    count = len(instance.distances)
+    if filename is not None:
+        cities, _ = etl(filename)
+        if len(cities) != count:
+            raise click.BadParameter(f'{filename} has {len(cities)} cities, but the matrix has '
+                                     f'{count} rows', param_hint='--filename')
+        return cities, instance.distances, True
+    if instance.coordinates is not None:
+        return CityTable(instance.names, instance.coordinates), instance.distances, True
+    return CityTable(instance.names, np.zeros((count, 2))), instance.distances, False
+
+
+def _initial_tour(filename: str, count: int) -> np.ndarray:
+    """Helper method to read the tour to improve, which must visit each of the cities once"""
+    try:
+        tour = read_tour(filename)
+    except (OSError, ValueError) as error:
+        raise click.BadParameter(str(error), param_hint='--initial-tour')
+    if not np.array_equal(np.sort(tour), np.arange(count)):
+        raise click.BadParameter(f'{filename} does not visit each of the {count} cities exactly '
+                                 f'once', param_hint='--initial-tour')
+    return tour
+
+
+def _city_index(cities: CityTable, name: str) -> int:
+    """Helper method to find the index of the city with the given name"""
+    for index, city_name in enumerate(city_names(cities)):
+        if str(city_name) == name:
+            return index
+    raise click.BadParameter(f'No city named {name}', param_hint='--start-city')
 
 
 if __name__ == '__main__':
@@ -1,119 +1,715 @@
 """
 Module for the nearest-neighbor w/ 2-swapping algorithm
 """
-from typing import Iterator, List, Tuple
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
-from traveling_salesperson import City
+from traveling_salesperson import City, DistanceMatrix, profiling, SwapStatistics
+from traveling_salesperson.construction import (greedy_edge_path, hilbert_curve_path,
+                                                initial_tour_path)
+from traveling_salesperson.geography import city_names, pair_distances
+from traveling_salesperson.moves import CandidateLists, local_search, MOVES
+from traveling_salesperson.perturbation import double_bridge
+from traveling_salesperson.tour import Tour
 
 
-def determine_path(cities: List[City], distance_matrix: np.ndarray) -> Tuple[List[str], int]:
+SWAP_STRATEGIES = ('best', 'first')
+SWAP_ENGINES = ('segments', 'rows')
+# All local search moves, in the order they are tried
+MOVE_SET = tuple(MOVES)
+CONSTRUCTIONS = ('nearest-neighbor', 'greedy-edge', 'hilbert-curve')
+
+
+def determine_path(cities: List[City],
+                   distance_matrix: DistanceMatrix,
+                   neighbors: Optional[np.ndarray] = None,
+                   strategy: str = 'best',
+                   statistics: Optional[SwapStatistics] = None,
+                   start: int = 0,
+                   engine: str = 'segments',
+                   moves: Sequence[str] = ('2-opt',),
+                   time_limit: Optional[float] = None,
+                   max_iterations: Optional[int] = None,
+                   seed: int = 0,
+                   construction: str = 'nearest-neighbor',
+                   initial_tour: Optional[Sequence[int]] = None,
+                   target_distance: Optional[float] = None) -> Tuple[List[str], int]:
     """Determine the close-to-optimal path for the given list of Cities
 
     Args:
         cities: A list of cities to be visited visit
         distance_matrix: A symmetric matrix of distances between cities.  The i and j indexes
-            correspond to the index in the original list of cities
+            correspond to the index in the original list of cities.  Any object with rows indexed
+            as distance_matrix[i][j] can be used, e.g. a geography.LazyDistanceMatrix
+        neighbors: The candidate neighbors of each city (see geography.nearest_neighbors), which
+            restrict the 2-opt swaps that are considered.  If None, all swaps are considered.
+        strategy: Whether to apply the 'best' swap of each pass, or the 'first' improving swap
+            found (see two_node_swap_optimization)
+        statistics: If given, updated with the number of swaps evaluated and applied
+        start: The index of the city to start the path from
+        engine: How all swaps are evaluated when there are no candidate neighbors (see
+            two_node_swap_optimization)
+        moves: The local search moves (see moves.MOVES).  Moves other than 2-opt are chained
+            with the 2-opt swaps, once no further improvement can be found by swapping alone.
+        time_limit: If given, keep improving the path with iterated local search for this many
+            seconds (see iterated_local_search)
+        max_iterations: If given, keep improving the path with at most this many iterations of
+            iterated local search
+        seed: The seed for the random kicks of the iterated local search
+        construction: How the starting path is built, before it is improved by the local search
+            (see construct_path)
+        initial_tour: If given, the indexes of the cities in the order of a previously found
+            tour, which is improved instead of a constructed path
+        target_distance: If given, stop improving the path (with the local search and the
+            iterated local search) as soon as it is no longer than this, e.g. within a target gap
+            of a lower bound (see bound.held_karp_bound)
     Returns:
         A tuple with
             (1) the list of city names, reordered to have a near-optimal (shortest) path
             (2) the total path length
     """
-    path, total_distance = nearest_neighbor_path_with_swapping(len(cities), distance_matrix)
-    total_distance += distance_matrix[path[-1]][path[0]]
+    with profiling.phase('construction'):
+        path, total_distance = construct_path(cities, distance_matrix, construction, neighbors,
+                                              start, initial_tour)
+    with profiling.phase('local_search'):
+        path, total_distance = swap_and_move_optimization(path, distance_matrix, total_distance,
+                                                          neighbors, strategy, statistics,
+                                                          engine, moves, target_distance)
+    if time_limit is not None or max_iterations is not None:
+        with profiling.phase('iterated_local_search'):
+            path, total_distance = iterated_local_search(path, distance_matrix, total_distance,
+                                                         neighbors, moves, time_limit,
+                                                         max_iterations, seed, statistics,
+                                                         target_distance)
+    total_distance += int(distance_matrix[path[-1]][path[0]])
+    path = rotate_path(path, start)
 
+    names = city_names(cities)
     cities_to_visit = []
     for i in path:
-        cities_to_visit.append(cities[i].name)
+        cities_to_visit.append(names[i])
 
     return cities_to_visit, total_distance
 
 
-def nearest_neighbor_path(nodes: int, distance_matrix: np.ndarray) -> Tuple[List[int], int]:
+def nearest_neighbor_path(nodes: int,
+                          distance_matrix: DistanceMatrix,
+                          start: int = 0,
+                          neighbors: Optional[np.ndarray] = None) -> Tuple[List[int], int]:
     """Determine the nearest neighbor path for a list of cities
 
     Args:
         nodes: The number of nodes (cities) that need to be visited
         distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
             correspond to the index in the original list of cities
+        start: The node to start the path from
+        neighbors: If given, the candidate neighbors of each node, nearest first (see
+            geography.nearest_neighbors).  The nearest node not visited yet is then found among
+            the candidates when it can be, rather than by scanning a whole row of the matrix,
+            which leads to the same path.
     Returns:
         A tuple with
             (1) the path according to the nearest neighbor algorithm
             (2) the total path length
     """
+    visited = np.zeros(nodes, dtype=bool)
+    visited[start] = True
+    if neighbors is not None and neighbors.shape[1]:
+        return _nearest_neighbor_path_from_candidates(
+            distance_matrix, CandidateLists(distance_matrix, neighbors), visited, start)
+    path = [start]
+    total_distance = 0
+    while len(path) < nodes:
+        distances = distance_matrix[path[-1]]
+        next_index = int(np.argmin(np.where(visited, np.inf, distances)))
+        visited[next_index] = True
+        path.append(next_index)
+        total_distance += int(distances[next_index])
+    return path, total_distance
 
-    def _nearest_index(_path: List[int], _distances: List[int]) -> int:
-        """Helper method to determine the index of the next node to visit,
-        that has not already been visited"""
-        for _index in np.argsort(_distances):
-            if _index not in _path:
-                return _index
-        raise IndexError
 
-    path = [0]
+def _nearest_neighbor_path_from_candidates(distance_matrix: DistanceMatrix,
+                                           candidates: CandidateLists,
+                                           visited: np.ndarray,
+                                           start: int) -> Tuple[List[int], int]:
+    """Helper method to extend a nearest neighbor path, looking for the nearest node not visited
+    yet among the candidates of the last node first.  Only when it is not found there are the
+    distances to the nodes not visited yet looked up, fewer and fewer of them as the path grows,
+    rather than a whole row of the distance matrix."""
+    path = [start]
     total_distance = 0
-    while len(path) < nodes:
-        current_index = path[-1]
-        distances = distance_matrix[current_index]
-        try:
-            next_index = _nearest_index(path, distances)
-            path.append(next_index)
-            total_distance += distances[next_index]
-        except IndexError:
-            break
+    is_visited = bytearray(visited.tobytes())
+    unvisited = np.nonzero(~visited)[0]
+    while len(path) < len(visited):
+        nearest = _nearest_candidate(path[-1], candidates, is_visited)
+        if nearest is None:
+            unvisited = unvisited[~visited[unvisited]]
+            distances = pair_distances(distance_matrix, np.full(len(unvisited), path[-1]),
+                                       unvisited)
+            position = int(np.argmin(distances))
+            nearest = int(unvisited[position]), distances[position]
+        next_index, distance = nearest
+        visited[next_index] = is_visited[next_index] = True
+        path.append(next_index)
+        total_distance += int(distance)
     return path, total_distance
 
 
+def _nearest_candidate(node: int,
+                       candidates: CandidateLists,
+                       is_visited: bytearray) -> Optional[Tuple[int, int]]:
+    """Helper method to find the nearest node not visited yet among the candidates of a node,
+    breaking ties by the lowest index like a scan of its row would.  It can only be found if it is
+    strictly nearer than the farthest candidate, as other nodes may be just as near otherwise.
+
+    Returns:
+        The nearest node not visited yet and the distance to it, or None if it is not found
+    """
+    nearest, nearest_distance = None, None
+    node_distances = candidates.distances[node]
+    for candidate, distance in zip(candidates.nodes[node], node_distances):
+        if nearest is not None and distance > nearest_distance:
+            break
+        if not is_visited[candidate] and (nearest is None or candidate < nearest):
+            nearest, nearest_distance = candidate, distance
+    if nearest is None or nearest_distance >= node_distances[-1]:
+        return None
+    return nearest, nearest_distance
+
+
 def nearest_neighbor_path_with_swapping(nodes: int,
-                                        distance_matrix: np.ndarray) -> Tuple[List[int], int]:
+                                        distance_matrix: DistanceMatrix,
+                                        neighbors: Optional[np.ndarray] = None,
+                                        strategy: str = 'best',
+                                        statistics: Optional[SwapStatistics] = None,
+                                        start: int = 0,
+                                        engine: str = 'segments',
+                                        moves: Sequence[str] = ('2-opt',)
+                                        ) -> Tuple[List[int], int]:
     """Determine the nearest neighbor path, after 2-opt swapping for a list of cities
 
     Args:
         nodes: The number of nodes (cities) that need to be visited
         distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
             correspond to the index in the original list of cities
+        neighbors: The candidate neighbors of each node, or None to consider all swaps
+        strategy: Whether to apply the 'best' or the 'first' improving swap
+        statistics: If given, updated with the number of swaps evaluated and applied
+        start: The node to start the nearest neighbor path from
+        engine: How all swaps are evaluated, either 'segments' or 'rows'
+        moves: The local search moves, chained with the 2-opt swaps (see move_optimization)
     Returns:
         A tuple with
             (1) the path according to the nearest neighbor algorithm, with swapping
             (2) the total path length
     """
-    path, total_distance = nearest_neighbor_path(nodes, distance_matrix)
-    path, total_distance = two_node_swap_optimization(path, distance_matrix, total_distance)
+    path, total_distance = nearest_neighbor_path(nodes, distance_matrix, start, neighbors)
+    return swap_and_move_optimization(path, distance_matrix, total_distance, neighbors, strategy,
+                                      statistics, engine, moves)
+
+
+def construct_path(cities: List[City],
+                   distance_matrix: DistanceMatrix,
+                   construction: str = 'nearest-neighbor',
+                   neighbors: Optional[np.ndarray] = None,
+                   start: int = 0,
+                   tour: Optional[Sequence[int]] = None) -> Tuple[List[int], int]:
+    """Build a starting path with the named construction, unless a tour is given to start from:
+
+        'nearest-neighbor': always visit the closest city not visited yet (see
+            nearest_neighbor_path)
+        'greedy-edge': match the shortest edges first (see construction.greedy_edge_path)
+        'hilbert-curve': visit the cities along a space-filling curve, without looking up any
+            distances (see construction.hilbert_curve_path)
+
+    Args:
+        cities: A list of cities to be visited
+        distance_matrix: A symmetric matrix of distances between cities
+        construction: The name of the construction
+        neighbors: The candidate neighbors of each city, whose edges the greedy edge matching is
+            restricted to (or None for all edges), and among which the nearest neighbor path
+            looks for the nearest city first
+        start: The city the nearest neighbor path starts from
+        tour: If given, the path to start from instead (see construction.initial_tour_path)
+    Returns:
+        A tuple with
+            (1) the starting path
+            (2) the total path length
+    Raises:
+        ValueError: if the construction is unknown, or the tour does not visit every city once
+    """
+    if tour is not None:
+        return initial_tour_path(tour, distance_matrix)
+    if construction == 'nearest-neighbor':
+        return nearest_neighbor_path(len(cities), distance_matrix, start, neighbors)
+    if construction == 'greedy-edge':
+        return greedy_edge_path(cities, distance_matrix, neighbors)
+    if construction == 'hilbert-curve':
+        return hilbert_curve_path(cities, distance_matrix)
+    raise ValueError(f'Unknown construction: {construction}')
+
+
+def swap_and_move_optimization(path: Union[List[int], Tour],
+                               distance_matrix: DistanceMatrix,
+                               total_distance: int,
+                               neighbors: Optional[np.ndarray] = None,
+                               strategy: str = 'best',
+                               statistics: Optional[SwapStatistics] = None,
+                               engine: str = 'segments',
+                               moves: Sequence[str] = ('2-opt',),
+                               target_distance: Optional[float] = None) -> Tuple[List[int], int]:
+    """Improve a starting path with 2-opt swapping (see two_node_swap_optimization), and then
+    with the other local search moves, if any (see move_optimization)
+
+    Args:
+        path: The starting path
+        distance_matrix: A symmetric matrix of distances between nodes
+        total_distance: the total length of the starting path
+        neighbors: The candidate neighbors of each node, or None to consider all swaps
+        strategy: Whether to apply the 'best' or the 'first' improving swap
+        statistics: If given, updated with the number of swaps evaluated and applied
+        engine: How all swaps are evaluated, either 'segments' or 'rows'
+        moves: The local search moves, chained with the 2-opt swaps
+        target_distance: If given, stop as soon as the closed path is no longer than this
+    Returns:
+        A tuple with
+            (1) the optimized path
+            (2) the total path length
+    """
+    path, total_distance = two_node_swap_optimization(path, distance_matrix, total_distance,
+                                                      neighbors, strategy, statistics, engine,
+                                                      target_distance)
+    if (any(move != '2-opt' for move in moves)
+            and not _reached(total_distance + closing_distance(path, distance_matrix),
+                             target_distance)):
+        path, total_distance = move_optimization(path, distance_matrix, total_distance,
+                                                 neighbors, moves, statistics, target_distance)
     return path, total_distance
 
 
-def two_node_swap_optimization(path: List[int],
-                               distance_matrix: np.ndarray,
-                               total_distance: int) -> Tuple[List[int], int]:
-    """Try swapping segments until no further improvement can be found
+def two_node_swap_optimization(path: Union[List[int], Tour],
+                               distance_matrix: DistanceMatrix,
+                               total_distance: int,
+                               neighbors: Optional[np.ndarray] = None,
+                               strategy: str = 'best',
+                               statistics: Optional[SwapStatistics] = None,
+                               engine: str = 'segments',
+                               target_distance: Optional[float] = None) -> Tuple[List[int], int]:
+    """Try swapping segments until no further improvement can be found (or the path is short
+    enough)
+
+    With the 'best' strategy, every pass evaluates all swaps and applies the best one.  With the
+    'first' strategy, the first improving swap found is applied right away, and a node is only
+    revisited when one of its edges changes (see first_improvement_swap_optimization).
+
+    Without candidate neighbors, the 'best' swap of each pass is found by the chosen engine:
+    either one swap at a time, from path_segments ('segments'), or all swaps of each node at once,
+    from rows of the distance matrix ('rows').  Both find the same swap.
 
     Args:
-        path: The starting path we want to optimize through swapping
+        path: The starting path we want to optimize through swapping, as a list or a Tour (which
+            is modified in place)
         distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
             correspond to the index in the original list of cities
         total_distance: the total length of the sarting path
+        neighbors: The candidate neighbors of each node.  If given, only swaps that connect a
+            node to one of its candidates are considered, otherwise all swaps are considered.
+        strategy: Whether to apply the 'best' or the 'first' improving swap
+        statistics: If given, updated with the number of swaps evaluated and applied
+        engine: How all swaps are evaluated, either 'segments' or 'rows'
+        target_distance: If given, stop as soon as the closed path is no longer than this
     Returns:
         A tuple with
             (1) a path optimized with the 2-opt algorithm
             (2) the total path length
     """
-    while True:
+    if strategy not in SWAP_STRATEGIES:
+        raise ValueError(f'Unknown swap strategy: {strategy}')
+    if engine not in SWAP_ENGINES:
+        raise ValueError(f'Unknown swap engine: {engine}')
+    statistics = statistics if statistics is not None else SwapStatistics()
+    if strategy == 'first':
+        return first_improvement_swap_optimization(path, distance_matrix, total_distance,
+                                                   neighbors, statistics, target_distance)
+    if neighbors is not None:
+        return neighbor_list_swap_optimization(path, distance_matrix, total_distance, neighbors,
+                                               statistics, target_distance)
+
+    find_best_swap = best_swap_from_segments if engine == 'segments' else best_swap_from_rows
+    tour = as_tour(path)
+    total_distance += closing_distance(tour, distance_matrix)
+    profiling.record(total_distance)
+    while not _reached(total_distance, target_distance):
+        best_swap = find_best_swap(tour, distance_matrix, statistics)
+        statistics.passes += 1
+        if best_swap[0] < 0:
+            apply_swap(tour, *best_swap[1])
+            total_distance += best_swap[0]
+            statistics.applied += 1
+            profiling.record(total_distance)
+        else:
+            break
+
+    return tour.to_list(), total_distance - closing_distance(tour, distance_matrix)
+
+
+def iterated_local_search(path: Union[List[int], Tour],
+                          distance_matrix: DistanceMatrix,
+                          total_distance: int,
+                          neighbors: Optional[np.ndarray] = None,
+                          moves: Sequence[str] = ('2-opt',),
+                          time_limit: Optional[float] = None,
+                          max_iterations: Optional[int] = None,
+                          seed: int = 0,
+                          statistics: Optional[SwapStatistics] = None,
+                          target_distance: Optional[float] = None) -> Tuple[List[int], int]:
+    """Keep improving a path, once at a local optimum, by perturbing it with a random
+    double-bridge kick and repairing it with local search (starting only from the nodes around the
+    kick), until the time limit or the maximum number of iterations (or the target distance) is
+    reached.  A kicked path is kept if it is no longer than the best one, otherwise the best path
+    is restored.
+
+    For a given seed, the result is deterministic when stopping after max_iterations; with a time
+    limit, it also depends on how many iterations fit in the time.
+
+    Args:
+        path: The starting path we want to optimize, as a list or a Tour (which is modified in
+            place)
+        distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
+            correspond to the index in the original list of cities
+        total_distance: the total length of the starting path
+        neighbors: An n x k array with the candidate neighbors of each node, nearest first.  If
+            None, every other node is a candidate.
+        moves: The names of the local search moves (see moves.MOVES)
+        time_limit: The number of seconds to keep iterating, or None for no limit
+        max_iterations: The maximum number of kicks, or None for no limit
+        seed: The seed for the random kicks
+        statistics: If given, updated with the number of moves evaluated and applied, and kicks
+        target_distance: If given, stop as soon as the closed path is no longer than this
+    Returns:
+        A tuple with
+            (1) the best path found
+            (2) the total path length
+    Raises:
+        ValueError: if neither a time limit nor a maximum number of iterations is given
+    """
+    if time_limit is None and max_iterations is None:
+        raise ValueError('Iterated local search needs a time limit or a maximum number of '
+                         'iterations')
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    statistics = statistics if statistics is not None else SwapStatistics()
+    if neighbors is None:
+        neighbors = _all_neighbors(distance_matrix, len(path))
+    candidates = CandidateLists(distance_matrix, neighbors)
+    random = np.random.RandomState(seed)
+
+    tour = as_tour(path)
+    total_distance += closing_distance(tour, distance_matrix)
+    total_distance += local_search(tour, distance_matrix, candidates, moves, statistics,
+                                   target_delta=_target_delta(total_distance, target_distance))
+    best_distance, best_tour = total_distance, tour.copy()
+    profiling.record(best_distance)
+
+    iteration = 0
+    while ((max_iterations is None or iteration < max_iterations)
+           and (deadline is None or time.perf_counter() < deadline)
+           and not _reached(best_distance, target_distance)):
+        iteration += 1
+        statistics.kicks += 1
+        delta, kicked_nodes = double_bridge(tour, distance_matrix, random)
+        total_distance += delta
+        total_distance += local_search(tour, distance_matrix, candidates, moves, statistics,
+                                       kicked_nodes)
+        if total_distance <= best_distance:
+            if total_distance < best_distance:
+                profiling.record(total_distance)
+            best_distance, best_tour = total_distance, tour.copy()
+        else:
+            total_distance = best_distance
+            tour.order[:] = best_tour.order
+            tour.positions[:] = best_tour.positions
+
+    return tour.to_list(), total_distance - closing_distance(tour, distance_matrix)
+
+
+def best_swap_from_segments(tour: Tour,
+                            distance_matrix: DistanceMatrix,
+                            statistics: Optional[SwapStatistics] = None
+                            ) -> Tuple[int, Optional[Tuple[int, int]]]:
+    """Find the best swap by evaluating every segment from path_segments, one at a time
+
+    Args:
+        tour: The current path
+        distance_matrix: A symmetric matrix of distances between nodes
+        statistics: If given, updated with the number of swaps evaluated
+    Returns:
+        A tuple with
+            (1) the (negative) change in path length from the best swap, or 0 if none improves it
+            (2) the segment (i, j) to swap, or None
+    """
+    statistics = statistics if statistics is not None else SwapStatistics()
+    best_swap = (0, None)
+    for segment in path_segments(segment=[],
+                                 start=0, end=len(tour)-1,
+                                 segment_length=2):
+        delta = delta_if_better_path_from_swap(tour, distance_matrix, *segment)
+        statistics.evaluated += 1
+        if delta < best_swap[0]:
+            best_swap = (delta, segment)
+    return best_swap
+
+
+def best_swap_from_rows(tour: Tour,
+                        distance_matrix: DistanceMatrix,
+                        statistics: Optional[SwapStatistics] = None
+                        ) -> Tuple[int, Optional[Tuple[int, int]]]:
+    """Find the best swap by evaluating, for each i, the swaps with every j at once.  The swaps
+    and their order are the same as in best_swap_from_segments, but the distances are looked up
+    from two rows of the distance matrix with fancy indexing.
+
+    Args:
+        tour: The current path
+        distance_matrix: A symmetric matrix of distances between nodes
+        statistics: If given, updated with the number of swaps evaluated
+    Returns:
+        A tuple with
+            (1) the (negative) change in path length from the best swap, or 0 if none improves it
+            (2) the segment (i, j) to swap, or None
+    """
+    statistics = statistics if statistics is not None else SwapStatistics()
+    order = tour.order
+    following = np.roll(order, -1)
+    edge_distances = pair_distances(distance_matrix, order, following)
+
+    best_swap = (0, None)
+    for i in range(len(order) - 2):
+        i_row = np.asarray(distance_matrix[order[i]])
+        i_next_row = np.asarray(distance_matrix[following[i]])
+        deltas = (i_row[order[i + 2:]].astype(np.int64)
+                  + i_next_row[following[i + 2:]]
+                  - edge_distances[i]
+                  - edge_distances[i + 2:])
+        statistics.evaluated += deltas.size
+        best = np.argmin(deltas)
+        if deltas[best] < best_swap[0]:
+            best_swap = (int(deltas[best]), (i, i + 2 + int(best)))
+    return best_swap
+
+
+def neighbor_list_swap_optimization(path: Union[List[int], Tour],
+                                    distance_matrix: DistanceMatrix,
+                                    total_distance: int,
+                                    neighbors: np.ndarray,
+                                    statistics: Optional[SwapStatistics] = None,
+                                    target_distance: Optional[float] = None
+                                    ) -> Tuple[List[int], int]:
+    """Try swapping segments, restricted to those that connect a node to one of its candidate
+    neighbors, until no further improvement can be found (or the path is short enough).
+
+    A swap removes the edges leaving two nodes, a and c, in the same direction and connects a to
+    c.  Since the candidates are ordered by distance, it only needs to be evaluated when c is
+    closer to a than the node a is currently connected to.  Every pass evaluates all such swaps
+    at once, and applies the best one.
+
+    Args:
+        path: The starting path we want to optimize through swapping, as a list or a Tour (which
+            is modified in place)
+        distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
+            correspond to the index in the original list of cities
+        total_distance: the total length of the starting path
+        neighbors: An n x k array with the candidate neighbors of each node, nearest first
+        statistics: If given, updated with the number of swaps evaluated and applied
+        target_distance: If given, stop as soon as the closed path is no longer than this
+    Returns:
+        A tuple with
+            (1) a path optimized with the 2-opt algorithm
+            (2) the total path length
+    """
+    statistics = statistics if statistics is not None else SwapStatistics()
+    tour = as_tour(path)
+    total_distance += closing_distance(tour, distance_matrix)
+    nodes = np.arange(len(tour))
+    neighbor_distances = pair_distances(distance_matrix,
+                                        np.repeat(nodes, neighbors.shape[1]),
+                                        neighbors.ravel()).reshape(neighbors.shape)
+    profiling.record(total_distance)
+
+    while not _reached(total_distance, target_distance):
+        statistics.passes += 1
         best_swap = (0, None)
-        for segment in path_segments(segment=[],
-                                     start=0, end=len(path)-1,
-                                     segment_length=2):
-            delta = delta_if_better_path_from_swap(path, distance_matrix, *segment)
-            if delta < best_swap[0]:
-                best_swap = (delta, segment)
+        # Swaps of the edges following (offset 1) and preceding (offset -1) two nodes
+        for offset in (1, -1):
+            adjacent = tour.order[(tour.positions + offset) % len(tour)]
+            adjacent_distances = pair_distances(distance_matrix, nodes, adjacent)
+            origins, ranks = np.nonzero(neighbor_distances < adjacent_distances[:, np.newaxis])
+            if not origins.size:
+                continue
+            candidates = neighbors[origins, ranks]
+            deltas = (neighbor_distances[origins, ranks]
+                      + pair_distances(distance_matrix, adjacent[origins], adjacent[candidates])
+                      - adjacent_distances[origins]
+                      - adjacent_distances[candidates])
+            statistics.evaluated += deltas.size
+            best = np.argmin(deltas)
+            if deltas[best] < best_swap[0]:
+                i, j = sorted((tour.positions[origins[best]], tour.positions[candidates[best]]))
+                if offset == -1:
+                    i, j = i - 1, j - 1
+                best_swap = (int(deltas[best]), (i, j))
         if best_swap[0] < 0:
-            i, j = best_swap[1]
-            path[i + 1:j + 1] = reversed(path[i + 1:j + 1])
+            apply_swap(tour, *best_swap[1])
             total_distance += best_swap[0]
+            statistics.applied += 1
+            profiling.record(total_distance)
         else:
             break
 
-    return path, total_distance
+    return tour.to_list(), total_distance - closing_distance(tour, distance_matrix)
+
+
+def first_improvement_swap_optimization(path: Union[List[int], Tour],
+                                        distance_matrix: DistanceMatrix,
+                                        total_distance: int,
+                                        neighbors: Optional[np.ndarray] = None,
+                                        statistics: Optional[SwapStatistics] = None,
+                                        target_distance: Optional[float] = None
+                                        ) -> Tuple[List[int], int]:
+    """Try swapping segments, applying the first improving swap found, until no further
+    improvement can be found (or the path is short enough).
+
+    Nodes wait in a queue to be examined.  A node whose swaps do not improve the path is dropped
+    from the queue (its "don't-look bit" is set), and is only queued again when one of its edges
+    is changed by a later swap.
+
+    Args:
+        path: The starting path we want to optimize through swapping, as a list or a Tour (which
+            is modified in place)
+        distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
+            correspond to the index in the original list of cities
+        total_distance: the total length of the starting path
+        neighbors: An n x k array with the candidate neighbors of each node, nearest first.  If
+            None, every other node is a candidate.
+        statistics: If given, updated with the number of swaps evaluated and applied
+        target_distance: If given, stop as soon as the closed path is no longer than this
+    Returns:
+        A tuple with
+            (1) a path optimized with the 2-opt algorithm
+            (2) the total path length
+    """
+    return move_optimization(path, distance_matrix, total_distance, neighbors, ('2-opt',),
+                             statistics, target_distance)
+
+
+def move_optimization(path: Union[List[int], Tour],
+                      distance_matrix: DistanceMatrix,
+                      total_distance: int,
+                      neighbors: Optional[np.ndarray] = None,
+                      moves: Sequence[str] = MOVE_SET,
+                      statistics: Optional[SwapStatistics] = None,
+                      target_distance: Optional[float] = None) -> Tuple[List[int], int]:
+    """Apply the first improving move found, out of the given moves (see moves.local_search),
+    until no further improvement can be found (or the path is short enough).
+
+    Args:
+        path: The starting path we want to optimize, as a list or a Tour (which is modified in
+            place)
+        distance_matrix: A symmetric matrix of distances between nodes.  The i and j indexes
+            correspond to the index in the original list of cities
+        total_distance: the total length of the starting path
+        neighbors: An n x k array with the candidate neighbors of each node, nearest first.  If
+            None, every other node is a candidate.
+        moves: The names of the moves to try, in order (see moves.MOVES)
+        statistics: If given, updated with the number of moves evaluated and applied
+        target_distance: If given, stop as soon as the closed path is no longer than this
+    Returns:
+        A tuple with
+            (1) the optimized path
+            (2) the total path length
+    """
+    statistics = statistics if statistics is not None else SwapStatistics()
+    if neighbors is None:
+        neighbors = _all_neighbors(distance_matrix, len(path))
+    tour = as_tour(path)
+    total_distance += closing_distance(tour, distance_matrix)
+    profiling.record(total_distance)
+    total_distance += local_search(tour, distance_matrix,
+                                   CandidateLists(distance_matrix, neighbors),
+                                   moves, statistics,
+                                   target_delta=_target_delta(total_distance, target_distance))
+    statistics.passes += 1
+    profiling.record(total_distance)
+    return tour.to_list(), total_distance - closing_distance(tour, distance_matrix)
+
+
+def _reached(total_distance: int, target_distance: Optional[float]) -> bool:
+    """Helper method to tell whether the closed path is no longer than the target distance"""
+    return target_distance is not None and total_distance <= target_distance
+
+
+def _target_delta(total_distance: int, target_distance: Optional[float]) -> Optional[float]:
+    """Helper method for the change in length of the closed path that reaches the target
+    distance, if any"""
+    return target_distance - total_distance if target_distance is not None else None
+
+
+def _all_neighbors(distance_matrix: DistanceMatrix, nodes: int) -> np.ndarray:
+    """Helper method to list every other node as a candidate neighbor, nearest first"""
+    order = np.argsort([distance_matrix[i] for i in range(nodes)], axis=1, kind='stable')
+    not_self = order != np.arange(nodes)[:, np.newaxis]
+    return order[not_self].reshape(nodes, nodes - 1)
+
+
+def as_tour(path: Union[List[int], Tour]) -> Tour:
+    """Use the given Tour as is, or build one from the given list of nodes
+
+    Args:
+        path: A path visiting every node once
+    Returns:
+        A Tour of the path
+    """
+    return path if isinstance(path, Tour) else Tour(path)
+
+
+def apply_swap(tour: Tour, i: int, j: int) -> None:
+    """Swap two nodes of the tour (see delta_if_better_path_from_swap), i.e. reverse the nodes in
+    between them
+
+    Args:
+        tour: The tour to modify in place
+        i: the position of the first node to swap
+        j: the position of the second node to swap
+    """
+    tour.reverse(i + 1, j)
+
+
+def closing_distance(path: Union[List[int], Tour], distance_matrix: DistanceMatrix) -> int:
+    """The length of the edge from the last node of the path back to the first one
+
+    The swaps are evaluated on the closed path, so the optimization routines add this edge to
+    the (open) path length while swapping, and remove the final one afterwards.
+
+    Args:
+        path: A path visiting every node once
+        distance_matrix: A symmetric matrix of distances between nodes
+    Returns:
+        The distance between the last and the first node
+    """
+    return int(distance_matrix[path[len(path) - 1]][path[0]])
+
+
+def rotate_path(path: List[int], start: int) -> List[int]:
+    """Rotate a (closed) path so that it begins with the given node, without changing its length
+
+    Args:
+        path: A path visiting every node once
+        start: The node the path should begin with
+    Returns:
+        The rotated path
+    """
+    start_position = path.index(start)
+    return path[start_position:] + path[:start_position]
 
 
 def path_segments(segment: List[int],
@@ -146,8 +742,8 @@ def path_segments(segment: List[int],
             yield from path_segments(new_segment, i + 2, end + last, segment_length - 1)
 
 
-def delta_if_better_path_from_swap(path: List[int],
-                                   distance_matrix: np.ndarray,
+def delta_if_better_path_from_swap(path: Union[List[int], Tour],
+                                   distance_matrix: DistanceMatrix,
                                    i: int, j: int) -> int:
     """Determine if a shorter path can be achieved by swapping two nodes
 
@@ -166,8 +762,8 @@ def delta_if_better_path_from_swap(path: List[int],
     i_next_node = path[i+1]
     j_node = path[j]
     j_next_node = path[(j+1) % len(path)]
-    current_distance = (distance_matrix[i_node][i_next_node]
-                        + distance_matrix[j_node][j_next_node])
-    swapped_distance = (distance_matrix[i_node][j_node]
-                        + distance_matrix[i_next_node][j_next_node])
+    current_distance = (int(distance_matrix[i_node][i_next_node])
+                        + int(distance_matrix[j_node][j_next_node]))
+    swapped_distance = (int(distance_matrix[i_node][j_node])
+                        + int(distance_matrix[i_next_node][j_next_node]))
     return min(0, swapped_distance - current_distance)
@@ -0,0 +1,210 @@
+"""
+Module for solving many instances in one run, loading the next instances while the current ones
+are solved, and streaming the results as JSON lines
+"""
+from collections import deque, namedtuple
+from concurrent.futures import as_completed, ProcessPoolExecutor, ThreadPoolExecutor
+import glob
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Union
+
+import numpy as np
+
+from traveling_salesperson import SwapStatistics
+from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson.bound import DEFAULT_BOUND_ITERATIONS, held_karp_bound, optimality_gap
+from traveling_salesperson.cache import DistanceMatrixCache
+from traveling_salesperson.etl import etl
+from traveling_salesperson.geography import distance_matrix, nearest_neighbors
+
+
+Instance = namedtuple('Instance', 'filename cities scale distances candidates timings')
+
+
+def expand_filenames(patterns: Sequence[str]) -> List[str]:
+    """The files named by each pattern, in order and without duplicates.
+
+    Args:
+        patterns: File names, or glob patterns (e.g. data/*.csv) whose matches are sorted.  A
+            pattern without matches is kept as is, so that it is reported as a missing file.
+    Returns:
+        The names of the files
+    """
+    filenames = []
+    for pattern in patterns:
+        filenames.extend(sorted(glob.glob(pattern)) or [pattern])
+    return list(dict.fromkeys(filenames))
+
+
+def load_instance(filename: str,
+                  metric: str = 'euclidean',
+                  dtype: np.dtype = np.float64,
+                  neighbors: int = 10,
+                  cache: Optional[DistanceMatrixCache] = None,
+                  packed: bool = False) -> Instance:
+    """Load the cities of a file, with their distance matrix and candidate neighbors, timing each
+    step.
+
+    Args:
+        filename: The name of the csv file of the cities
+        metric: The name of the distance metric to use
+        dtype: The type used to store the distance matrix
+        neighbors: The number of candidate neighbors of each city, or 0 for none
+        cache: If given, the cache the distance matrix is read from (or stored in)
+        packed: Whether to only store the upper triangle of the distance matrix
+    Returns:
+        The instance, with the number of seconds taken by each step (etl, distances, neighbors)
+    """
+    timings = {}
+    start_time = time.perf_counter()
+    cities, scale = etl(filename)
+    timings['etl'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    key = cache.key(filename, metric, scale, dtype, packed) if cache is not None else None
+    distances = cache.get(key) if cache is not None else None
+    if distances is None:
+        distances = distance_matrix(cities, metric, dtype, packed=packed)
+        if cache is not None:
+            cache.put(key, distances)
+    timings['distances'] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    candidates = nearest_neighbors(cities, neighbors, metric) if neighbors else None
+    timings['neighbors'] = time.perf_counter() - start_time
+    return Instance(filename, cities, scale, distances, candidates, timings)
+
+
+def solve_instance(instance: Instance,
+                   target_gap: Optional[float] = None,
+                   bound_iterations: int = DEFAULT_BOUND_ITERATIONS,
+                   **options: Any) -> Dict[str, Any]:
+    """Determine the close-to-optimal path of a loaded instance.
+
+    Args:
+        instance: The instance (see load_instance)
+        target_gap: If given, compute the lower bound of the instance (see
+            bound.held_karp_bound), and stop improving the path once within this gap of it
+        bound_iterations: The number of subgradient iterations of the lower bound
+        options: The options of determine_path (strategy, engine, moves, time_limit,
+            max_iterations, seed and construction)
+    Returns:
+        The (JSON serializable) result: the file name, number of cities, path length, path,
+            the number of seconds taken by each step and the number of swaps evaluated and applied
+            (and, with a target gap, the lower bound and the gap to it)
+    """
+    statistics = SwapStatistics()
+    timings = dict(instance.timings)
+    bound = None
+    if target_gap is not None:
+        start_time = time.perf_counter()
+        bound = held_karp_bound(instance.distances, max_iterations=bound_iterations)
+        options = dict(options, target_distance=bound * (1 + target_gap))
+        timings['lower_bound'] = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    path, total_distance = determine_path(instance.cities, instance.distances,
+                                          instance.candidates, statistics=statistics, **options)
+    timings['solve'] = time.perf_counter() - start_time
+    result = dict(filename=instance.filename, cities=len(instance.cities),
+                  total_distance=float(total_distance / instance.scale), path=path,
+                  timings=timings, evaluated=statistics.evaluated, applied=statistics.applied)
+    if bound is not None:
+        result.update(lower_bound=float(bound / instance.scale),
+                      gap=optimality_gap(total_distance, bound))
+    return result
+
+
+def solve_batch(filenames: Sequence[str],
+                output: TextIO,
+                workers: int = 1,
+                prefetch: int = 1,
+                metric: str = 'euclidean',
+                dtype: np.dtype = np.float64,
+                neighbors: int = 10,
+                cache: Optional[DistanceMatrixCache] = None,
+                packed: bool = False,
+                **options: Any) -> int:
+    """Solve each file, and write each result to the output as a line of JSON as soon as it is
+    found.  A file that cannot be loaded is reported with an 'error' instead, and the batch goes
+    on.
+
+    With a single worker, the files are solved in order while a background thread loads the
+    next (prefetch) instances.  With several workers, each worker process loads and solves one
+    file at a time, so that loading and solving overlap across the workers, and the results are
+    written in the order they finish.
+
+    Args:
+        filenames: The names of the csv files of the cities
+        output: The (text) file the results are written to
+        workers: The number of worker processes, or 1 to solve in this process
+        prefetch: The number of instances loaded ahead, with a single worker
+        metric: The name of the distance metric to use
+        dtype: The type used to store the distance matrices
+        neighbors: The number of candidate neighbors of each city, or 0 for none
+        cache: If given, the cache the distance matrices are read from (or stored in)
+        packed: Whether to only store the upper triangle of each distance matrix
+        options: The options of determine_path (see solve_instance)
+    Returns:
+        The number of files that could not be solved
+    """
+    load_options = dict(metric=metric, dtype=dtype, neighbors=neighbors, cache=cache,
+                        packed=packed)
+    if workers == 1:
+        results = _pipelined_results(filenames, prefetch, load_options, options)
+    else:
+        results = _parallel_results(filenames, workers, load_options, options)
+
+    failures = 0
+    for result in results:
+        failures += 'error' in result
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+    return failures
+
+
+def _pipelined_results(filenames: Sequence[str],
+                       prefetch: int,
+                       load_options: Dict[str, Any],
+                       options: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Helper method to solve the files in order, while a thread loads the next instances"""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = deque()
+        for filename in filenames:
+            pending.append(executor.submit(_load, filename, load_options))
+            if len(pending) > prefetch:
+                yield _solve(pending.popleft().result(), options)
+        while pending:
+            yield _solve(pending.popleft().result(), options)
+
+
+def _parallel_results(filenames: Sequence[str],
+                      workers: int,
+                      load_options: Dict[str, Any],
+                      options: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Helper method to load and solve the files in worker processes, as they finish"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_load_and_solve, filename, load_options, options)
+                   for filename in filenames]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def _load(filename: str, load_options: Dict[str, Any]) -> Union[Instance, Dict[str, Any]]:
+    """Helper method to load an instance, or describe why it cannot be loaded"""
+    try:
+        return load_instance(filename, **load_options)
+    except (OSError, ValueError) as error:
+        return dict(filename=filename, error=f'{type(error).__name__}: {error}')
+
+
+def _solve(instance: Union[Instance, Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Helper method to solve an instance, unless it could not be loaded"""
+    return solve_instance(instance, **options) if isinstance(instance, Instance) else instance
+
+
+def _load_and_solve(filename: str,
+                    load_options: Dict[str, Any],
+                    options: Dict[str, Any]) -> Dict[str, Any]:
+    """Helper method to load and solve an instance, in a worker process"""
+    return _solve(_load(filename, load_options), options)
@@ -0,0 +1,181 @@
+"""
+Module for the Held-Karp lower bound on the length of the shortest closed path, from minimum
+1-trees improved by subgradient optimization
+"""
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from traveling_salesperson import DistanceMatrix
+from traveling_salesperson.geography import pair_distances
+
+
+DEFAULT_BOUND_ITERATIONS = 1000
+# The number of iterations without a better bound after which the step size is halved
+STEP_PATIENCE = 10
+# The step size (relative to the first one) below which the bound no longer improves noticeably
+MIN_STEP_SCALE = 1e-4
+# The largest rounding error of a bound computed from whole-number distances
+ROUNDING_TOLERANCE = 1e-6
+
+
+def held_karp_bound(distance_matrix: DistanceMatrix,
+                    upper_bound: Optional[float] = None,
+                    max_iterations: int = DEFAULT_BOUND_ITERATIONS,
+                    time_limit: Optional[float] = None) -> float:
+    """Compute the Held-Karp lower bound on the length of the shortest closed path.
+
+    A 1-tree is a spanning tree of all nodes but the first, with two edges from the first node
+    added.  Every closed path is a 1-tree, so the minimum 1-tree is no longer than the shortest
+    path, even when a penalty pi[i] is added to every edge of each node i (and 2 * sum(pi)
+    subtracted).  The penalties are moved along the subgradient, i.e. raised for the nodes of
+    more than two edges and lowered for the leaves, towards a 1-tree in which every node has two
+    edges, which would be the shortest path.  The step size is halved whenever the bound stops
+    improving, and the iterations stop once it is too small for the bound to improve noticeably.
+    The best bound found is returned, typically within about 1% of the shortest path for
+    Euclidean instances.
+
+    Each iteration builds the minimum 1-tree from the rows of the distance matrix, in O(n^2), and
+    a few hundred iterations are typically needed.
+
+    Args:
+        distance_matrix: A symmetric matrix of distances between nodes
+        upper_bound: The length of any closed path (e.g. one found by the local search), which
+            sets the step size.  If None, the length of the path visiting the nodes in the order
+            of a walk around the first minimum spanning tree is used.
+        max_iterations: The maximum number of subgradient iterations, if the bound does not stop
+            improving before
+        time_limit: If given, stop iterating after this many seconds
+    Returns:
+        The lower bound, in the units of the distance matrix (rounded up to an integer for
+            whole-number distances, whose shortest path has a whole-number length)
+    """
+    nodes = len(distance_matrix)
+    if nodes < 3:
+        return float(2 * pair_distances(distance_matrix, np.zeros(1, dtype=int),
+                                        np.ones(1, dtype=int))[0]) if nodes == 2 else 0.0
+
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    penalties = np.zeros(nodes)
+    best_bound = -np.inf
+    step_scale = first_step_scale = 2.0
+    stale_iterations = 0
+    for iteration in range(max(max_iterations, 1)):
+        length, degrees, parents = minimum_one_tree(distance_matrix, penalties)
+        bound = length - 2 * penalties.sum()
+        if iteration == 0 and upper_bound is None:
+            upper_bound = _tree_walk_length(distance_matrix, parents)
+        if bound > best_bound:
+            best_bound, stale_iterations = bound, 0
+        else:
+            stale_iterations += 1
+            if stale_iterations >= STEP_PATIENCE:
+                step_scale, stale_iterations = step_scale / 2, 0
+
+        subgradient = degrees - 2
+        squared_norm = int(subgradient @ subgradient)
+        # A 1-tree in which every node has two edges is a shortest path, so the bound is tight
+        if not squared_norm or bound >= upper_bound:
+            break
+        if (step_scale < MIN_STEP_SCALE * first_step_scale
+                or deadline is not None and time.perf_counter() >= deadline):
+            break
+        penalties += step_scale * (upper_bound - bound) / squared_norm * subgradient
+    if _whole_distances(distance_matrix):
+        # Allowing for the rounding errors of the penalties, which may exceed a tight bound
+        return float(np.ceil(best_bound - ROUNDING_TOLERANCE))
+    return float(best_bound)
+
+
+def minimum_one_tree(distance_matrix: DistanceMatrix,
+                     penalties: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Build the minimum 1-tree for the penalized distances d[i][j] + pi[i] + pi[j]: the minimum
+    spanning tree of all nodes but the first (with Prim's algorithm, a row at a time), and the
+    two shortest edges from the first node.
+
+    Args:
+        distance_matrix: A symmetric matrix of distances between nodes
+        penalties: The penalty pi of each node
+    Returns:
+        A tuple with
+            (1) the penalized length of the 1-tree
+            (2) the number of edges of each node
+            (3) the parent of each node in the spanning tree, rooted at the second node (-1 for
+                the first two nodes)
+    """
+    nodes = len(distance_matrix)
+    degrees = np.zeros(nodes, dtype=np.int64)
+    parents = np.full(nodes, -1, dtype=np.int64)
+    in_tree = np.zeros(nodes, dtype=bool)
+    in_tree[:2] = True
+
+    # The penalized distance from the tree to each node not in it yet, and the nearest tree node
+    keys = _penalized_row(distance_matrix, penalties, 1)
+    keys[in_tree] = np.inf
+    parents[2:] = 1
+    length = 0.0
+    for _ in range(nodes - 2):
+        node = int(np.argmin(keys))
+        length += keys[node]
+        degrees[node] += 1
+        degrees[parents[node]] += 1
+        in_tree[node] = True
+        keys[node] = np.inf
+        row = _penalized_row(distance_matrix, penalties, node)
+        nearer = (row < keys) & ~in_tree
+        keys[nearer] = row[nearer]
+        parents[nearer] = node
+
+    row = _penalized_row(distance_matrix, penalties, 0)
+    nearest = 1 + np.argpartition(row[1:], 1)[:2]
+    length += row[nearest].sum()
+    degrees[0] = 2
+    degrees[nearest] += 1
+    return float(length), degrees, parents
+
+
+def optimality_gap(total_distance: float, lower_bound: float) -> float:
+    """The largest relative excess of a closed path over the shortest one, given a lower bound
+
+    Args:
+        total_distance: The length of the closed path
+        lower_bound: A lower bound on the length of the shortest closed path
+    Returns:
+        (total_distance - lower_bound) / lower_bound, or infinity if the bound is not positive
+            (unless the path has no length either)
+    """
+    if lower_bound <= 0:
+        return 0.0 if total_distance <= 0 else float('inf')
+    return (total_distance - lower_bound) / lower_bound
+
+
+def _penalized_row(distance_matrix: DistanceMatrix,
+                   penalties: np.ndarray,
+                   node: int) -> np.ndarray:
+    """Helper method for the penalized distances from a node to all nodes"""
+    return np.asarray(distance_matrix[node], dtype=np.float64) + penalties + penalties[node]
+
+
+def _whole_distances(distance_matrix: DistanceMatrix) -> bool:
+    """Helper method to tell whether all distances are whole numbers, e.g. the rounded distances
+    of a float64 matrix, in which case the length of every path is one too"""
+    return all(np.all(np.mod(np.asarray(distance_matrix[node]), 1) == 0)
+               for node in range(len(distance_matrix)))
+
+
+def _tree_walk_length(distance_matrix: DistanceMatrix, parents: np.ndarray) -> float:
+    """Helper method for the length of the closed path visiting the nodes in the (depth-first)
+    order of a walk around the spanning tree, followed by the first node"""
+    children = [[] for _ in range(len(parents))]
+    for node, parent in enumerate(parents.tolist()):
+        if parent >= 0:
+            children[parent].append(node)
+    order, stack = [], [1]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(reversed(children[node]))
+    order.append(0)
+    path = np.array(order)
+    return float(pair_distances(distance_matrix, path, np.roll(path, -1)).sum())
@@ -0,0 +1,150 @@
+"""
+Module for the on-disk cache of distance matrices, keyed by the content of the input file
+"""
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Union
+
+import numpy as np
+
+from traveling_salesperson.geography import TriangularDistanceMatrix
+
+
+DEFAULT_CACHE_DIRECTORY = os.path.join('~', '.cache', 'traveling-salesperson')
+DEFAULT_CACHE_MEGABYTES = 1024
+
+
+class DistanceMatrixCache:
+    """A directory of distance matrices stored as .npy files, named after a hash of everything
+    the matrix depends on: the content of the input file, the distance metric, the scaling of the
+    coordinates, the type of the distances and whether only the upper triangle is stored.
+
+    Cached matrices are memory-mapped (read-only) rather than read, so a cache hit costs almost
+    nothing until the distances are used.  Once the files exceed the size limit, the least
+    recently used ones are evicted.
+    """
+
+    def __init__(self,
+                 directory: str = DEFAULT_CACHE_DIRECTORY,
+                 max_bytes: int = DEFAULT_CACHE_MEGABYTES * 2 ** 20):
+        """
+        Args:
+            directory: The directory holding the cached matrices (created when needed)
+            max_bytes: The maximum total size of the cached matrices
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(filename: str,
+            distance_metric_key: str,
+            scale: int,
+            dtype: np.dtype,
+            packed: bool = False) -> str:
+        """The key of the distance matrix for the given input
+
+        Args:
+            filename: The name of the file the cities were read from
+            distance_metric_key: The name of the distance metric
+            scale: The scaling applied to the coordinates (see etl.transform)
+            dtype: The type used to store the distances
+            packed: Whether only the upper triangle of the matrix is stored
+        Returns:
+            A hexadecimal hash identifying the distance matrix
+        """
+        digest = file_digest(filename)
+        digest.update(f'|{distance_metric_key}|{scale}|{np.dtype(dtype).name}'.encode())
+        if packed:
+            digest.update(b'|packed')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Union[np.ndarray, TriangularDistanceMatrix]]:
+        """Open the cached distance matrix with the given key
+
+        Args:
+            key: The key of the distance matrix (see DistanceMatrixCache.key)
+        Returns:
+            The read-only, memory-mapped matrix (a TriangularDistanceMatrix, if only its upper
+                triangle is stored), or None if it is not cached
+        """
+        path = self._path(key)
+        try:
+            distances = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return TriangularDistanceMatrix(distances) if distances.ndim == 1 else distances
+
+    def put(self, key: str, distances: Union[np.ndarray, TriangularDistanceMatrix]) -> None:
+        """Store a distance matrix, unless it exceeds the size limit on its own, and evict the
+        least recently used matrices beyond the size limit
+
+        Args:
+            key: The key of the distance matrix (see DistanceMatrixCache.key)
+            distances: The distance matrix
+        """
+        if distances.nbytes > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first, so that a matrix is never read half-written
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                np.save(file, distances.values if isinstance(distances, TriangularDistanceMatrix)
+                        else distances)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used matrices until the cache fits in the size limit"""
+        paths = self._paths()
+        sizes = {path: os.path.getsize(path) for path in paths}
+        total_bytes = sum(sizes.values())
+        for path in sorted(paths, key=os.path.getmtime):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            total_bytes -= sizes[path]
+
+    def size(self) -> int:
+        """The total size of the cached matrices, in bytes"""
+        return sum(os.path.getsize(path) for path in self._paths())
+
+    def clear(self) -> None:
+        """Remove all cached matrices"""
+        for path in self._paths():
+            os.remove(path)
+
+    def _path(self, key: str) -> str:
+        """Helper method for the name of the file holding the matrix with the given key"""
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def _paths(self) -> List[str]:
+        """Helper method for the names of the files holding the cached matrices"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith('.npy')]
+
+
+def file_digest(filename: str) -> 'hashlib._Hash':
+    """The SHA-256 digest of the content of a file, read in chunks, to be updated further
+
+    Args:
+        filename: The name of the file
+    Returns:
+        The (updatable) digest
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b''):
+            digest.update(chunk)
+    return digest
@@ -0,0 +1,168 @@
+"""
+Module for the alternative constructions of a starting path (space-filling curve and greedy edge
+matching), improved afterwards by the same local search as the nearest neighbor path
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from traveling_salesperson import City, DistanceMatrix
+from traveling_salesperson.geography import city_coordinates, pair_distances
+
+
+# The number of bits of each coordinate on the grid the Hilbert curve passes through
+HILBERT_ORDER = 16
+
+
+def hilbert_curve_path(cities: List[City],
+                       distance_matrix: DistanceMatrix) -> Tuple[List[int], int]:
+    """Determine the path visiting the cities in the order of a Hilbert curve through their
+    bounding box.  Cities close to each other along the curve are close in the plane, so the
+    path has no long edges, and is found in O(n log n) without looking up any distance.
+
+    Args:
+        cities: A list of cities to be visited
+        distance_matrix: A symmetric matrix of distances between cities, only used to compute
+            the length of the path
+    Returns:
+        A tuple with
+            (1) the path along the Hilbert curve
+            (2) the total path length
+    """
+    path = np.argsort(hilbert_indexes(city_coordinates(cities)), kind='stable')
+    return path.tolist(), _path_length(path, distance_matrix)
+
+
+def hilbert_indexes(coordinates: np.ndarray, order: int = HILBERT_ORDER) -> np.ndarray:
+    """The position of each point along a Hilbert curve through their bounding box.
+
+    Args:
+        coordinates: An n x 2 array with the coordinates of the points
+        order: The number of bits of each coordinate on the grid the curve passes through
+    Returns:
+        The (integer) position of each point along the curve
+    """
+    side = 2 ** order
+    low, span = coordinates.min(axis=0), np.ptp(coordinates, axis=0).max()
+    grid = ((coordinates - low) * ((side - 1) / span if span else 0)).astype(np.int64)
+    x, y = grid[:, 0].copy(), grid[:, 1].copy()
+
+    indexes = np.zeros(len(coordinates), dtype=np.int64)
+    quadrant_side = side // 2
+    while quadrant_side > 0:
+        in_right = (x & quadrant_side) > 0
+        in_top = (y & quadrant_side) > 0
+        indexes += quadrant_side * quadrant_side * ((3 * in_right) ^ in_top)
+        # Rotate the quadrant so that the curve through it has the standard orientation
+        flip = ~in_top & in_right
+        x[flip], y[flip] = side - 1 - x[flip], side - 1 - y[flip]
+        swap = ~in_top
+        x[swap], y[swap] = y[swap], x[swap]
+        quadrant_side //= 2
+    return indexes
+
+
+def greedy_edge_path(cities: List[City],
+                     distance_matrix: DistanceMatrix,
+                     neighbors: Optional[np.ndarray] = None) -> Tuple[List[int], int]:
+    """Determine the path of the greedy edge matching: going through the candidate edges from
+    the shortest, an edge is kept unless one of its cities already has two edges, or it would
+    close a loop.  The fragments left over are then joined, each to the closest end of the
+    remaining fragments.
+
+    Args:
+        cities: A list of cities to be visited
+        distance_matrix: A symmetric matrix of distances between cities
+        neighbors: The candidate neighbors of each city (see geography.nearest_neighbors), whose
+            edges are matched.  If None, all edges are matched.
+    Returns:
+        A tuple with
+            (1) the path of the greedy edge matching
+            (2) the total path length
+    """
+    nodes = len(cities)
+    if neighbors is None:
+        origins, destinations = np.triu_indices(nodes, 1)
+    else:
+        origins = np.repeat(np.arange(nodes), neighbors.shape[1])
+        destinations = neighbors.ravel()
+        origins, destinations = np.minimum(origins, destinations), np.maximum(origins, destinations)
+        edges = np.unique(origins * nodes + destinations)
+        origins, destinations = edges // nodes, edges % nodes
+    lengths = pair_distances(distance_matrix, origins, destinations)
+    order = np.argsort(lengths, kind='stable')
+
+    adjacent = [[] for _ in range(nodes)]
+    fragments = list(range(nodes))
+    for origin, destination in zip(origins[order].tolist(), destinations[order].tolist()):
+        if len(adjacent[origin]) == 2 or len(adjacent[destination]) == 2:
+            continue
+        origin_fragment = _fragment(fragments, origin)
+        destination_fragment = _fragment(fragments, destination)
+        if origin_fragment == destination_fragment:
+            continue
+        fragments[origin_fragment] = destination_fragment
+        adjacent[origin].append(destination)
+        adjacent[destination].append(origin)
+
+    path = _join_fragments(adjacent, distance_matrix)
+    return path, _path_length(np.array(path), distance_matrix)
+
+
+def _fragment(fragments: List[int], node: int) -> int:
+    """Helper method to find the fragment a node belongs to (union-find, with path halving)"""
+    while fragments[node] != node:
+        fragments[node] = fragments[fragments[node]]
+        node = fragments[node]
+    return node
+
+
+def _join_fragments(adjacent: List[List[int]], distance_matrix: DistanceMatrix) -> List[int]:
+    """Helper method to join the fragments of the greedy edge matching into one path, from the
+    end of the path to the closest end of any remaining fragment"""
+    ends = np.array([node for node, edges in enumerate(adjacent) if len(edges) < 2])
+    remaining = np.ones(len(adjacent), dtype=bool)
+    path = []
+    node = int(ends[0])
+    while True:
+        # Walk along the fragment starting at node
+        previous = None
+        while True:
+            path.append(node)
+            remaining[node] = False
+            following = [other for other in adjacent[node] if other != previous]
+            if not following:
+                break
+            previous, node = node, following[0]
+
+        ends = ends[remaining[ends]]
+        if not ends.size:
+            return path
+        node = int(ends[np.argmin(pair_distances(distance_matrix,
+                                                 np.full(len(ends), path[-1]), ends))])
+
+
+def initial_tour_path(tour: Sequence[int],
+                      distance_matrix: DistanceMatrix) -> Tuple[List[int], int]:
+    """Start from a given tour, e.g. the tour saved by a previous run (see tours.TourStore)
+
+    Args:
+        tour: The indexes of the cities in the order they are visited
+        distance_matrix: A symmetric matrix of distances between cities
+    Returns:
+        A tuple with
+            (1) the path
+            (2) the total path length
+    Raises:
+        ValueError: if the tour does not visit every city exactly once
+    """
+    path = np.asarray(tour, dtype=np.int64)
+    if not np.array_equal(np.sort(path), np.arange(len(distance_matrix))):
+        raise ValueError(f'The tour does not visit each of the {len(distance_matrix)} cities '
+                         'exactly once')
+    return path.tolist(), _path_length(path, distance_matrix)
+
+
+def _path_length(path: np.ndarray, distance_matrix: DistanceMatrix) -> int:
+    """Helper method to compute the length of the (open) path"""
+    return int(pair_distances(distance_matrix, path[:-1], path[1:]).sum())
@@ -0,0 +1,251 @@
+"""
+Module for solving large instances by spatial decomposition: the cities are split into clusters,
+which are solved independently (in parallel), stitched together, and refined across the
+boundaries between the clusters
+"""
+from concurrent.futures import ProcessPoolExecutor
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from traveling_salesperson import City, CityTable, profiling, SwapStatistics
+from traveling_salesperson.algorithm import (determine_path, nearest_neighbor_path_with_swapping,
+                                             rotate_path)
+from traveling_salesperson.geography import (city_coordinates, city_names,
+                                             CoordinateDistanceMatrix, distance_matrix,
+                                             nearest_neighbors, pair_distances)
+from traveling_salesperson.moves import CandidateLists, local_search
+from traveling_salesperson.tour import Tour
+
+
+DECOMPOSITIONS = ('grid', 'kmeans')
+
+
+def decomposed_path(cities: List[City],
+                    cluster_size: int = 1000,
+                    decomposition: str = 'grid',
+                    workers: Optional[int] = None,
+                    distance_metric_key: str = 'euclidean',
+                    dtype: np.dtype = np.float64,
+                    neighbors: int = 10,
+                    strategy: str = 'first',
+                    moves: Sequence[str] = ('2-opt',),
+                    time_limit: Optional[float] = None,
+                    max_iterations: Optional[int] = None,
+                    start: int = 0,
+                    seed: int = 0,
+                    statistics: Optional[SwapStatistics] = None,
+                    timings: Optional[Dict[str, float]] = None,
+                    construction: str = 'nearest-neighbor') -> Tuple[List[str], int]:
+    """Determine a close-to-optimal path for a large list of cities, without ever computing the
+    full distance matrix:
+
+        1. partition: split the cities into spatial clusters of about cluster_size cities
+        2. solve: determine the path through each cluster (see determine_path), in parallel
+        3. stitch: join the closed paths of the clusters into one, visiting the clusters in the
+           order of a short path through their centroids
+        4. refine: improve the joined path with local search, starting only from the cities
+           with candidate neighbors in another cluster, with distances computed on demand
+
+    The memory footprint is linear in the number of cities, plus a distance matrix of a single
+    cluster per worker.
+
+    Args:
+        cities: A list of cities to be visited
+        cluster_size: The (approximate) number of cities per cluster
+        decomposition: How the cities are split, either on a 'grid' of cells holding the same
+            number of cities, or by 'kmeans' clustering
+        workers: The number of worker processes solving the clusters, or None for one per CPU
+        distance_metric_key: The name of the distance metric to use
+        dtype: The type used to store the distance matrix of each cluster
+        neighbors: The number of candidate neighbors of each city
+        strategy: Whether to apply the 'best' or the 'first' improving swap within the clusters
+        moves: The local search moves (see moves.MOVES)
+        time_limit: If given, the number of seconds of iterated local search for each cluster
+        max_iterations: If given, the maximum number of kicks of iterated local search for each
+            cluster
+        start: The index of the city to start the path from
+        seed: The seed for the k-means clustering and the iterated local search
+        statistics: If given, updated with the number of moves evaluated and applied by the
+            final refinement
+        timings: If given, updated with the number of seconds taken by each stage
+        construction: How the starting path through each cluster is built (see
+            algorithm.construct_path)
+    Returns:
+        A tuple with
+            (1) the list of city names, reordered to have a near-optimal (shortest) path
+            (2) the total path length
+    Raises:
+        ValueError: if the decomposition is unknown
+    """
+    if decomposition not in DECOMPOSITIONS:
+        raise ValueError(f'Unknown decomposition: {decomposition}')
+    timings = timings if timings is not None else {}
+    coordinates = city_coordinates(cities)
+
+    stage_start = time.perf_counter()
+    if decomposition == 'grid':
+        clusters = grid_clusters(coordinates, cluster_size)
+    else:
+        clusters = kmeans_clusters(coordinates, cluster_size, seed)
+    timings['partition'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    options = dict(distance_metric_key=distance_metric_key, dtype=dtype, neighbors=neighbors,
+                   strategy=strategy, moves=moves, time_limit=time_limit,
+                   max_iterations=max_iterations, seed=seed, construction=construction)
+    tasks = [(CityTable(cluster, coordinates[cluster]), options) for cluster in clusters]
+    with profiling.suspended():
+        if workers == 1 or len(tasks) == 1:
+            cluster_paths = [_solve_cluster(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                cluster_paths = list(executor.map(_solve_cluster, tasks, chunksize=4))
+    timings['solve'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    distances = CoordinateDistanceMatrix(cities, distance_metric_key)
+    with profiling.suspended():
+        path = stitch_paths(cluster_paths, coordinates, distances)
+    timings['stitch'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    path = refine_boundaries(path, clusters, cities, distances, neighbors, moves, statistics,
+                             distance_metric_key)
+    path = rotate_path(path, start)
+    total_distance = int(pair_distances(distances, np.array(path), np.roll(path, -1)).sum())
+    timings['refine'] = time.perf_counter() - stage_start
+
+    names = city_names(cities)
+    return [names[i] for i in path], total_distance
+
+
+def grid_clusters(coordinates: np.ndarray, cluster_size: int) -> List[np.ndarray]:
+    """Split the cities on a grid: into vertical strips holding the same number of cities, each
+    split into cells holding the same number of cities, so that the size of every cluster is
+    bounded even when the cities are unevenly spread.
+
+    Args:
+        coordinates: An n x 2 array with the coordinates of the cities
+        cluster_size: The maximum number of cities per cluster
+    Returns:
+        The indexes of the cities in each (non-empty) cluster
+    """
+    cells = int(np.ceil(np.sqrt(len(coordinates) / cluster_size)))
+    clusters = []
+    for strip in np.array_split(np.argsort(coordinates[:, 0], kind='stable'), cells):
+        strip = strip[np.argsort(coordinates[strip, 1], kind='stable')]
+        clusters.extend(cell for cell in np.array_split(strip, cells) if cell.size)
+    return clusters
+
+
+def kmeans_clusters(coordinates: np.ndarray, cluster_size: int, seed: int = 0
+                    ) -> List[np.ndarray]:
+    """Split the cities into clusters by k-means clustering, with about cluster_size cities per
+    cluster on average.  Unlike the grid, the size of a cluster is not bounded.
+
+    Args:
+        coordinates: An n x 2 array with the coordinates of the cities
+        cluster_size: The average number of cities per cluster
+        seed: The seed for the initial centroids
+    Returns:
+        The indexes of the cities in each (non-empty) cluster
+    """
+    clusters = int(np.ceil(len(coordinates) / cluster_size))
+    if clusters == 1:
+        return [np.arange(len(coordinates))]
+    from scipy.cluster.vq import kmeans2  # pylint: disable=import-outside-toplevel
+
+    _, labels = kmeans2(coordinates, clusters, minit='++', seed=seed)
+    order = np.argsort(labels, kind='stable')
+    bounds = np.searchsorted(labels[order], np.arange(1, clusters))
+    return [cluster for cluster in np.split(order, bounds) if cluster.size]
+
+
+def stitch_paths(cluster_paths: List[List[int]],
+                 coordinates: np.ndarray,
+                 distances: CoordinateDistanceMatrix) -> List[int]:
+    """Join the closed paths through the clusters into a single path.  The clusters are visited
+    in the order of a short closed path through their centroids.  Each cluster is entered at its
+    city closest to the last city of the previous cluster, and left from one of the neighbors of
+    that city along its path, dropping the longer of the two edges.
+
+    Args:
+        cluster_paths: The closed path through each cluster, as city indexes
+        coordinates: An n x 2 array with the coordinates of the cities
+        distances: The distances between the cities
+    Returns:
+        The joined path
+    """
+    centroids = np.array([coordinates[path].mean(axis=0) for path in cluster_paths])
+    centroid_cities = [City(i, *centroid) for i, centroid in enumerate(centroids)]
+    cluster_order, _ = nearest_neighbor_path_with_swapping(len(centroid_cities),
+                                                           distance_matrix(centroid_cities))
+
+    path = list(cluster_paths[cluster_order[0]])
+    for cluster in cluster_order[1:]:
+        cluster_path = cluster_paths[cluster]
+        gaps = coordinates[cluster_path] - coordinates[path[-1]]
+        entry = int(np.argmin((gaps * gaps).sum(axis=1)))
+        cluster_path = cluster_path[entry:] + cluster_path[:entry]
+        if (len(cluster_path) > 2
+                and distances[cluster_path[0]][cluster_path[1]]
+                > distances[cluster_path[0]][cluster_path[-1]]):
+            cluster_path = cluster_path[:1] + cluster_path[:0:-1]
+        path.extend(cluster_path)
+    return path
+
+
+def refine_boundaries(path: List[int],
+                      clusters: List[np.ndarray],
+                      cities: List[City],
+                      distances: CoordinateDistanceMatrix,
+                      neighbors: int = 10,
+                      moves: Sequence[str] = ('2-opt',),
+                      statistics: Optional[SwapStatistics] = None,
+                      distance_metric_key: str = 'euclidean') -> List[int]:
+    """Improve the joined path with local search (see moves.local_search), starting from the
+    cities with a candidate neighbor in another cluster.  Other cities are only examined once a
+    move changes one of their edges, which bounds the work by the length of the boundaries
+    between the clusters rather than by the number of cities.
+
+    Args:
+        path: The joined path
+        clusters: The indexes of the cities in each cluster
+        cities: A list of cities to be visited
+        distances: The distances between the cities
+        neighbors: The number of candidate neighbors of each city
+        moves: The local search moves (see moves.MOVES)
+        statistics: If given, updated with the number of moves evaluated and applied
+        distance_metric_key: The name of the distance metric to use
+    Returns:
+        The refined path
+    """
+    if len(clusters) < 2 or len(path) < 5:
+        return path
+    candidates = nearest_neighbors(cities, neighbors, distance_metric_key)
+    labels = np.empty(len(path), dtype=np.int64)
+    for label, cluster in enumerate(clusters):
+        labels[cluster] = label
+    boundary = np.nonzero((labels[candidates] != labels[:, np.newaxis]).any(axis=1))[0]
+
+    tour = Tour(path)
+    local_search(tour, distances, CandidateLists(distances, candidates), moves, statistics,
+                 boundary.tolist())
+    return tour.to_list()
+
+
+def _solve_cluster(task: Tuple[CityTable, Dict[str, Any]]) -> List[int]:
+    """Helper method to determine the closed path through a cluster, as city indexes (the names
+    of the cities of the cluster)"""
+    cities, options = task
+    if len(cities) < 4:
+        return city_names(cities)
+    distances = distance_matrix(cities, options['distance_metric_key'], options['dtype'])
+    candidates = nearest_neighbors(cities, options['neighbors'], options['distance_metric_key'])
+    path, _ = determine_path(cities, distances, candidates, options['strategy'],
+                             moves=options['moves'], time_limit=options['time_limit'],
+                             max_iterations=options['max_iterations'], seed=options['seed'],
+                             construction=options['construction'])
+    return path
@@ -1,15 +1,16 @@
 """
 Module to extract, transform and load city data
 """
+import csv
 import math
-from typing import List, Tuple
+from typing import Tuple
 
-import pandas as pd
+import numpy as np
 
-from traveling_salesperson import City
+from traveling_salesperson import CityTable
 
 
-def etl(filename: str, target_digits: int = 3) -> Tuple[List[City], int]:
+def etl(filename: str, target_digits: int = 3) -> Tuple[CityTable, int]:
     """Extract, transform and load the city data
 
     Args:
@@ -19,77 +20,85 @@ def etl(filename: str, target_digits: int = 3) -> Tuple[List[City], int]:
             See the README for more discussion on this.
     Returns:
         A tuple with
-            (1) a list of cities to be visited
+            (1) the cities to be visited
             (2) the scaling used to transform the data
     """
-    raw_frame = extract(filename)
-    transformed_frame, scale = transform(raw_frame, target_digits)
-    cities = load(transformed_frame)
+    names, coordinates = extract(filename)
+    coordinates, scale = transform(coordinates, target_digits)
+    cities = load(names, coordinates)
     return cities, scale
 
 
-def extract(filename: str) -> pd.DataFrame:
-    """Extract the raw city data from a local file.
+def extract(filename: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Extract the raw city data from a local file, column by column.
+
+    The rows are parsed once, into a name and two coordinates each.  Quoted values may hold
+    commas, e.g. "Luxembourg, Ville".
 
     Args:
-        filename: The name of the local csv file
+        filename: The name of the local csv file, with a header naming the name, x and y columns
     Returns:
-        A Pandas DataFrame with the raw city data
+        A tuple with
+            (1) an array with the name of each city
+            (2) an n x 2 array with the raw x and y coordinates of each city
     """
-    return pd.read_csv(filename)
+    with open(filename, newline='') as file:
+        header = next(csv.reader(file))
+        columns = tuple(header.index(column) for column in ('name', 'x', 'y'))
+        rows = np.loadtxt(file, delimiter=',', quotechar='"', usecols=columns,
+                          dtype=[('name', object), ('x', np.float64), ('y', np.float64)],
+                          ndmin=1)
+    return rows['name'].astype(str), np.column_stack((rows['x'], rows['y']))
 
 
-def transform(raw_frame: pd.DataFrame, target_digits: int = 3) -> Tuple[pd.DataFrame, int]:
+def transform(raw_coordinates: np.ndarray, target_digits: int = 3) -> Tuple[np.ndarray, int]:
     """Transform the raw city data into a usable format.  Notably, scale the x and y coordinates to
     have the desired number of hole number digits.
 
     Args:
-        raw_frame: A Pandas DataFrame with the raw city data
+        raw_coordinates: An n x 2 array with the raw x and y coordinates of each city
         target_digits: The target number of digits of the whole number part of the coordinates.
     Returns:
         A tuple with
-            (1) a Pandas DataFrame with the transformed city data
+            (1) an n x 2 array with the transformed coordinates
             (2) the scaling used to transform the data
     """
 
     # 1. Determine the lesser number of whole number digits for the two coordinates
-    min_digits = min(whole_number_digits(raw_frame['x']),
-                     whole_number_digits(raw_frame['y']))
+    min_digits = min(whole_number_digits(raw_coordinates[:, 0]),
+                     whole_number_digits(raw_coordinates[:, 1]))
 
     # 2. We only want to scale the data up
     log10_scale = max(target_digits - min_digits, 0)
     scale = pow(10, log10_scale)
 
-    # 3. Construct the transformed DataFrame
-    transformed_frame = raw_frame.assign(
-        x=raw_frame['x'] * scale,
-        y=raw_frame['y'] * scale
-    )
+    # 3. Construct the transformed coordinates
+    transformed_coordinates = raw_coordinates * scale
 
-    return transformed_frame, scale
+    return transformed_coordinates, scale
 
 
-def load(transformed_frame: pd.DataFrame) -> List[City]:
+def load(names: np.ndarray, coordinates: np.ndarray) -> CityTable:
     """Load the transformed data into the format needed by the TSP algorithm.
 
     Args:
-        transformed_frame: A Pandas DataFrame with the transformed city data
+        names: An array with the name of each city
+        coordinates: An n x 2 array with the transformed x and y coordinates of each city
     Returns:
-        A list of cities to be visited
+        The cities to be visited
     """
-    cities = transformed_frame.apply(lambda row: City(*row), axis=1).to_list()
-    return cities
+    return CityTable(names, coordinates)
 
 
-def whole_number_digits(series: pd.Series) -> int:
-    """Determine the relevant number of whole number digits for the given series.  The standard
+def whole_number_digits(values: np.ndarray) -> int:
+    """Determine the relevant number of whole number digits for the given values.  The standard
     deviation, as a measure of the variation of the data, is used.
 
     Args:
-        series: A Pandas Series (of floats)
+        values: An array (of floats)
     Returns:
-        The number of whole number digits associated with this series
+        The number of whole number digits associated with these values
     """
-    stddev = series.std(ddof=0)
+    stddev = np.std(values)
     digits = int(math.log10(stddev)) + 1
     return digits
@@ -1,51 +1,511 @@
 """
 Module for deriving the relevant geography (distance matrix)
 """
-from itertools import product
+from collections import namedtuple, OrderedDict
 import math
-from typing import List
+from typing import Callable, List, Optional, Union
 
 import numpy as np
 
-from traveling_salesperson import City
+from traveling_salesperson import City, CityTable, DistanceMatrix
 
 
-def distance_matrix(cities: List[City], distance_metric_key: str = 'euclidean'):
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+
+DISTANCE_DTYPES = ('float64', 'int32', 'uint16')
+
+
+def distance_matrix(cities: List[City],
+                    distance_metric_key: str = 'euclidean',
+                    dtype: np.dtype = np.float64,
+                    block_size: int = 1024,
+                    packed: bool = False) -> Union[np.ndarray, 'TriangularDistanceMatrix']:
     """Compute the matrix of distances between all cities, using the named distance metric.
 
     Args:
         cities: A list of cities to be visited visit
         distance_metric_key: The name of the distance metric to use
+        dtype: The type used to store the distances.  The distances are whole numbers, so a
+            compact integer type (e.g. int32 or uint16) can be used to reduce the memory footprint
+        block_size: The number of rows computed at once, bounding the size of the intermediate
+            arrays
+        packed: Whether to only store the upper triangle of the (symmetric) matrix, in half the
+            memory (see TriangularDistanceMatrix)
     Returns:
         A symmetric matrix of distances between cities.  The i and j indexes correspond to the index
             in the original list of cities
+    Raises:
+        ValueError: if an integer dtype is too small to hold the largest distance
     """
-    distance_metric_dict = {
-        'euclidean': _euclidean_distance,
-        'manhattan': _manhattan_distance
-    }
-    distance_metric = distance_metric_dict[distance_metric_key]
+    distance_metric = DISTANCE_METRICS[distance_metric_key]
+    coordinates = city_coordinates(cities)
+    dtype = np.dtype(dtype)
+    count = len(coordinates)
 
-    distances = np.zeros((len(cities), len(cities)))
+    if packed:
+        values = np.empty(count * (count - 1) // 2, dtype=dtype)
+        for start in range(0, count, block_size):
+            stop = min(start + block_size, count)
+            # The distances from each row of the block to the cities after it, row after row
+            block = _outer_distances(distance_metric, coordinates[start:stop], coordinates[start:])
+            block = block[np.arange(count - start) > np.arange(stop - start)[:, np.newaxis]]
+            _check_dtype_capacity(block, dtype)
+            first = start * (2 * count - start - 1) // 2
+            values[first:first + len(block)] = block
+        return TriangularDistanceMatrix(values)
 
-    for (i, start), (j, end) in product(enumerate(cities), repeat=2):
-        if j <= i:
-            continue
-        distances[i][j] = distances[j][i] = distance_metric(start, end)
+    distances = np.empty((count, count), dtype=dtype)
+    for start in range(0, count, block_size):
+        block = _outer_distances(distance_metric, coordinates[start:start + block_size],
+                                 coordinates)
+        _check_dtype_capacity(block, dtype)
+        distances[start:start + block_size] = block
     return distances
 
 
-def _euclidean_distance(city_a: City, city_b: City) -> int:
-    """Helper method to compute the euclidean distance between two cities, rounded to the nearest
-    integer."""
-    delta_x = city_a.x - city_b.x
-    delta_y = city_a.y - city_b.y
-    return round(math.sqrt(pow(delta_x, 2) + pow(delta_y, 2)))
+def update_distance_matrix(distances: np.ndarray,
+                           cities: Union[List[City], CityTable],
+                           changed: np.ndarray,
+                           distance_metric_key: str = 'euclidean',
+                           in_place: bool = False) -> np.ndarray:
+    """Update a distance matrix for a list of cities of which only a few have changed, only
+    computing the distances to the changed cities: all other distances are copied from the matrix
+    (or left as they are, in place).
+
+    Args:
+        distances: The (materialized) matrix of distances between the previous cities
+        cities: The updated cities.  Each city at an index of the matrix that is not changed must
+            be the same as the previous city at that index.  Cities beyond the end of the matrix
+            are always treated as changed.
+        changed: The indexes of the changed cities
+        distance_metric_key: The name of the distance metric the matrix was computed with
+        in_place: Whether to update the given matrix rather than a copy, when it is writable and
+            there are no more cities than before
+    Returns:
+        The matrix of distances between the updated cities, with the type of the given matrix
+    Raises:
+        ValueError: if an integer matrix is too small to hold the largest new distance
+    """
+    coordinates = city_coordinates(cities)
+    previous_count, count = len(distances), len(coordinates)
+    changed = np.union1d(np.asarray(changed, dtype=np.int64), np.arange(previous_count, count))
+
+    if in_place and count <= previous_count and distances.flags.writeable:
+        updated = distances[:count, :count]
+    else:
+        updated = np.empty((count, count), dtype=distances.dtype)
+        kept_count = min(previous_count, count)
+        updated[:kept_count, :kept_count] = distances[:kept_count, :kept_count]
+    block = _outer_distances(DISTANCE_METRICS[distance_metric_key], coordinates[changed],
+                             coordinates)
+    _check_dtype_capacity(block, updated.dtype)
+    updated[changed] = block
+    updated[:, changed] = block.T
+    return updated
+
+
+class LazyDistanceMatrix:
+    """A distance matrix whose rows are computed on demand from the city coordinates.
+
+    Rows are indexed exactly like a materialized matrix (distances[i][j]), but only the most
+    recently used rows are kept in memory, so the footprint is O(maxsize * n) instead of O(n^2).
+    """
+
+    def __init__(self,
+                 cities: List[City],
+                 distance_metric_key: str = 'euclidean',
+                 dtype: np.dtype = np.float64,
+                 maxsize: int = 1024):
+        """
+        Args:
+            cities: A list of cities to be visited
+            distance_metric_key: The name of the distance metric to use
+            dtype: The type used to store the cached rows
+            maxsize: The maximum number of rows to keep in the cache
+        """
+        self._distance_metric = DISTANCE_METRICS[distance_metric_key]
+        self._coordinates = city_coordinates(cities)
+        self._dtype = np.dtype(dtype)
+        self._rows = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shape(self):
+        """The shape of the equivalent materialized matrix"""
+        return len(self), len(self)
+
+    def __len__(self) -> int:
+        return len(self._coordinates)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        """The (read-only) row of distances from the city with the given index to all cities"""
+        row = self._rows.get(index)
+        if row is not None:
+            self.hits += 1
+            self._rows.move_to_end(index)
+            return row
+
+        self.misses += 1
+        row = _outer_distances(self._distance_metric,
+                               self._coordinates[index:index + 1], self._coordinates)[0]
+        _check_dtype_capacity(row, self._dtype)
+        row = row.astype(self._dtype)
+        row.flags.writeable = False
+        self._rows[index] = row
+        if len(self._rows) > self.maxsize:
+            self._rows.popitem(last=False)
+        return row
+
+    def pair_distances(self, origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+        """The distances between each pair of origin and destination cities, computed directly
+        from the coordinates (bypassing the row cache)"""
+        delta = self._coordinates[origins] - self._coordinates[destinations]
+        return self._distance_metric(delta[..., 0], delta[..., 1]).astype(np.int64)
+
+    def cache_info(self) -> CacheInfo:
+        """Report the cache statistics, in the style of functools.lru_cache"""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._rows))
+
+    def cache_clear(self) -> None:
+        """Evict all cached rows and reset the statistics"""
+        self._rows.clear()
+        self.hits = self.misses = 0
+
+
+class CoordinateDistanceMatrix:
+    """A distance matrix that stores nothing but the city coordinates: each distance is computed
+    from them when it is looked up (distances[i][j]), so the footprint is O(n).
+
+    Suited to searches that only ever look at a few distances per city, e.g. a local search over
+    candidate neighbors, on instances far too large for a materialized matrix.
+    """
+
+    def __init__(self, cities: List[City], distance_metric_key: str = 'euclidean'):
+        """
+        Args:
+            cities: A list of cities to be visited
+            distance_metric_key: The name of the distance metric to use
+        """
+        self._distance_metric = DISTANCE_METRICS[distance_metric_key]
+        self._coordinates = city_coordinates(cities)
+
+    @property
+    def shape(self):
+        """The shape of the equivalent materialized matrix"""
+        return len(self), len(self)
+
+    def __len__(self) -> int:
+        return len(self._coordinates)
+
+    def __getitem__(self, index: int) -> '_CoordinateDistanceRow':
+        """The row of distances from the city with the given index to all cities"""
+        return _CoordinateDistanceRow(self, index)
+
+    def distance(self, origin: int, destination: int) -> float:
+        """The distance between two cities"""
+        x_origin, y_origin = self._coordinates[origin]
+        x_destination, y_destination = self._coordinates[destination]
+        return self._distance_metric(x_origin - x_destination, y_origin - y_destination)
+
+    def pair_distances(self, origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+        """The distances between each pair of origin and destination cities"""
+        delta = self._coordinates[origins] - self._coordinates[destinations]
+        return self._distance_metric(delta[..., 0], delta[..., 1]).astype(np.int64)
+
+
+class _CoordinateDistanceRow:
+    """Helper class for a row of a CoordinateDistanceMatrix, computing each distance on lookup"""
+
+    def __init__(self, distances: CoordinateDistanceMatrix, origin: int):
+        self._distances = distances
+        self._origin = origin
+
+    def __len__(self) -> int:
+        return len(self._distances)
+
+    def __getitem__(self, destination: int) -> float:
+        return self._distances.distance(self._origin, destination)
+
+
+class TriangularDistanceMatrix:
+    """A symmetric distance matrix stored as its condensed upper triangle: the distances[i][j]
+    with i < j, row after row, in a single array of n (n - 1) / 2 values (the layout of
+    scipy.spatial.distance.squareform), so that it takes half the memory of the full matrix.
+
+    Rows are indexed exactly like a materialized matrix (distances[i][j]): each distance is looked
+    up by index arithmetic, and a whole row is only gathered when it is used as an array.
+    """
+
+    def __init__(self, values: np.ndarray):
+        """
+        Args:
+            values: The condensed upper triangle, used as is (e.g. memory-mapped) rather than
+                copied
+        Raises:
+            ValueError: if the number of values is not that of a triangle
+        """
+        self.values = np.asanyarray(values).reshape(-1)
+        count = (1 + math.isqrt(1 + 8 * len(self.values))) // 2
+        if count * (count - 1) // 2 != len(self.values):
+            raise ValueError(f'{len(self.values)} values are not the upper triangle of a matrix')
+        self._count = count
+        rows = np.arange(count, dtype=np.int64)
+        # The index of distances[i][j] in the values is offsets[i] + j, for i < j
+        self._offsets = rows * (2 * count - rows - 1) // 2 - rows - 1
+        self._offset_list = self._offsets.tolist()
+        # Single distances are looked up in a memoryview, which returns plain Python numbers
+        # several times faster than numpy scalars are returned
+        self._lookup = (memoryview(self.values) if self.values.dtype.isnative
+                        and self.values.dtype.kind in 'iuf' else self.values)
+        # The rows are built once, rather than for every single distance looked up
+        self._rows = [_TriangularDistanceRow(self, origin) for origin in range(count)]
+
+    def __reduce__(self):
+        return type(self), (self.values,)
+
+    @classmethod
+    def from_matrix(cls, distances: np.ndarray) -> 'TriangularDistanceMatrix':
+        """Condense the upper triangle of a full, symmetric, matrix"""
+        distances = np.asarray(distances)
+        return cls(distances[np.triu_indices(len(distances), 1)])
+
+    @property
+    def shape(self):
+        """The shape of the equivalent materialized matrix"""
+        return len(self), len(self)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The type of the distances"""
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the stored distances, in bytes"""
+        return self.values.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> '_TriangularDistanceRow':
+        """The row of distances from the city with the given index to all cities"""
+        return self._rows[index]
+
+    def distance(self, origin: int, destination: int) -> float:
+        """The distance between two cities"""
+        if origin < destination:
+            return self._lookup[self._offset_list[origin] + destination]
+        if destination < origin:
+            return self._lookup[self._offset_list[destination] + origin]
+        return 0
+
+    def row(self, origin: int) -> np.ndarray:
+        """The distances from the city with the given index to all cities, as an array"""
+        row = np.empty(len(self), dtype=self.dtype)
+        row[:origin] = self.values[self._offsets[:origin] + origin]
+        row[origin] = 0
+        start = self._offsets[origin] + origin + 1
+        row[origin + 1:] = self.values[start:start + len(self) - origin - 1]
+        return row
+
+    def pair_distances(self, origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+        """The distances between each pair of origin and destination cities"""
+        low, high = np.minimum(origins, destinations), np.maximum(origins, destinations)
+        # A pair of the same city looks up some other distance, which is then set to 0
+        distances = self.values[self._offsets[low] + high].astype(np.int64)
+        distances[low == high] = 0
+        return distances
+
+
+class _TriangularDistanceRow:
+    """Helper class for a row of a TriangularDistanceMatrix, looking up each distance by index
+    arithmetic, or gathering the whole row when used as an array"""
 
+    __slots__ = ('_distances', '_origin', '_lookup', '_offsets')
 
-def _manhattan_distance(city_a: City, city_b: City) -> int:
-    """Helper method to compute the manhattan distance between two cities, rounded to the nearest
+    def __init__(self, distances: TriangularDistanceMatrix, origin: int):
+        self._distances = distances
+        self._origin = origin
+        # pylint: disable=protected-access
+        self._lookup = distances._lookup
+        self._offsets = distances._offset_list
+
+    def __len__(self) -> int:
+        return len(self._distances)
+
+    def __getitem__(self, destination: int) -> float:
+        # The distance method, inlined for speed
+        origin = self._origin
+        try:
+            if origin < destination:
+                return self._lookup[self._offsets[origin] + destination]
+            if destination < origin:
+                return self._lookup[self._offsets[destination] + origin]
+            return 0
+        except (TypeError, ValueError):
+            return self._distances.row(origin)[destination]
+
+    def __array__(self, dtype: Optional[np.dtype] = None, copy: Optional[bool] = None
+                  ) -> np.ndarray:
+        row = self._distances.row(self._origin)
+        return row if dtype is None else row.astype(dtype)
+
+
+def city_coordinates(cities: Union[List[City], CityTable]) -> np.ndarray:
+    """Collect the coordinates of the cities into a single array.
+
+    Args:
+        cities: A list of cities, or a CityTable (whose coordinates are used as is)
+    Returns:
+        An n x 2 array with the x and y coordinates of each city
+    """
+    if isinstance(cities, CityTable):
+        return cities.coordinates
+    return np.array([(city.x, city.y) for city in cities], dtype=np.float64).reshape(-1, 2)
+
+
+def city_names(cities: Union[List[City], CityTable]) -> list:
+    """Collect the names of the cities into a single list.
+
+    Args:
+        cities: A list of cities, or a CityTable
+    Returns:
+        The name of each city
+    """
+    if isinstance(cities, CityTable):
+        return cities.names.tolist()
+    return [city.name for city in cities]
+
+
+def path_indexes(path: List[str], cities: Union[List[City], CityTable]) -> np.ndarray:
+    """Look up the index of each city of the path.
+
+    Args:
+        path: The list of city names in the order they should be visited
+        cities: All cities, as a list of City tuples or a CityTable
+    Returns:
+        The index of each city of the path, in the list of cities
+    """
+    names = np.asarray(city_names(cities))
+    order = np.argsort(names, kind='stable')
+    return order[np.searchsorted(names, np.asarray(path, dtype=names.dtype), sorter=order)]
+
+
+def pair_distances(distances: DistanceMatrix,
+                   origins: np.ndarray,
+                   destinations: np.ndarray) -> np.ndarray:
+    """Look up the distances between many pairs of cities at once.
+
+    Args:
+        distances: A matrix of distances between cities, or any object with a
+            pair_distances(origins, destinations) method, e.g. a LazyDistanceMatrix
+        origins: The indexes of the cities each distance starts from
+        destinations: The indexes of the cities each distance ends at
+    Returns:
+        An (integer) array with distances[origins[k]][destinations[k]] for every k
+    """
+    if hasattr(distances, 'pair_distances'):
+        return distances.pair_distances(origins, destinations)
+    return np.asarray(distances)[origins, destinations].astype(np.int64)
+
+
+def nearest_neighbors(cities: List[City],
+                      neighbors: int,
+                      distance_metric_key: str = 'euclidean') -> np.ndarray:
+    """Determine the nearest neighbors of every city, using a KD-tree over the coordinates.
+
+    Args:
+        cities: A list of cities to be visited
+        neighbors: The number of neighbors to find for each city (at most one less than the
+            number of cities)
+        distance_metric_key: The name of the distance metric to use
+    Returns:
+        An n x k array with the indexes of the k nearest neighbors of each city, ordered from
+            nearest to farthest.  A city is never its own neighbor.
+    """
+    coordinates = city_coordinates(cities)
+    neighbors = min(neighbors, len(coordinates) - 1)
+    if neighbors < 1:
+        return np.empty((len(coordinates), 0), dtype=int)
+
+    # Imported here, so that scipy is only loaded when candidate neighbors are used
+    from scipy.spatial import cKDTree  # pylint: disable=import-outside-toplevel
+
+    minkowski_p = {'euclidean': 2, 'manhattan': 1}[distance_metric_key]
+    _, indexes = cKDTree(coordinates).query(coordinates, k=neighbors + 1, p=minkowski_p)
+
+    # Cities at identical coordinates may be returned before the city itself, so remove the city
+    # wherever it appears, or else drop the farthest candidate
+    not_self = indexes != np.arange(len(coordinates))[:, np.newaxis]
+    not_self[not_self.all(axis=1), -1] = False
+    return indexes[not_self].reshape(len(coordinates), neighbors)
+
+
+def matrix_nearest_neighbors(distances: DistanceMatrix,
+                             neighbors: int,
+                             block_size: int = 1024) -> np.ndarray:
+    """Determine the nearest neighbors of every city from the rows of a distance matrix, e.g. a
+    precomputed matrix of distances that cannot be derived from coordinates.
+
+    Args:
+        distances: A symmetric matrix of distances between cities
+        neighbors: The number of neighbors to find for each city (at most one less than the
+            number of cities)
+        block_size: The number of rows searched at once, bounding the size of the intermediate
+            arrays
+    Returns:
+        An n x k array with the indexes of the k nearest neighbors of each city, ordered from
+            nearest to farthest.  A city is never its own neighbor.
+    """
+    count = len(distances)
+    neighbors = min(neighbors, count - 1)
+    if neighbors < 1:
+        return np.empty((count, 0), dtype=int)
+
+    indexes = np.empty((count, neighbors), dtype=np.int64)
+    for start in range(0, count, block_size):
+        stop = min(start + block_size, count)
+        block = np.array([np.asarray(distances[i]) for i in range(start, stop)], dtype=np.float64)
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        nearest = np.argpartition(block, neighbors - 1, axis=1)[:, :neighbors]
+        order = np.argsort(np.take_along_axis(block, nearest, axis=1), axis=1, kind='stable')
+        indexes[start:stop] = np.take_along_axis(nearest, order, axis=1)
+    return indexes
+
+
+def _outer_distances(distance_metric: Callable[[np.ndarray, np.ndarray], np.ndarray],
+                     origins: np.ndarray,
+                     destinations: np.ndarray) -> np.ndarray:
+    """Helper method to compute the distances from every origin to every destination."""
+    delta_x = origins[:, np.newaxis, 0] - destinations[np.newaxis, :, 0]
+    delta_y = origins[:, np.newaxis, 1] - destinations[np.newaxis, :, 1]
+    return distance_metric(delta_x, delta_y)
+
+
+def _euclidean_distances(delta_x: np.ndarray, delta_y: np.ndarray) -> np.ndarray:
+    """Helper method to compute euclidean distances from coordinate differences, rounded to the
+    nearest integer."""
+    return np.round(np.sqrt(delta_x * delta_x + delta_y * delta_y))
+
+
+def _manhattan_distances(delta_x: np.ndarray, delta_y: np.ndarray) -> np.ndarray:
+    """Helper method to compute manhattan distances from coordinate differences, truncated to an
     integer."""
-    delta_x = abs(city_a.x - city_b.x)
-    delta_y = abs(city_a.y - city_b.y)
-    return int(delta_x + delta_y)
+    return np.trunc(np.abs(delta_x) + np.abs(delta_y))
+
+
+def _check_dtype_capacity(distances: np.ndarray, dtype: np.dtype) -> None:
+    """Helper method to ensure that the distances can be stored with the given type."""
+    if np.issubdtype(dtype, np.integer) and distances.size:
+        if distances.max() > np.iinfo(dtype).max:
+            raise ValueError(f'Distances up to {distances.max():.0f} '
+                             f'do not fit in a {dtype.name} distance matrix')
+
+
+DISTANCE_METRICS = {
+    'euclidean': _euclidean_distances,
+    'manhattan': _manhattan_distances
+}
@@ -0,0 +1,161 @@
+"""
+Module for updating a solved path when cities are added or removed, without solving again from
+scratch
+"""
+from collections import namedtuple
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from traveling_salesperson import City, CityTable, SwapStatistics
+from traveling_salesperson.geography import (city_coordinates, city_names, nearest_neighbors,
+                                             pair_distances, update_distance_matrix)
+from traveling_salesperson.moves import CandidateLists, local_search
+from traveling_salesperson.tour import Tour
+
+
+Solution = namedtuple('Solution', 'cities distance_matrix path total_distance')
+
+
+def update_path(cities: Union[List[City], CityTable],
+                distance_matrix: np.ndarray,
+                path: List[str],
+                added_cities: Union[List[City], CityTable] = (),
+                removed: Sequence[str] = (),
+                neighbors: int = 10,
+                moves: Sequence[str] = ('2-opt',),
+                statistics: Optional[SwapStatistics] = None,
+                distance_metric_key: str = 'euclidean',
+                in_place: bool = False) -> Solution:
+    """Update a solved path for a changed list of cities: the removed cities are dropped from the
+    path, the added cities are inserted where they lengthen it the least, and the path is then
+    improved by a local search (see moves.local_search) starting from the changed edges only.
+
+    The added cities take the places of the removed cities in the list of cities (and the last
+    cities take the places left over), so that only the rows and columns of the distance matrix
+    of the cities that changed places are computed (see geography.update_distance_matrix).
+
+    Args:
+        cities: The cities of the solved path
+        distance_matrix: The (materialized) matrix of distances between the cities
+        path: The solved path, as the list of city names (see algorithm.determine_path)
+        added_cities: The cities to add
+        removed: The names of the cities to remove
+        neighbors: The number of candidate neighbors of each city, for the insertion and the
+            local search
+        moves: The local search moves (see moves.MOVES)
+        statistics: If given, updated with the number of moves evaluated and applied
+        distance_metric_key: The name of the distance metric the matrix was computed with
+        in_place: Whether to update the given distance matrix rather than a copy, when possible
+            (see geography.update_distance_matrix)
+    Returns:
+        The solution for the changed cities: the updated cities, their distance matrix, the
+            updated path (starting from the first kept city of the solved path) and its total
+            (closed) length
+    Raises:
+        ValueError: if a removed city is not one of the cities, or no city is left
+    """
+    names = city_names(cities)
+    indexes = {name: index for index, name in enumerate(names)}
+    unknown = [name for name in removed if name not in indexes]
+    if unknown:
+        raise ValueError(f'No cities named {unknown}')
+    added_names = city_names(added_cities)
+    if len(set(removed)) == len(names) and not added_names:
+        raise ValueError('No cities are left to visit')
+    sources = _city_sources(len(names), sorted(indexes[name] for name in set(removed)),
+                            len(added_names))
+    updated_cities = CityTable(
+        [names[source] if source < len(names) else added_names[source - len(names)]
+         for source in sources.tolist()],
+        np.concatenate((city_coordinates(cities), city_coordinates(added_cities)))[sources])
+    unchanged_count = min(len(names), len(sources))
+    changed = np.nonzero(sources[:unchanged_count] != np.arange(unchanged_count))[0]
+    distance_matrix = update_distance_matrix(distance_matrix, updated_cities, changed,
+                                             distance_metric_key, in_place)
+
+    # The index of each kept city among the updated cities, and -1 for the removed cities
+    new_indexes = np.full(len(names) + len(added_names), -1, dtype=np.int64)
+    new_indexes[sources] = np.arange(len(sources))
+    old_path = new_indexes[[indexes[name] for name in path]]
+    kept_path = old_path[old_path >= 0]
+    # The cities on either side of each removed city are joined by a new edge
+    joined = np.nonzero(old_path < 0)[0]
+    changed_nodes = set(old_path[(joined - 1) % len(old_path)].tolist()
+                        + old_path[(joined + 1) % len(old_path)].tolist())
+
+    candidates = nearest_neighbors(updated_cities, neighbors, distance_metric_key)
+    successors = np.full(len(sources), -1, dtype=np.int64)
+    successors[kept_path] = np.roll(kept_path, -1)
+    for city in new_indexes[len(names):].tolist():
+        previous = _cheapest_insertion(city, successors, distance_matrix, candidates)
+        successors[city], successors[previous] = successors[previous], city
+        changed_nodes.update((previous, city, successors[city]))
+    changed_nodes.discard(-1)
+
+    start = kept_path[0] if len(kept_path) else new_indexes[len(names)]
+    new_path = [start]
+    for _ in range(len(sources) - 1):
+        new_path.append(successors[new_path[-1]])
+    tour = Tour(new_path)
+    if len(tour) >= 5 and candidates.shape[1]:
+        local_search(tour, distance_matrix, CandidateLists(distance_matrix, candidates), moves,
+                     statistics, sorted(changed_nodes))
+    new_path = tour.to_list()
+
+    total_distance = int(pair_distances(distance_matrix, np.array(new_path),
+                                        np.roll(new_path, -1)).sum())
+    start_position = new_path.index(start)
+    new_path = new_path[start_position:] + new_path[:start_position]
+    updated_names = city_names(updated_cities)
+    return Solution(updated_cities, distance_matrix, [updated_names[i] for i in new_path],
+                    total_distance)
+
+
+def _city_sources(count: int, removed: List[int], added_count: int) -> np.ndarray:
+    """Helper method to lay out the updated list of cities: the added cities (numbered from count
+    on) take the places of the removed cities, or are appended, and the places left over are
+    taken by the last cities
+
+    Returns:
+        The index of the previous (or added) city at each index of the updated list of cities
+    """
+    sources = np.arange(count + added_count)
+    replaced = min(len(removed), added_count)
+    sources[removed[:replaced]] = sources[count:count + replaced]
+    sources = np.concatenate((sources[:count], sources[count + replaced:]))
+
+    left_over = np.array(removed[replaced:], dtype=np.int64)
+    if len(left_over):
+        updated_count = count - len(left_over)
+        is_left_over = np.zeros(count, dtype=bool)
+        is_left_over[left_over] = True
+        moved = np.nonzero(~is_left_over[updated_count:])[0] + updated_count
+        sources[left_over[left_over < updated_count]] = sources[moved]
+        sources = sources[:updated_count]
+    return sources
+
+
+def _cheapest_insertion(city: int,
+                        successors: np.ndarray,
+                        distance_matrix: np.ndarray,
+                        candidates: np.ndarray) -> int:
+    """Helper method to find the city of the path after which the given city lengthens the path
+    the least, among the edges next to its candidate neighbors (or all edges, if none of its
+    candidates is on the path yet)"""
+    on_path = successors >= 0
+    if not on_path.any():
+        # The first city of an empty path is only connected to itself
+        successors[city] = city
+        return city
+    nearby = candidates[city][on_path[candidates[city]]]
+    if len(nearby):
+        predecessors = np.nonzero(np.isin(successors, nearby))[0]
+        origins = np.unique(np.concatenate((nearby, predecessors)))
+    else:
+        origins = np.nonzero(on_path)[0]
+    destinations = successors[origins]
+    costs = (pair_distances(distance_matrix, np.full(len(origins), city), origins)
+             + pair_distances(distance_matrix, np.full(len(origins), city), destinations)
+             - pair_distances(distance_matrix, origins, destinations))
+    return origins[np.argmin(costs)]
@@ -0,0 +1,181 @@
+"""
+Module for reading precomputed distance matrices, e.g. road-network distances that cannot be
+derived from coordinates, without copying them into a new array where possible:
+
+    .npy files: a full (n x n) matrix, or a condensed upper triangle (see
+        geography.TriangularDistanceMatrix), opened memory-mapped
+    .tsp files: TSPLIB instances of EDGE_WEIGHT_TYPE EXPLICIT, whose triangular formats are kept
+        as a condensed upper triangle
+    any other file: raw binary values of a full matrix or a condensed upper triangle, opened
+        memory-mapped
+"""
+from collections import namedtuple
+import math
+import re
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from traveling_salesperson.geography import TriangularDistanceMatrix
+
+
+MATRIX_LAYOUTS = ('full', 'upper')
+
+# The order each TSPLIB EDGE_WEIGHT_FORMAT lists the distances in, for a symmetric matrix: the
+# row-major (strict) upper triangle, the row-major lower triangle, or either with the diagonal
+TSPLIB_FORMATS = {
+    'FULL_MATRIX': 'full',
+    'UPPER_ROW': 'upper', 'LOWER_COL': 'upper',
+    'LOWER_ROW': 'lower', 'UPPER_COL': 'lower',
+    'UPPER_DIAG_ROW': 'upper_diagonal', 'LOWER_DIAG_COL': 'upper_diagonal',
+    'LOWER_DIAG_ROW': 'lower_diagonal', 'UPPER_DIAG_COL': 'lower_diagonal'
+}
+
+MatrixInstance = namedtuple('MatrixInstance', 'distances names coordinates')
+
+# The number of values checked to be whole numbers at a time, to bound the memory of the check
+WHOLE_CHECK_CHUNK = 1 << 20
+
+_SECTION = re.compile(r'^[ \t]*([A-Z_]+_SECTION|EOF)[ \t]*:?[ \t]*$', re.MULTILINE)
+
+
+def read_matrix(filename: str,
+                dtype: np.dtype = np.float64,
+                layout: Optional[str] = None) -> MatrixInstance:
+    """Read a precomputed, symmetric, distance matrix
+
+    Args:
+        filename: The name of the .npy, TSPLIB .tsp or raw binary file
+        dtype: The type of the values of a raw binary file, and the type the distances of a
+            TSPLIB file are stored with (the type of a .npy file is read from its header)
+        layout: Whether a raw binary file holds a 'full' matrix or a condensed 'upper' triangle.
+            By default, a file holding a square number of values is read as a full matrix.
+    Returns:
+        A tuple with
+            (1) the distances: a (memory-mapped) n x n array, or a TriangularDistanceMatrix
+            (2) the name of each city: the TSPLIB node numbers, or else the indexes of the rows
+            (3) an n x 2 array with the coordinates of each city, if the TSPLIB file has a
+                NODE_COORD_SECTION or DISPLAY_DATA_SECTION, or else None
+    Raises:
+        ValueError: if the file does not hold a matrix, or if any distance is not a whole number
+            (which the path lengths, and the lower bound, would not agree on)
+    """
+    if filename.endswith('.tsp'):
+        return _read_tsplib(filename, np.dtype(dtype))
+    if filename.endswith('.npy'):
+        values = np.load(filename, mmap_mode='r')
+        if values.ndim == 1:
+            layout = 'upper'
+        elif values.ndim != 2 or values.shape[0] != values.shape[1]:
+            raise ValueError(f'{filename} holds a {values.shape} array instead of a matrix')
+    else:
+        values = np.memmap(filename, dtype=dtype, mode='r')
+    _check_whole(values, filename)
+    distances = _from_values(values, layout, filename)
+    return MatrixInstance(distances, list(range(len(distances))), None)
+
+
+def _from_values(values: np.ndarray,
+                 layout: Optional[str],
+                 filename: str) -> Union[np.ndarray, TriangularDistanceMatrix]:
+    """Helper method to view the values of a matrix in the given (or inferred) layout"""
+    if values.ndim == 2:
+        return values
+    count = math.isqrt(len(values))
+    if layout == 'full' or (layout is None and count * count == len(values)):
+        if count * count != len(values):
+            raise ValueError(f'The {len(values)} values of {filename} are not a square matrix')
+        return values.reshape(count, count)
+    try:
+        return TriangularDistanceMatrix(values)
+    except ValueError as error:
+        raise ValueError(f'{filename}: {error}') from error
+
+
+def _check_whole(values: np.ndarray, filename: str) -> None:
+    """Helper method to reject fractional distances, which the solver would truncate, a chunk
+    of values at a time"""
+    if np.issubdtype(values.dtype, np.integer):
+        return
+    values = values.reshape(-1)
+    for start in range(0, len(values), WHOLE_CHECK_CHUNK):
+        chunk = values[start:start + WHOLE_CHECK_CHUNK]
+        if not np.all(np.mod(chunk, 1) == 0):
+            raise ValueError(f'{filename} holds distances that are not whole numbers; scale them '
+                             f'to a smaller unit and round them first')
+
+
+def _read_tsplib(filename: str, dtype: np.dtype) -> MatrixInstance:
+    """Helper method to read a TSPLIB instance with explicit edge weights"""
+    with open(filename) as file:
+        parts = _SECTION.split(file.read())
+    header = {}
+    for line in parts[0].splitlines():
+        keyword, _, value = line.partition(':')
+        if keyword.strip():
+            header[keyword.strip().upper()] = value.strip()
+    sections = dict(zip(parts[1::2], parts[2::2]))
+
+    if header.get('EDGE_WEIGHT_TYPE', '').upper() != 'EXPLICIT':
+        raise ValueError(f'{filename} does not have EDGE_WEIGHT_TYPE: EXPLICIT, read the '
+                         f'coordinates from a csv file instead')
+    edge_weight_format = header.get('EDGE_WEIGHT_FORMAT', '').upper()
+    if edge_weight_format not in TSPLIB_FORMATS:
+        raise ValueError(f'{filename} has an unsupported EDGE_WEIGHT_FORMAT: '
+                         f'{edge_weight_format or None}')
+    if 'DIMENSION' not in header or 'EDGE_WEIGHT_SECTION' not in sections:
+        raise ValueError(f'{filename} has no DIMENSION or EDGE_WEIGHT_SECTION')
+    count = int(header['DIMENSION'])
+
+    values = np.fromstring(sections['EDGE_WEIGHT_SECTION'], dtype=np.float64, sep=' ')
+    order = TSPLIB_FORMATS[edge_weight_format]
+    expected = {'full': count * count, 'upper': count * (count - 1) // 2,
+                'lower': count * (count - 1) // 2, 'upper_diagonal': count * (count + 1) // 2,
+                'lower_diagonal': count * (count + 1) // 2}[order]
+    if len(values) != expected:
+        raise ValueError(f'{filename} has {len(values)} edge weights instead of {expected}')
+    _check_whole(values, filename)
+    if np.issubdtype(dtype, np.integer) and len(values) and values.max() > np.iinfo(dtype).max:
+        raise ValueError(f'Distances up to {values.max():.0f} do not fit in a {dtype.name} '
+                         f'distance matrix')
+
+    if order == 'full':
+        distances = values.astype(dtype).reshape(count, count)
+    else:
+        distances = TriangularDistanceMatrix(_condensed(values.astype(dtype), count, order))
+
+    names = list(range(1, count + 1))
+    coordinates = None
+    for section in ('NODE_COORD_SECTION', 'DISPLAY_DATA_SECTION'):
+        if section in sections:
+            names, coordinates = _read_nodes(sections[section], count, filename)
+            break
+    return MatrixInstance(distances, names, coordinates)
+
+
+def _condensed(values: np.ndarray, count: int, order: str) -> np.ndarray:
+    """Helper method to lay out the values of a triangular TSPLIB format as the condensed upper
+    triangle"""
+    if order == 'upper':
+        return values
+    diagonal = order.endswith('diagonal')
+    if order.startswith('upper'):
+        rows, columns = np.triu_indices(count)
+    else:
+        rows, columns = np.tril_indices(count, 0 if diagonal else -1)
+    if diagonal:
+        off_diagonal = rows != columns
+        rows, columns, values = rows[off_diagonal], columns[off_diagonal], values[off_diagonal]
+    low, high = np.minimum(rows, columns), np.maximum(rows, columns)
+    condensed = np.empty(count * (count - 1) // 2, dtype=values.dtype)
+    condensed[low * (2 * count - low - 1) // 2 + high - low - 1] = values
+    return condensed
+
+
+def _read_nodes(section: str, count: int, filename: str) -> Tuple[list, np.ndarray]:
+    """Helper method to read the node numbers and coordinates of a TSPLIB node section"""
+    nodes = np.fromstring(section, dtype=np.float64, sep=' ')
+    if len(nodes) != 3 * count:
+        raise ValueError(f'{filename} does not list the coordinates of its {count} nodes')
+    nodes = nodes.reshape(count, 3)
+    return nodes[:, 0].astype(np.int64).tolist(), nodes[:, 1:]
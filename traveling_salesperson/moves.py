@@ -0,0 +1,238 @@
+"""
+Module for the local search moves (2-opt, Or-opt and segment insertion), applied by a
+first-improvement search driven by candidate neighbors
+"""
+from collections import deque, namedtuple
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from traveling_salesperson import DistanceMatrix, SwapStatistics
+from traveling_salesperson.geography import pair_distances
+from traveling_salesperson.tour import Tour
+
+
+# An improving move: the (negative) change in the length of the closed path, the nodes whose
+# edges are changed by the move, and a function applying the move to the tour
+Move = namedtuple('Move', 'delta nodes apply')
+
+# The longest chain of nodes moved by the Or-opt and segment insertion moves
+MAX_SEGMENT_LENGTH = 3
+
+
+class CandidateLists:
+    """The candidate neighbors of every node, with the distances to them, as plain lists for fast
+    access from the moves"""
+
+    def __init__(self, distance_matrix: DistanceMatrix, neighbors: np.ndarray):
+        """
+        Args:
+            distance_matrix: A symmetric matrix of distances between nodes
+            neighbors: An n x k array with the candidate neighbors of each node, nearest first
+        """
+        origins = np.repeat(np.arange(len(neighbors)), neighbors.shape[1])
+        self.nodes = neighbors.tolist()
+        self.distances = pair_distances(distance_matrix, origins,
+                                        neighbors.ravel()).reshape(neighbors.shape).tolist()
+
+
+def two_opt_move(node: int,
+                 tour: Tour,
+                 distance_matrix: DistanceMatrix,
+                 candidates: CandidateLists,
+                 statistics: SwapStatistics) -> Optional[Move]:
+    """Find the first 2-opt move (swap) connecting the node to one of its candidates that
+    shortens the path.  The edges following (or preceding) the node and the candidate are
+    replaced by the edge between them and the edge between their former neighbors.
+
+    Args:
+        node: The node to find a move for
+        tour: The current path
+        distance_matrix: A symmetric matrix of distances between nodes
+        candidates: The candidate neighbors of every node
+        statistics: Updated with the number of moves evaluated
+    Returns:
+        The improving move, or None if there is none
+    """
+    node_position = tour.position(node)
+    for forward in (True, False):
+        step = tour.next if forward else tour.prev
+        adjacent = step(node)
+        adjacent_distance = int(distance_matrix[node][adjacent])
+        for candidate, candidate_distance in zip(candidates.nodes[node],
+                                                 candidates.distances[node]):
+            if candidate_distance >= adjacent_distance:
+                break
+            candidate_adjacent = step(candidate)
+            statistics.evaluated += 1
+            delta = (candidate_distance
+                     + int(distance_matrix[adjacent][candidate_adjacent])
+                     - adjacent_distance
+                     - int(distance_matrix[candidate][candidate_adjacent]))
+            if delta < 0:
+                i, j = sorted((node_position, tour.position(candidate)))
+                if not forward:
+                    i, j = i - 1, j - 1
+                return Move(delta, (node, adjacent, candidate, candidate_adjacent),
+                            partial(tour.reverse, i + 1, j))
+    return None
+
+
+def or_opt_move(node: int,
+                tour: Tour,
+                distance_matrix: DistanceMatrix,
+                candidates: CandidateLists,
+                statistics: SwapStatistics) -> Optional[Move]:
+    """Find the first Or-opt move that shortens the path: a chain of 1 to 3 nodes, starting or
+    ending at the node, is moved (in the same direction) next to a candidate of its first or last
+    node.
+
+    Args:
+        node: The node to find a move for
+        tour: The current path
+        distance_matrix: A symmetric matrix of distances between nodes
+        candidates: The candidate neighbors of every node
+        statistics: Updated with the number of moves evaluated
+    Returns:
+        The improving move, or None if there is none
+    """
+    return _segment_insertion(node, tour, distance_matrix, candidates, statistics, reverse=False)
+
+
+def segment_insertion_move(node: int,
+                           tour: Tour,
+                           distance_matrix: DistanceMatrix,
+                           candidates: CandidateLists,
+                           statistics: SwapStatistics) -> Optional[Move]:
+    """Find the first 3-opt segment insertion move that shortens the path: a chain of 1 to 3
+    nodes, starting or ending at the node, is reversed and moved next to a candidate of its first
+    or last node.  Together with the Or-opt moves, these are all the ways to insert a short
+    segment elsewhere in the path.
+
+    Args:
+        node: The node to find a move for
+        tour: The current path
+        distance_matrix: A symmetric matrix of distances between nodes
+        candidates: The candidate neighbors of every node
+        statistics: Updated with the number of moves evaluated
+    Returns:
+        The improving move, or None if there is none
+    """
+    return _segment_insertion(node, tour, distance_matrix, candidates, statistics, reverse=True)
+
+
+def _segment_insertion(node: int,
+                       tour: Tour,
+                       distance_matrix: DistanceMatrix,
+                       candidates: CandidateLists,
+                       statistics: SwapStatistics,
+                       reverse: bool) -> Optional[Move]:
+    """Helper method to find the first improving move of a segment, from first to last (following
+    the path forward), to between two adjacent nodes u and v (u before v)"""
+    node_position = tour.position(node)
+    # A single reversed node is the same as a single node keeping its direction
+    for length in range(2 if reverse else 1, min(MAX_SEGMENT_LENGTH, len(tour) - 3) + 1):
+        # Segments starting at the node, and ending at the node
+        first_positions = {node_position, node_position - length + 1}
+        for first_position in sorted(first_positions, reverse=True):
+            first = tour[first_position]
+            last = tour[(first_position + length - 1) % len(tour)]
+            segment = set(tour[(first_position + np.arange(length)) % len(tour)].tolist())
+            before, after = tour.prev(first), tour.next(last)
+            removed_gain = (int(distance_matrix[before][first])
+                            + int(distance_matrix[last][after])
+                            - int(distance_matrix[before][after]))
+
+            # Insertions where an end of the segment is connected to one of its candidates: the
+            # new edge (u, first) or (last, v) keeps the direction, (u, last) or (first, v)
+            # reverses it
+            ends = ((last, first) if reverse else (first, last))
+            for end, connect_after in zip(ends, (True, False)):
+                for candidate, candidate_distance in zip(candidates.nodes[end],
+                                                         candidates.distances[end]):
+                    if candidate_distance >= removed_gain:
+                        break
+                    if connect_after:
+                        u, v = candidate, tour.next(candidate)
+                        other_end = last if end == first else first
+                        added = candidate_distance + int(distance_matrix[other_end][v])
+                    else:
+                        u, v = tour.prev(candidate), candidate
+                        other_end = first if end == last else last
+                        added = int(distance_matrix[u][other_end]) + candidate_distance
+                    if u in segment or v in segment:
+                        continue
+                    statistics.evaluated += 1
+                    delta = added - int(distance_matrix[u][v]) - removed_gain
+                    if delta < 0:
+                        return Move(delta, (before, first, last, after, u, v),
+                                    partial(tour.move, first_position % len(tour),
+                                            tour.position(last), tour.position(u), reverse))
+    return None
+
+
+MOVES: Dict[str, Callable[..., Optional[Move]]] = {
+    '2-opt': two_opt_move,
+    'or-opt': or_opt_move,
+    'segment-insertion': segment_insertion_move
+}
+
+
+def local_search(tour: Tour,
+                 distance_matrix: DistanceMatrix,
+                 candidates: CandidateLists,
+                 moves: Sequence[str] = ('2-opt',),
+                 statistics: Optional[SwapStatistics] = None,
+                 nodes: Optional[Iterable[int]] = None,
+                 target_delta: Optional[float] = None) -> int:
+    """Improve the tour (in place) with the first improving move found, until no further
+    improvement can be found (or the target change in length is reached).
+
+    Nodes wait in a queue to be examined.  The moves are tried, in the given order, for the node
+    at the front of the queue.  A node without any improving move is dropped from the queue (its
+    "don't-look bit" is set), and is only queued again when one of its edges is changed by a later
+    move.
+
+    Args:
+        tour: The path to improve
+        distance_matrix: A symmetric matrix of distances between nodes
+        candidates: The candidate neighbors of every node
+        moves: The names of the moves to try (see MOVES)
+        statistics: If given, updated with the number of moves evaluated and applied
+        nodes: The nodes to examine first, or None for all nodes
+        target_delta: If given, stop as soon as the length of the closed path has changed by
+            this much (or more), e.g. to reach a target length
+    Returns:
+        The (negative) change in the length of the closed path
+    """
+    statistics = statistics if statistics is not None else SwapStatistics()
+    find_moves = [MOVES[move] for move in moves]
+    queue = deque(tour if nodes is None else nodes)
+    queued = np.zeros(len(tour), dtype=bool)
+    queued[list(queue)] = True
+
+    total_delta = 0
+    while queue and (target_delta is None or total_delta > target_delta):
+        node = queue.popleft()
+        queued[node] = False
+        for find_move in find_moves:
+            move = find_move(node, tour, distance_matrix, candidates, statistics)
+            if move is not None:
+                break
+        else:
+            continue
+
+        move.apply()
+        total_delta += move.delta
+        statistics.applied += 1
+        _requeue(queue, queued, [node, *move.nodes])
+    return total_delta
+
+
+def _requeue(queue: deque, queued: np.ndarray, nodes: List[int]) -> None:
+    """Helper method to clear the don't-look bits of the given nodes"""
+    for node in nodes:
+        if not queued[node]:
+            queued[node] = True
+            queue.append(node)
@@ -0,0 +1,130 @@
+"""
+Module for solving in parallel, with several (multi-start) runs sharing one distance matrix
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from traveling_salesperson import City, DistanceMatrix, SwapStatistics
+from traveling_salesperson.algorithm import determine_path
+from traveling_salesperson.geography import TriangularDistanceMatrix
+
+
+RunSummary = namedtuple('RunSummary',
+                        'run worker start seed total_distance seconds evaluated applied kicks')
+
+# The state of each worker process, set once by _attach_worker
+_worker = {}
+
+
+class SharedDistanceMatrix:
+    """A copy of a distance matrix in shared memory, which worker processes attach to by name
+    instead of receiving their own (pickled) copy.  Use as a context manager, so that the shared
+    memory is released afterwards."""
+
+    def __init__(self, distance_matrix: DistanceMatrix):
+        """
+        Args:
+            distance_matrix: A symmetric matrix of distances between cities, or a
+                TriangularDistanceMatrix (whose condensed values are shared)
+        """
+        self.triangular = isinstance(distance_matrix, TriangularDistanceMatrix)
+        distance_matrix = (distance_matrix.values if self.triangular
+                           else np.asarray(distance_matrix))
+        self.shape = distance_matrix.shape
+        self.dtype = distance_matrix.dtype
+        self._memory = shared_memory.SharedMemory(create=True, size=max(distance_matrix.nbytes, 1))
+        self.name = self._memory.name
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._memory.buf)
+        self.array[:] = distance_matrix
+
+    def __enter__(self) -> 'SharedDistanceMatrix':
+        return self
+
+    def __exit__(self, *_) -> None:
+        del self.array
+        self._memory.close()
+        self._memory.unlink()
+
+
+def multi_start_path(cities: List[City],
+                     distance_matrix: DistanceMatrix,
+                     runs: int,
+                     workers: Optional[int] = None,
+                     start: int = 0,
+                     seed: int = 0,
+                     summaries: Optional[List[RunSummary]] = None,
+                     **options: Any) -> Tuple[List[str], int]:
+    """Determine the close-to-optimal path with several independent runs of determine_path, in a
+    pool of worker processes attached to a single shared copy of the distance matrix, and keep
+    the shortest path.
+
+    The first run starts from the given start city, and every other run from a different,
+    randomly chosen, city.  Each run also uses its own seed for the iterated local search.
+
+    Args:
+        cities: A list of cities to be visited
+        distance_matrix: A symmetric matrix of distances between cities
+        runs: The number of runs
+        workers: The number of worker processes, or None for one per CPU
+        start: The index of the city to start the first run from, and the final path from
+        seed: The seed for choosing the start cities, and for the runs (seed, seed + 1, ...)
+        summaries: If given, extended with the timing and quality of each run
+        options: Passed on to determine_path (e.g. neighbors, strategy, moves, time_limit)
+    Returns:
+        A tuple with
+            (1) the list of city names of the shortest path found, starting from the start city
+            (2) the total path length
+    """
+    other_cities = np.delete(np.arange(len(cities)), start)
+    starts = [start] + np.random.RandomState(seed).permutation(other_cities).tolist()
+    tasks = [(run, starts[run % len(starts)], seed + run) for run in range(runs)]
+
+    with SharedDistanceMatrix(distance_matrix) as shared_matrix:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_attach_worker,
+                                 initargs=(shared_matrix.name, shared_matrix.shape,
+                                           shared_matrix.dtype, shared_matrix.triangular, cities,
+                                           options)) as executor:
+            results = list(executor.map(_solve, tasks))
+
+    best_path, best_distance, _ = min(results, key=lambda result: result[1])
+    if summaries is not None:
+        summaries.extend(summary for _, _, summary in results)
+
+    start_position = best_path.index(cities[start].name)
+    return best_path[start_position:] + best_path[:start_position], best_distance
+
+
+def _attach_worker(name: str,
+                   shape: Tuple[int, ...],
+                   dtype: np.dtype,
+                   triangular: bool,
+                   cities: List[City],
+                   options: Dict[str, Any]) -> None:
+    """Helper method to attach a worker process to the shared distance matrix"""
+    memory = shared_memory.SharedMemory(name=name)
+    distances = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    _worker.update(memory=memory,
+                   distances=TriangularDistanceMatrix(distances) if triangular else distances,
+                   cities=cities,
+                   options=options)
+
+
+def _solve(task: Tuple[int, int, int]) -> Tuple[List[str], int, RunSummary]:
+    """Helper method to run determine_path in a worker process"""
+    run, start, seed = task
+    statistics = SwapStatistics()
+    start_time = time.perf_counter()
+    path, total_distance = determine_path(_worker['cities'], _worker['distances'],
+                                          statistics=statistics, start=start, seed=seed,
+                                          **_worker['options'])
+    summary = RunSummary(run, os.getpid(), start, seed, total_distance,
+                         time.perf_counter() - start_time, statistics.evaluated, statistics.applied,
+                         statistics.kicks)
+    return path, total_distance, summary
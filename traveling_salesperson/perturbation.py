@@ -0,0 +1,48 @@
+"""
+Module for the perturbations ("kicks") used to escape local optima of the local search
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from traveling_salesperson import DistanceMatrix
+from traveling_salesperson.tour import Tour
+
+
+# The largest number of positions spanned by the segments of a double-bridge kick
+DOUBLE_BRIDGE_WINDOW = 50
+
+
+def double_bridge(tour: Tour,
+                  distance_matrix: DistanceMatrix,
+                  random: np.random.RandomState,
+                  window: int = DOUBLE_BRIDGE_WINDOW) -> Tuple[int, List[int]]:
+    """Apply a random double-bridge kick to the tour (in place): the path A B C D becomes A C B D.
+    The segments B and C are chosen close together, so the kick stays local, and so does the
+    local search repairing it.
+
+    Args:
+        tour: The tour to perturb
+        distance_matrix: A symmetric matrix of distances between nodes
+        random: The source of randomness
+        window: The largest number of positions spanned by the segments B and C
+    Returns:
+        A tuple with
+            (1) the change in the length of the closed path
+            (2) the nodes whose edges were changed
+    """
+    nodes = len(tour)
+    limit = min(window, nodes - 2)
+    if limit < 2:
+        return 0, []
+
+    i = random.randint(nodes)
+    j_offset, k_offset = np.sort(random.choice(np.arange(1, limit + 1), 2, replace=False))
+    i, j, k = i, (i + j_offset) % nodes, (i + k_offset) % nodes
+    a, b, c, d, e, f = tour.order[[i, (i + 1) % nodes, j, (j + 1) % nodes, k, (k + 1) % nodes]]
+
+    delta = (int(distance_matrix[a][d]) + int(distance_matrix[e][b]) + int(distance_matrix[c][f])
+             - int(distance_matrix[a][b]) - int(distance_matrix[c][d])
+             - int(distance_matrix[e][f]))
+    tour.move((i + 1) % nodes, j, k)
+    return delta, [a, b, c, d, e, f]
@@ -1,29 +1,117 @@
 """
 Module for plotting the result of the algorithm
 """
+from multiprocessing import Process
 import os
-from typing import List
+from typing import List, Optional, Union
 
-import matplotlib.pyplot as plt
+import numpy as np
 
-from traveling_salesperson import City
+from traveling_salesperson import City, CityTable
+from traveling_salesperson.geography import city_coordinates, path_indexes
 
 
-def plot_path(filename: str, path: List[str], cities: List[City], total_distance: int) -> None:
+IMAGE_FORMATS = ('png', 'svg')
+
+# Above these numbers of cities, the cities are no longer marked, and the path is decimated
+MAX_MARKERS = 2000
+DEFAULT_MAX_POINTS = 20000
+
+
+def plot_path(filename: str,
+              path: List[str],
+              cities: Union[List[City], CityTable],
+              total_distance: int,
+              image_format: str = 'png',
+              max_points: Optional[int] = DEFAULT_MAX_POINTS,
+              background: bool = False) -> Optional[Process]:
     """Construct and save a plot of the path connecting all cities.
 
     Args:
         filename: The name to use when saving the file
         path: The list of city names in the order they should be visited
-        cities: The list of all City tuples
+        cities: All cities, as a list of City tuples or a CityTable
         total_distance: The total distance of the path
+        image_format: The format of the image, 'png' or 'svg'
+        max_points: The maximum number of cities drawn along the path (see decimate), or None to
+            draw all of them
+        background: Whether to render the image in a separate process, instead of waiting for it
+    Returns:
+        The process rendering the image (to be joined), if in the background, otherwise None
+    """
+    tour = path_indexes(path, cities)
+    coordinates = city_coordinates(cities)
+    if not background:
+        plot_tour(filename, tour, coordinates, total_distance, image_format, max_points)
+        return None
+    process = Process(target=plot_tour,
+                      args=(filename, tour, coordinates, total_distance, image_format, max_points))
+    process.start()
+    return process
+
+
+def plot_tour(filename: str,
+              tour: np.ndarray,
+              coordinates: np.ndarray,
+              total_distance: int,
+              image_format: str = 'png',
+              max_points: Optional[int] = DEFAULT_MAX_POINTS) -> str:
+    """Construct and save a plot of the tour, drawn as a single collection of line segments, with
+    the cities marked unless there are too many of them.
+
+    Args:
+        filename: The name to use when saving the file
+        tour: The indexes of the cities in the order they are visited
+        coordinates: An n x 2 array with the x and y coordinates of each city
+        total_distance: The total distance of the tour
+        image_format: The format of the image, 'png' or 'svg'
+        max_points: The maximum number of cities drawn along the tour (see decimate), or None to
+            draw all of them
+    Returns:
+        The name of the saved image
+    Raises:
+        ValueError: if the image format is unknown
     """
-    fig, axis = plt.subplots(1, 1, figsize=(9, 6))
-    city_dict = {city.name: (city.x, city.y) for city in cities}
-    x_coords, y_coords = zip(*[city_dict[city_name] for city_name in path + [path[0]]])
-    axis.plot(x_coords, y_coords, 'ro', ls='-')
-    axis.set_title(f'{filename} solved distance = {total_distance}')
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f'Unknown image format: {image_format}')
+    # Imported here, as matplotlib takes longer to import than a small instance takes to solve.
+    # The figure is drawn without pyplot, so it neither needs nor changes an interactive backend
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    points = coordinates[decimate(np.asarray(tour), max_points)]
+    points = np.concatenate((points, points[:1]))
+    marked = len(tour) <= MAX_MARKERS
+
+    fig = Figure(figsize=(9, 6))
+    axis = fig.subplots(1, 1)
+    axis.add_collection(LineCollection(np.stack((points[:-1], points[1:]), axis=1),
+                                       colors='r', linewidths=1.5 if marked else 0.3))
+    if marked:
+        axis.plot(points[:, 0], points[:, 1], 'ro', ls='')
+    axis.autoscale_view()
+    title = f'{filename} solved distance = {total_distance}'
+    if len(points) - 1 < len(tour):
+        title += f' ({len(points) - 1} of {len(tour)} cities shown)'
+    axis.set_title(title)
     axis.set_xlabel('x coordinate')
     axis.set_ylabel('y coordinate')
-    fig.savefig(os.path.join('results', f'{filename}_path.png'))
-    plt.close(fig)
+    image_filename = os.path.join('results', f'{filename}_path.{image_format}')
+    fig.savefig(image_filename)
+    return image_filename
+
+
+def decimate(tour: np.ndarray, max_points: Optional[int]) -> np.ndarray:
+    """Keep every k-th city of the tour, for the smallest k leaving at most max_points cities, so
+    that huge tours can be drawn (in order) in a reasonable time and file size.
+
+    Args:
+        tour: The indexes of the cities in the order they are visited
+        max_points: The maximum number of cities kept, or None to keep all of them
+    Returns:
+        The indexes of the kept cities, in the order they are visited
+    """
+    if max_points is None or len(tour) <= max_points:
+        return tour
+    return tour[::-(-len(tour) // max_points)]
@@ -0,0 +1,149 @@
+"""
+Module for the optional instrumentation of a run: the time and memory of each phase, and the
+trajectory of the path length
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+Phase = namedtuple('Phase', 'name seconds peak_memory_mb')
+
+# The profiler of the current run, or None when profiling is disabled
+_profiler = None
+
+
+class Profiler:
+    """Records the phases of a run, and the length of the (closed) path as it improves"""
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Args:
+            trace_memory: Whether to trace the memory allocated within each phase (with
+                tracemalloc, which slows down the allocation of Python objects)
+        """
+        self.start_time = time.perf_counter()
+        self.phases = []
+        self.trajectory = []
+        self.trace_memory = trace_memory
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        # The highest traced memory of each enclosing phase, before the phases nested in it
+        self._phase_peaks = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed code as the named phase, along with the peak memory allocated while
+        it runs (Python objects and numpy arrays, but not memory-mapped files), if memory is
+        traced.  The peak of a phase includes the memory still held from earlier phases, and that
+        of its nested phases."""
+        start_time = time.perf_counter()
+        if self.trace_memory:
+            self._raise_enclosing_peak(tracemalloc.get_traced_memory()[1])
+            self._phase_peaks.append(0)
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak_mb = None
+            if self.trace_memory:
+                peak = max(self._phase_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                self._raise_enclosing_peak(peak)
+                peak_mb = peak / 2 ** 20
+            self.phases.append(Phase(name, time.perf_counter() - start_time, peak_mb))
+
+    def record(self, total_distance: float) -> None:
+        """Record the current length of the path, with the time since the start of the run"""
+        self.trajectory.append((time.perf_counter() - self.start_time, int(total_distance)))
+
+    def report(self, **fields: Any) -> Dict[str, Any]:
+        """The machine-readable report of the run
+
+        Args:
+            fields: Other fields of the report, e.g. the options and results of the run
+        Returns:
+            A (JSON serializable) dictionary with the given fields, the phases and the trajectory
+        """
+        return dict(fields,
+                    phases=[phase._asdict() for phase in self.phases],
+                    trajectory=[list(point) for point in self.trajectory])
+
+    def _raise_enclosing_peak(self, peak: int) -> None:
+        """Helper method to keep the peak traced memory of the enclosing phase, if any, before the
+        peak is reset for a nested phase"""
+        if self._phase_peaks:
+            self._phase_peaks[-1] = max(self._phase_peaks[-1], peak)
+
+    def close(self) -> None:
+        """Stop tracing the memory, if the profiler started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def enable(profiler: Optional[Profiler] = None) -> Profiler:
+    """Start profiling a new run
+
+    Args:
+        profiler: The profiler to record the run with, e.g. one reporting the path lengths as
+            they are recorded, or None for a new Profiler
+    Returns:
+        The profiler recording the run
+    """
+    global _profiler  # pylint: disable=global-statement
+    _profiler = profiler if profiler is not None else Profiler()
+    return _profiler
+
+
+def disable() -> None:
+    """Stop profiling"""
+    global _profiler  # pylint: disable=global-statement
+    if _profiler is not None:
+        _profiler.close()
+    _profiler = None
+
+
+@contextmanager
+def suspended() -> Iterator[None]:
+    """Stop profiling within the enclosed code, e.g. while solving sub-problems whose phases and
+    path lengths are not those of the run"""
+    global _profiler  # pylint: disable=global-statement
+    profiler, _profiler = _profiler, None
+    try:
+        yield
+    finally:
+        _profiler = profiler
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed code as the named phase, if profiling is enabled (see Profiler.phase)"""
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.phase(name):
+            yield
+
+
+def record(total_distance: float) -> None:
+    """Record the current length of the path, if profiling is enabled (see Profiler.record)"""
+    if _profiler is not None:
+        _profiler.record(total_distance)
+
+
+def peak_memory_mb() -> Optional[float]:
+    """The peak resident memory of the process so far, in MB, or None if it is not available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and in kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
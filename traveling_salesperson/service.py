@@ -0,0 +1,545 @@
+"""
+Module for a long-running solver service: an HTTP/JSON interface (on asyncio, without any other
+dependency) to a bounded pool of worker processes, with a cache of the most recent results
+
+    POST /jobs                  Solve an instance, given inline or by file name (see parse_job)
+    GET  /jobs/<id>             The status of a job, and its result once it is done
+    GET  /jobs/<id>/progress    Stream the path length of a job as it improves, one line of JSON
+                                per improvement, followed by the status and result of the job
+    GET  /status                The number of queued and running jobs, and the cache statistics
+"""
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+from http import HTTPStatus
+import itertools
+import json
+import multiprocessing
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import click
+import numpy as np
+
+from traveling_salesperson import CityTable, profiling, SwapStatistics
+from traveling_salesperson.algorithm import (CONSTRUCTIONS, determine_path, MOVE_SET,
+                                             SWAP_STRATEGIES)
+from traveling_salesperson.etl import etl, load, transform
+from traveling_salesperson.geography import (city_names, DISTANCE_METRICS, distance_matrix,
+                                             nearest_neighbors)
+
+
+DEFAULT_PORT = 8080
+
+# The options of a job, with their defaults
+JOB_OPTIONS = {
+    'metric': 'euclidean',
+    'neighbors': 10,
+    'strategy': 'best',
+    'moves': ['2-opt'],
+    'time_limit': None,
+    'max_iterations': None,
+    'seed': 0,
+    'construction': 'nearest-neighbor'
+}
+
+# The largest seed of the random kicks (see numpy.random.RandomState)
+MAX_SEED = 2 ** 32 - 1
+
+# The least number of seconds between two reports of the progress of a job
+PROGRESS_INTERVAL = 0.1
+
+# The number of finished jobs kept, to be looked up by id
+FINISHED_JOBS = 1024
+
+
+def parse_job(request: Dict[str, Any]) -> Tuple[Optional[str], CityTable, Dict[str, Any]]:
+    """Check the request for a job, of the form
+
+        {"coordinates": [[x, y], ...], "names": [...], "options": {...}}
+        or {"filename": "cities.csv", "options": {...}}
+
+    where the names of the cities (by default, their indexes) and the options (see JOB_OPTIONS)
+    are optional.
+
+    Args:
+        request: The decoded JSON request
+    Returns:
+        A tuple with
+            (1) the name of the csv file to load the cities from, or None
+            (2) the inline cities (with raw coordinates), or None
+            (3) the options of the job, with the defaults of the options not given
+    Raises:
+        ValueError: if the request is not a valid job
+    """
+    if not isinstance(request, dict):
+        raise ValueError('The request must be a JSON object')
+    unknown = set(request) - {'filename', 'coordinates', 'names', 'options'}
+    if unknown:
+        raise ValueError(f'Unknown fields: {sorted(unknown)}')
+    if ('filename' in request) == ('coordinates' in request):
+        raise ValueError("Either 'filename' or 'coordinates' must be given")
+
+    cities = None
+    if 'coordinates' in request:
+        coordinates = np.asarray(request['coordinates'], dtype=np.float64)
+        if coordinates.ndim != 2 or coordinates.shape[1] != 2 or len(coordinates) < 2:
+            raise ValueError("'coordinates' must list the [x, y] of at least 2 cities")
+        names = request.get('names', list(range(len(coordinates))))
+        if not isinstance(names, list) or len(names) != len(coordinates):
+            raise ValueError("'names' must list the name of each city")
+        cities = CityTable(names, coordinates)
+
+    options = dict(JOB_OPTIONS)
+    given = request.get('options', {})
+    if not isinstance(given, dict) or set(given) - set(JOB_OPTIONS):
+        raise ValueError(f'The options must be an object with some of {sorted(JOB_OPTIONS)}')
+    options.update(given)
+    _check_option(options['metric'] in DISTANCE_METRICS, 'metric')
+    _check_option(_is_count(options['neighbors']), 'neighbors')
+    _check_option(options['strategy'] in SWAP_STRATEGIES, 'strategy')
+    _check_option(isinstance(options['moves'], list) and options['moves']
+                  and set(options['moves']) <= set(MOVE_SET), 'moves')
+    _check_option(options['time_limit'] is None
+                  or (isinstance(options['time_limit'], (int, float))
+                      and not isinstance(options['time_limit'], bool)
+                      and options['time_limit'] >= 0), 'time_limit')
+    _check_option(options['max_iterations'] is None or _is_count(options['max_iterations']),
+                  'max_iterations')
+    _check_option(_is_count(options['seed']) and options['seed'] <= MAX_SEED, 'seed')
+    _check_option(options['construction'] in CONSTRUCTIONS, 'construction')
+    return request.get('filename'), cities, options
+
+
+def solve_job(cities: CityTable,
+              scale: int,
+              options: Dict[str, Any],
+              progress: Optional[Any] = None) -> Dict[str, Any]:
+    """Determine the close-to-optimal path of a job, in a worker process
+
+    Args:
+        cities: The cities to be visited, with transformed coordinates (see etl.transform)
+        scale: The scaling used to transform the coordinates
+        options: The options of the job (see parse_job)
+        progress: If given, a queue the (scaled back) path length is put on as it improves
+    Returns:
+        The (JSON serializable) result: the path length and path, the number of seconds taken,
+            and the number of swaps evaluated and applied and of kicks
+    """
+    start_time = time.perf_counter()
+    if progress is not None:
+        profiling.enable(_ProgressProfiler(progress, scale))
+    try:
+        distances = distance_matrix(cities, options['metric'])
+        candidates = (nearest_neighbors(cities, options['neighbors'], options['metric'])
+                      if options['neighbors'] else None)
+        statistics = SwapStatistics()
+        path, total_distance = determine_path(cities, distances, candidates, options['strategy'],
+                                              statistics, moves=options['moves'],
+                                              time_limit=options['time_limit'],
+                                              max_iterations=options['max_iterations'],
+                                              seed=options['seed'],
+                                              construction=options['construction'])
+    finally:
+        profiling.disable()
+    return dict(total_distance=float(total_distance / scale), path=path,
+                seconds=time.perf_counter() - start_time, evaluated=statistics.evaluated,
+                applied=statistics.applied, kicks=statistics.kicks)
+
+
+class Job:
+    """A job of the service: its status, the progress of its path length, and its result"""
+
+    def __init__(self, job_id: str, key: str):
+        """
+        Args:
+            job_id: The id of the job
+            key: The key of the instance and options of the job (see SolverService.key)
+        """
+        self.id = job_id
+        self.key = key
+        self.status = 'queued'
+        self.cached = False
+        self.progress = []
+        self.result = None
+        self.error = None
+        self.changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job is done, or has failed"""
+        return self.status in ('done', 'failed')
+
+    async def update(self, **fields: Any) -> None:
+        """Update the job, and wake up the streams of its progress"""
+        async with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.changed.notify_all()
+
+    async def add_progress(self, event: Dict[str, Any]) -> None:
+        """Record an improvement of the path length, and wake up the streams of its progress"""
+        async with self.changed:
+            self.progress.append(event)
+            self.changed.notify_all()
+
+    def summary(self) -> Dict[str, Any]:
+        """The (JSON serializable) status of the job, with its result or error once finished"""
+        summary = dict(id=self.id, status=self.status, cached=self.cached,
+                       progress=self.progress[-1] if self.progress else None)
+        if self.result is not None:
+            summary['result'] = self.result
+        if self.error is not None:
+            summary['error'] = self.error
+        return summary
+
+
+class SolverService:
+    """The solver service: an HTTP server queuing jobs onto a bounded pool of worker processes.
+
+    The results of the most recent instances (with the same cities and options) are cached, and an
+    instance already queued or running is not queued again, so that identical requests share a
+    single job.
+    """
+
+    def __init__(self, workers: int = 1, queue_size: int = 16, cache_size: int = 128):
+        """
+        Args:
+            workers: The number of worker processes, i.e. of jobs running at once
+            queue_size: The maximum number of jobs waiting for a worker, beyond which new jobs
+                are refused
+            cache_size: The maximum number of cached results
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_size = cache_size
+        self.jobs = OrderedDict()
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._ids = itertools.count(1)
+        self._queue = None
+        self._consumers = []
+        self._executor = None
+        self._manager = None
+        self._server = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> int:
+        """Start the worker processes and the HTTP server
+
+        Args:
+            host: The host name or address to listen on
+            port: The port to listen on, or 0 for any free port
+        Returns:
+            The port the server listens on
+        """
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self._manager = context.Manager()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._consumers = [asyncio.ensure_future(self._consume()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Serve requests until cancelled"""
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop the HTTP server, and then the worker processes once the running jobs are done"""
+        self._server.close()
+        await self._server.wait_closed()
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._executor.shutdown()
+        self._manager.shutdown()
+
+    @staticmethod
+    def key(cities: CityTable, scale: int, options: Dict[str, Any]) -> str:
+        """The key of the result of a job
+
+        Args:
+            cities: The cities to be visited, with transformed coordinates
+            scale: The scaling used to transform the coordinates
+            options: The options of the job
+        Returns:
+            A hexadecimal hash identifying the instance and the options
+        """
+        digest = hashlib.sha256(np.ascontiguousarray(cities.coordinates).tobytes())
+        digest.update(json.dumps([city_names(cities), scale, options], sort_keys=True,
+                                 default=str).encode())
+        return digest.hexdigest()
+
+    async def submit(self, request: Dict[str, Any]) -> Job:
+        """Queue a job, unless its result is cached or the same job is already queued or running
+
+        Args:
+            request: The decoded JSON request (see parse_job)
+        Returns:
+            The job
+        Raises:
+            ValueError: if the request is not a valid job, or its cities cannot be loaded
+            TypeError: if the coordinates of the cities are not numbers
+            OverflowError: if the coordinates of the cities are too large
+            OSError: if the file of the cities cannot be read
+            asyncio.QueueFull: if too many jobs are waiting for a worker
+        """
+        filename, cities, options = parse_job(request)
+        loop = asyncio.get_event_loop()
+        if filename is not None:
+            cities, scale = await loop.run_in_executor(None, etl, filename)
+        else:
+            coordinates, scale = transform(cities.coordinates)
+            cities = load(cities.names, coordinates)
+        key = self.key(cities, scale, options)
+
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            job = self._add_job(key)
+            job.status, job.cached, job.result = 'done', True, result
+            return job
+        for job in reversed(self.jobs.values()):
+            if job.key == key and not job.finished:
+                return job
+
+        self.misses += 1
+        job = Job(str(next(self._ids)), key)
+        self._queue.put_nowait((job, cities, scale, options))
+        self._add_job(key, job)
+        return job
+
+    def cache_info(self) -> Dict[str, int]:
+        """Report the result cache statistics, in the style of functools.lru_cache"""
+        return dict(hits=self.hits, misses=self.misses, maxsize=self.cache_size,
+                    currsize=len(self.results))
+
+    def _add_job(self, key: str, job: Optional[Job] = None) -> Job:
+        """Helper method to keep track of a (new) job, forgetting the oldest finished jobs"""
+        job = job if job is not None else Job(str(next(self._ids)), key)
+        self.jobs[job.id] = job
+        finished = [job_id for job_id, old_job in self.jobs.items() if old_job.finished]
+        for job_id in finished[:max(len(finished) - FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+        return job
+
+    async def _consume(self) -> None:
+        """Helper method to run the queued jobs, one at a time"""
+        while True:
+            job, cities, scale, options = await self._queue.get()
+            await self._run(job, cities, scale, options)
+
+    async def _run(self, job: Job, cities: CityTable, scale: int, options: Dict[str, Any]
+                   ) -> None:
+        """Helper method to run a job in a worker process, forwarding its progress"""
+        loop = asyncio.get_event_loop()
+        progress = self._manager.Queue()
+        forwarding = asyncio.ensure_future(self._forward_progress(job, progress))
+        await job.update(status='running')
+        try:
+            result = await loop.run_in_executor(self._executor, solve_job, cities, scale,
+                                                options, progress)
+        except Exception as error:  # pylint: disable=broad-except
+            result, message = None, f'{type(error).__name__}: {error}'
+        finally:
+            # The job only finishes once all of its progress is forwarded
+            progress.put(None)
+            await forwarding
+        if result is None:
+            await job.update(status='failed', error=message)
+            return
+        if self.cache_size:
+            self.results[job.key] = result
+            if len(self.results) > self.cache_size:
+                self.results.popitem(last=False)
+        await job.update(status='done', result=result)
+
+    @staticmethod
+    async def _forward_progress(job: Job, progress: Any) -> None:
+        """Helper method to record the progress put on the queue by a worker, until None"""
+        loop = asyncio.get_event_loop()
+        while True:
+            event = await loop.run_in_executor(None, progress.get)
+            if event is None:
+                return
+            await job.add_progress(event)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Helper method to answer a single HTTP request"""
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+            except ValueError as error:
+                writer.write(_response(HTTPStatus.BAD_REQUEST, dict(error=str(error))))
+                await writer.drain()
+                return
+            if method == 'GET' and path.startswith('/jobs/') and path.endswith('/progress'):
+                job = self.jobs.get(path[len('/jobs/'):-len('/progress')])
+                if job is not None:
+                    await self._stream_progress(job, writer)
+                    return
+                status, response = HTTPStatus.NOT_FOUND, dict(error='Unknown job')
+            else:
+                status, response = await self._route(method, path, body)
+            writer.write(_response(status, response))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Any]:
+        """Helper method to answer the requests other than the progress streams"""
+        if path == '/jobs':
+            if method != 'POST':
+                return HTTPStatus.METHOD_NOT_ALLOWED, dict(error='Use POST to submit a job')
+            try:
+                job = await self.submit(json.loads(body or b'null'))
+            except (ValueError, TypeError, OverflowError, OSError) as error:
+                return HTTPStatus.BAD_REQUEST, dict(error=str(error))
+            except asyncio.QueueFull:
+                return HTTPStatus.SERVICE_UNAVAILABLE, dict(error='Too many jobs are queued')
+            return (HTTPStatus.OK if job.finished else HTTPStatus.ACCEPTED), job.summary()
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, dict(error='Use GET')
+        if path == '/status':
+            running = sum(job.status == 'running' for job in self.jobs.values())
+            return HTTPStatus.OK, dict(queued=self._queue.qsize(), running=running,
+                                       workers=self.workers, cache=self.cache_info())
+        job = self.jobs.get(path[len('/jobs/'):]) if path.startswith('/jobs/') else None
+        if job is None:
+            return HTTPStatus.NOT_FOUND, dict(error='Unknown job' if path.startswith('/jobs/')
+                                              else 'Unknown path')
+        return HTTPStatus.OK, job.summary()
+
+    @staticmethod
+    async def _stream_progress(job: Job, writer: asyncio.StreamWriter) -> None:
+        """Helper method to stream the progress of a job as JSON lines, in chunks, ending with
+        the summary of the job once it is finished"""
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                     b'Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n')
+        sent = 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: len(job.progress) > sent or job.finished)
+                events, finished = job.progress[sent:], job.finished
+            sent += len(events)
+            lines = [json.dumps(event) for event in events]
+            if finished:
+                lines.append(json.dumps(job.summary()))
+            _write_chunk(writer, ''.join(line + '\n' for line in lines).encode())
+            await writer.drain()
+            if finished:
+                break
+        _write_chunk(writer, b'')
+        await writer.drain()
+
+
+class _ProgressProfiler(profiling.Profiler):
+    """Helper class putting the path length on a queue as it is recorded, at most once per
+    PROGRESS_INTERVAL seconds"""
+
+    def __init__(self, progress: Any, scale: int):
+        super().__init__()
+        self.progress = progress
+        self.scale = scale
+        self.reported_time = None
+
+    def record(self, total_distance: float) -> None:
+        now = time.perf_counter()
+        if self.reported_time is None or now - self.reported_time >= PROGRESS_INTERVAL:
+            self.reported_time = now
+            self.progress.put(dict(seconds=now - self.start_time,
+                                   total_distance=float(total_distance / self.scale)))
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """Helper method to read the method, path and body of an HTTP request
+
+    Raises:
+        ConnectionError: if the request line is not that of an HTTP request
+        ValueError: if the Content-Length header is not a non-negative integer
+    """
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise ConnectionError('Not an HTTP request')
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    content_length = headers.get('content-length', '0')
+    if not content_length.isdigit():
+        raise ValueError(f'Invalid Content-Length: {content_length}')
+    body = await reader.readexactly(int(content_length))
+    return request_line[0].upper(), request_line[1].split('?')[0].rstrip('/'), body
+
+
+def _response(status: HTTPStatus, body: Any) -> bytes:
+    """Helper method for an HTTP response with a JSON body"""
+    payload = json.dumps(body).encode()
+    return (f'HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n').encode() + payload
+
+
+def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+    """Helper method to write a chunk of a chunked HTTP response (the last one is empty)"""
+    writer.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+
+
+def _is_count(value: Any) -> bool:
+    """Helper method to check that an option is a non-negative integer"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _check_option(valid: bool, name: str) -> None:
+    """Helper method to reject an invalid option"""
+    if not valid:
+        raise ValueError(f'Invalid option: {name}')
+
+
+async def serve(host: str, port: int, workers: int, queue_size: int, cache_size: int) -> None:
+    """Run the solver service until interrupted (see SolverService)"""
+    service = SolverService(workers, queue_size, cache_size)
+    port = await service.start(host, port)
+    print(f'Serving on http://{host}:{port} with {workers} worker(s)', flush=True)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', '-p', default=DEFAULT_PORT, show_default=True,
+              type=click.IntRange(0, 65535))
+@click.option('--workers', '-w', default=1, show_default=True, type=click.IntRange(min=1),
+              help='The number of worker processes, i.e. of jobs running at once')
+@click.option('--queue-size', default=16, show_default=True, type=click.IntRange(min=1),
+              help='The maximum number of jobs waiting for a worker')
+@click.option('--cache-size', default=128, show_default=True, type=click.IntRange(min=0),
+              help='The maximum number of cached results')
+def main(host: str, port: int, workers: int, queue_size: int, cache_size: int) -> None:
+    """Run the solver service
+
+    Args:
+        host: the host name or address to listen on
+        port: the port to listen on
+        workers: the number of worker processes
+        queue_size: the maximum number of jobs waiting for a worker
+        cache_size: the maximum number of cached results
+    """
+    try:
+        asyncio.run(serve(host, port, workers, queue_size, cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
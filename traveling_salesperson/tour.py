@@ -0,0 +1,118 @@
+"""
+Module for the tour (closed path) data structure used by the local search
+"""
+from typing import List
+
+import numpy as np
+
+
+class Tour:
+    """A closed path through all nodes, stored as an array of nodes (in the order they are
+    visited) together with the position of every node in that array.
+
+    Both next/prev/between queries and position lookups are O(1).  A segment is reversed by
+    reversing whichever side of the closed path is shorter, which gives the same tour (traversed
+    in the opposite direction), so at most half of the nodes are ever moved.
+    """
+
+    def __init__(self, path: List[int]):
+        """
+        Args:
+            path: The nodes in the order they are visited
+        """
+        self.order = np.array(path, dtype=np.int64)
+        self.positions = np.empty_like(self.order)
+        self.positions[self.order] = np.arange(len(self.order))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, position: int) -> int:
+        """The node at the given position"""
+        return self.order[position]
+
+    def __iter__(self):
+        return iter(self.order.tolist())
+
+    def position(self, node: int) -> int:
+        """The position of the given node"""
+        return self.positions[node]
+
+    def next(self, node: int) -> int:
+        """The node visited after the given node"""
+        return self.order[(self.positions[node] + 1) % len(self.order)]
+
+    def prev(self, node: int) -> int:
+        """The node visited before the given node"""
+        return self.order[self.positions[node] - 1]
+
+    def between(self, node_a: int, node_b: int, node_c: int) -> bool:
+        """Whether node_b is visited when going forward from node_a to node_c (inclusive)"""
+        position_a, position_b, position_c = self.positions[[node_a, node_b, node_c]]
+        if position_a <= position_c:
+            return position_a <= position_b <= position_c
+        return position_b >= position_a or position_b <= position_c
+
+    def reverse(self, start: int, end: int) -> None:
+        """Reverse the order of the nodes from position start forward to position end (inclusive,
+        wrapping around the end of the array if needed).
+
+        Args:
+            start: The position of the first node of the segment
+            end: The position of the last node of the segment
+        """
+        nodes = len(self.order)
+        length = (end - start) % nodes + 1
+        if 2 * length > nodes:
+            # Reversing the complement gives the same closed path
+            start, end, length = (end + 1) % nodes, (start - 1) % nodes, nodes - length
+        if length < 2:
+            return
+
+        if start + length <= nodes:
+            segment = slice(start, start + length)
+            self.order[segment] = self.order[segment][::-1]
+            self.positions[self.order[segment]] = np.arange(start, start + length)
+        else:
+            segment = (start + np.arange(length)) % nodes
+            self.order[segment] = self.order[segment[::-1]]
+            self.positions[self.order[segment]] = segment
+
+    def move(self, start: int, end: int, after: int, reverse: bool = False) -> None:
+        """Move the nodes from position start forward to position end (inclusive) so that they
+        follow the node at position after, which must not be part of the segment.  Only the
+        nodes between the segment and its new location, on whichever side is shorter, are moved.
+
+        Args:
+            start: The position of the first node of the segment
+            end: The position of the last node of the segment
+            after: The position of the node the segment should follow
+            reverse: Whether to insert the segment in the reverse order
+        """
+        nodes = len(self.order)
+        segment = self.order[(start + np.arange((end - start) % nodes + 1)) % nodes]
+        if reverse:
+            segment = segment[::-1]
+
+        forward_gap = (after - end) % nodes
+        backward_gap = (start - after - 1) % nodes
+        if forward_gap <= backward_gap:
+            first = start
+            gap = self.order[(end + 1 + np.arange(forward_gap)) % nodes]
+            block = np.concatenate((gap, segment))
+        else:
+            first = (after + 1) % nodes
+            gap = self.order[(after + 1 + np.arange(backward_gap)) % nodes]
+            block = np.concatenate((segment, gap))
+
+        block_positions = (first + np.arange(len(block))) % nodes
+        self.order[block_positions] = block
+        self.positions[block] = block_positions
+
+    def copy(self) -> 'Tour':
+        """An independent copy of the tour"""
+        return Tour(self.order)
+
+    def to_list(self) -> List[int]:
+        """The nodes in the order they are visited"""
+        return self.order.tolist()
@@ -0,0 +1,169 @@
+"""
+Module for saving and loading tours, as TSPLIB .tour files or compact binary (.npy) files, and
+for the store of the shortest tour found for each instance
+"""
+from collections import namedtuple
+import os
+import re
+import tempfile
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from traveling_salesperson.cache import DEFAULT_CACHE_DIRECTORY, file_digest
+
+
+DEFAULT_TOUR_DIRECTORY = os.path.join(DEFAULT_CACHE_DIRECTORY, 'tours')
+
+StoredTour = namedtuple('StoredTour', 'tour length')
+
+
+def write_tour(filename: str,
+               tour: Sequence[int],
+               name: Optional[str] = None,
+               length: Optional[float] = None) -> None:
+    """Write a tour to a TSPLIB .tour file (with 1-based city numbers), or to a compact binary
+    file of 0-based city indexes if the name ends with .npy
+
+    Args:
+        filename: The name of the file
+        tour: The indexes of the cities in the order they are visited
+        name: The name of the tour, for the TSPLIB header (the name of the file by default)
+        length: The length of the tour, for the comment of the TSPLIB header
+    """
+    tour = np.asarray(tour, dtype=np.int64)
+    if filename.endswith('.npy'):
+        np.save(filename, tour.astype(_index_dtype(len(tour))))
+        return
+    with open(filename, 'w') as file:
+        file.write(f'NAME : {name or os.path.basename(filename)}\n')
+        if length is not None:
+            file.write(f'COMMENT : Length = {length}\n')
+        file.write(f'TYPE : TOUR\nDIMENSION : {len(tour)}\nTOUR_SECTION\n')
+        file.write('\n'.join(map(str, (tour + 1).tolist())))
+        file.write('\n-1\nEOF\n')
+
+
+def read_tour(filename: str) -> np.ndarray:
+    """Read a tour from a TSPLIB .tour file, or from a binary file if the name ends with .npy
+
+    Args:
+        filename: The name of the file
+    Returns:
+        The (0-based) indexes of the cities in the order they are visited
+    Raises:
+        ValueError: if the file is not a valid tour file
+    """
+    if filename.endswith('.npy'):
+        return np.load(filename).astype(np.int64)
+    return _read_tsplib_tour(filename)[0]
+
+
+class TourStore:
+    """A directory of the shortest tour found for each instance, as TSPLIB .tour files named after
+    a hash of the content of the input file and the distance metric.  A tour is only replaced by
+    a shorter one, so that a run can resume from the best tour of all previous runs.
+    """
+
+    def __init__(self, directory: str = DEFAULT_TOUR_DIRECTORY):
+        """
+        Args:
+            directory: The directory holding the tours (created when needed)
+        """
+        self.directory = os.path.expanduser(directory)
+
+    @staticmethod
+    def key(filename: str, distance_metric_key: str) -> str:
+        """The key of the tours of the given input
+
+        Args:
+            filename: The name of the file the cities were read from
+            distance_metric_key: The name of the distance metric
+        Returns:
+            A hexadecimal hash identifying the instance
+        """
+        digest = file_digest(filename)
+        digest.update(f'|{distance_metric_key}'.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[StoredTour]:
+        """The stored tour with the given key
+
+        Args:
+            key: The key of the instance (see TourStore.key)
+        Returns:
+            The tour and its length, or None if no tour is stored
+        """
+        try:
+            tour, length = _read_tsplib_tour(self._path(key))
+        except (OSError, ValueError):
+            return None
+        return StoredTour(tour, length)
+
+    def put(self, key: str, tour: Sequence[int], length: float, name: Optional[str] = None
+            ) -> bool:
+        """Store a tour, unless a tour at least as short is already stored
+
+        Args:
+            key: The key of the instance (see TourStore.key)
+            tour: The indexes of the cities in the order they are visited
+            length: The length of the tour
+            name: The name of the tour, for the TSPLIB header
+        Returns:
+            Whether the tour was stored
+        """
+        stored = self.get(key)
+        if stored is not None and stored.length is not None and stored.length <= length:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first, so that a tour is never read half-written
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(descriptor)
+        try:
+            write_tour(temporary_path, tour, name, length)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        return True
+
+    def _path(self, key: str) -> str:
+        """Helper method for the name of the file holding the tour with the given key"""
+        return os.path.join(self.directory, f'{key}.tour')
+
+
+def _read_tsplib_tour(filename: str) -> Tuple[np.ndarray, Optional[float]]:
+    """Helper method to read the tour of a TSPLIB .tour file, with the length found in its
+    comment (or None)"""
+    length = None
+    dimension = None
+    with open(filename) as file:
+        for line in file:
+            keyword, _, value = line.partition(':')
+            keyword = keyword.strip().upper()
+            if keyword == 'TOUR_SECTION':
+                break
+            if keyword == 'DIMENSION':
+                dimension = int(value)
+            elif keyword == 'COMMENT':
+                match = re.search(r'Length\s*=\s*([-+.\deE]+)', value)
+                length = float(match.group(1)) if match else length
+        else:
+            raise ValueError(f'No TOUR_SECTION in {filename}')
+        numbers = file.read().split()
+    # The section ends with -1, and the file with EOF (both optional)
+    for end in ('-1', 'EOF'):
+        if end in numbers:
+            numbers = numbers[:numbers.index(end)]
+    tour = np.array(numbers, dtype=np.int64) - 1
+    if dimension is not None and len(tour) != dimension:
+        raise ValueError(f'{filename} has {len(tour)} cities instead of {dimension}')
+    return tour, length
+
+
+def _index_dtype(count: int) -> np.dtype:
+    """Helper method for the smallest unsigned integer type holding the indexes of count cities"""
+    for dtype in (np.uint16, np.uint32):
+        if count <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)